@@ -0,0 +1,101 @@
+import argparse
+import asyncio
+import random
+import time
+
+import payments
+import system
+from benchmarks import datagen
+from benchmarks.common import LatencyRecorder, emit
+
+
+async def checkout(service, user, target, rng, recorder, stats, retry_rate):
+    cinema, movie, showtime = target
+    free = [seat for seat in showtime.seats if not seat.is_reserved]
+    if not free:
+        stats["sold_out"] += 1
+        return
+    start = time.perf_counter()
+    try:
+        cart = service.hold_seat(user, cinema.name, movie.name, showtime.time, rng.choice(free).row_and_number)
+    except system.BookingError:
+        stats["hold_conflicts"] += 1
+        return
+    service.price_cart(cart, "Standard")
+    attempts = [service.pay_async(cart, "credit_card", "4" * 16)]
+    if rng.random() < retry_rate:
+        attempts.append(service.payments.authorize(service.payment_request(cart, "credit_card", "4" * 16)))
+        stats["duplicate_requests"] += 1
+    outcome = (await asyncio.gather(*attempts, return_exceptions=True))[0]
+    if isinstance(outcome, system.BookingError):
+        stats[outcome.code] = stats.get(outcome.code, 0) + 1
+        recorder.record("checkout_failed", time.perf_counter() - start)
+        return
+    service.confirm(cart)
+    stats["confirmed"] += 1
+    recorder.record("checkout", time.perf_counter() - start)
+
+
+async def run(args):
+    gateway = payments.SimulatedGateway(args.latency, args.jitter, args.failure_rate, args.stall_rate, args.seed)
+    processor = payments.PaymentProcessor(gateway, timeout=args.timeout, max_in_flight=args.max_in_flight)
+    service = system.BookingService(system.cinemas, system.promotion_manager, system.notification_service,
+                                    processor)
+    rng = random.Random(args.seed)
+    targets = datagen.showtimes()
+    users = datagen.buyers()
+    recorder = LatencyRecorder()
+    stats = {"confirmed": 0, "sold_out": 0, "hold_conflicts": 0, "duplicate_requests": 0}
+    limiter = asyncio.Semaphore(args.concurrency)
+
+    async def buyer(i):
+        async with limiter:
+            await checkout(service, users[i % len(users)], rng.choice(targets), rng, recorder, stats,
+                           args.retry_rate)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(buyer(i) for i in range(args.checkouts)))
+    elapsed = time.perf_counter() - start
+
+    recorder.set_elapsed("checkout", elapsed)
+    recorder.set_elapsed("checkout_failed", elapsed)
+    held = sum(1 for _, _, s in targets for seat in s.seats if seat.is_reserved and seat.reservation_expiry)
+    summary = recorder.summary()
+    summary.update(stats)
+    summary.update({
+        "seconds": elapsed,
+        "checkouts_per_sec": stats["confirmed"] / elapsed,
+        "gateway_calls": gateway.calls,
+        "captured_charges": len(gateway.captured()),
+        "double_charges": len(gateway.captured()) - stats["confirmed"],
+        "seats_left_on_hold": held,
+    })
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checkout throughput under payment gateway latency.")
+    parser.add_argument("--checkouts", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=500, help="buyers checking out at once")
+    parser.add_argument("--max-in-flight", type=int, default=100, help="gateway authorizations in flight")
+    parser.add_argument("--latency", type=float, default=0.05, help="gateway latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--failure-rate", type=float, default=0.05)
+    parser.add_argument("--stall-rate", type=float, default=0.01, help="fraction of calls that stall past the timeout")
+    parser.add_argument("--timeout", type=float, default=0.5)
+    parser.add_argument("--retry-rate", type=float, default=0.1, help="fraction of checkouts sent twice")
+    parser.add_argument("--cinemas", type=int, default=5)
+    parser.add_argument("--showtimes", type=int, default=8)
+    parser.add_argument("--seats", type=int, default=200)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    datagen.build_catalog(args.cinemas, args.showtimes, args.seats, args.users, seed=args.seed)
+    system.notification_service.echo = False
+    emit("checkout", vars(args), asyncio.run(run(args)), args.output)
+
+
+if __name__ == "__main__":
+    main()
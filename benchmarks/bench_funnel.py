@@ -0,0 +1,154 @@
+import argparse
+import asyncio
+import builtins
+import random
+import time
+
+import system
+from benchmarks import datagen
+from benchmarks.common import LatencyRecorder, emit, quiet
+
+
+def bench_operations(recorder, iterations, rng):
+    targets = datagen.showtimes()
+    users = datagen.buyers()
+    coupon = system.Coupon("BENCH10", system.PERCENTAGE, 10, "bench", applicable_movies=[])
+    notifications = system.notification_service
+
+    with quiet():
+        for _ in range(iterations):
+            cinema, movie, showtime = rng.choice(targets)
+            user = rng.choice(users)
+            with recorder.measure("SHOWTIME.list_available_seats"):
+                showtime.list_available_seats()
+
+            seat = rng.choice(showtime.seats)
+            if not seat.is_reserved:
+                with recorder.measure("SEAT.temp_reserve"):
+                    seat.temp_reserve(user, minutes=10)
+                seat.free(user)
+
+            with recorder.measure("Coupon.can_apply"):
+                coupon.can_apply(25.0, cinema.name, movie.name, "regular")
+
+            ticket = system.TICKET("Standard", 25.0, seat, showtime)
+            with recorder.measure("TICKET.promotion"):
+                ticket.promotion(coupon)
+
+            with recorder.measure("NotificationService.send_notification"):
+                notifications.send_notification(user, system.BOOKING_CONFIRMED, "bench", {"movie": movie.name})
+
+
+def scripted_buyer(showtime, seat):
+    answers = iter([showtime.time, seat.row_and_number, "Standard", "", "2", "1", "3"])
+    return lambda prompt="": next(answers)
+
+
+def bench_scripted(recorder, purchases, rng):
+    targets = datagen.showtimes()
+    users = datagen.buyers()
+    original_input = builtins.input
+    start = time.perf_counter()
+    try:
+        with quiet():
+            for _ in range(purchases):
+                cinema, movie, showtime = rng.choice(targets)
+                free = [seat for seat in showtime.seats if not seat.is_reserved]
+                if not free:
+                    continue
+                system.usuario_logado = rng.choice(users)
+                builtins.input = scripted_buyer(showtime, rng.choice(free))
+                with recorder.measure("comprar_ingresso"):
+                    system.comprar_ingresso(movie, cinema)
+    finally:
+        builtins.input = original_input
+        system.usuario_logado = None
+    recorder.set_elapsed("comprar_ingresso", time.perf_counter() - start)
+
+
+async def concurrent_buyer(client, recorder, login, password, purchases, rng):
+    with recorder.measure("login"):
+        await client.call("login", login=login, password=password)
+    targets = [(c.name, m.name, s.time) for c, m, s in datagen.showtimes()]
+    for _ in range(purchases):
+        cinema, movie, time_ = rng.choice(targets)
+        with recorder.measure("seats"):
+            seats = await client.call("seats", cinema=cinema, movie=movie, time=time_)
+        if not seats:
+            continue
+        started = time.perf_counter()
+        try:
+            with recorder.measure("hold"):
+                cart = await client.call("hold", cinema=cinema, movie=movie, time=time_, seat=rng.choice(seats))
+        except system.BookingError:
+            continue
+        with recorder.measure("price"):
+            await client.call("price", cart_id=cart["cart_id"], ticket_type="Standard")
+        with recorder.measure("pay"):
+            await client.call("pay", cart_id=cart["cart_id"], method="pix")
+        with recorder.measure("confirm"):
+            await client.call("confirm", cart_id=cart["cart_id"])
+        recorder.record("checkout", time.perf_counter() - started)
+
+
+async def bench_concurrent(recorder, clients, purchases, password, rng):
+    from server import BookingClient, BookingServer
+
+    server = BookingServer()
+    await server.start("127.0.0.1", 0)
+    port = server.server.sockets[0].getsockname()[1]
+    users = datagen.buyers()
+
+    async def run(i):
+        client = await BookingClient().connect("127.0.0.1", port)
+        try:
+            await concurrent_buyer(client, recorder, users[i % len(users)].login, password,
+                                   purchases, random.Random(rng.random()))
+        finally:
+            await client.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run(i) for i in range(clients)))
+    elapsed = time.perf_counter() - start
+    await server.close()
+    for operation in list(recorder.samples):
+        recorder.set_elapsed(operation, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Purchase funnel benchmark.")
+    parser.add_argument("--cinemas", type=int, default=5)
+    parser.add_argument("--showtimes", type=int, default=8, help="showtimes per cinema")
+    parser.add_argument("--seats", type=int, default=200, help="seats per hall")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--mode", choices=["scripted", "concurrent", "all"], default="all")
+    parser.add_argument("--iterations", type=int, default=2000, help="micro-operation iterations")
+    parser.add_argument("--purchases", type=int, default=500, help="purchases, split across clients in concurrent mode")
+    parser.add_argument("--clients", type=int, default=100, help="concurrent clients")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="append the JSON result to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    password = datagen.build_catalog(args.cinemas, args.showtimes, args.seats, args.users, seed=args.seed)
+    system.notification_service.echo = False
+    # Synthetic buyers purchase back to back; admission control is measured by bench_surge.
+    system.booking_service.admission = None
+    recorder = LatencyRecorder()
+
+    if args.mode in ("scripted", "all"):
+        bench_operations(recorder, args.iterations, rng)
+        bench_scripted(recorder, args.purchases, rng)
+    if args.mode in ("concurrent", "all"):
+        concurrent = LatencyRecorder()
+        asyncio.run(bench_concurrent(concurrent, args.clients, max(1, args.purchases // args.clients),
+                                     password, rng))
+        for operation, samples in concurrent.samples.items():
+            recorder.samples[f"concurrent.{operation}"] = samples
+            recorder.set_elapsed(f"concurrent.{operation}", concurrent.elapsed[operation])
+
+    emit("funnel", vars(args), recorder.summary(), args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import argparse
+import csv
+import json
+import os
+import tempfile
+import time
+
+import importer
+import system
+from benchmarks import datagen
+from benchmarks.common import emit, quiet
+
+COLUMNS = ["kind", "cinema", "movie", "duration", "genre", "time", "screen", "layout",
+           "code", "coupon_type", "value", "description"]
+
+
+def records(args):
+    movies = [(f"Cinema {c}", f"Import {c}-{m}") for c in range(args.cinemas) for m in range(args.movies)]
+    for cinema, movie in movies:
+        yield {"kind": "movie", "cinema": cinema, "movie": movie, "duration": 120, "genre": "Drama"}
+    for i in range(args.rows):
+        cinema, movie = movies[i % len(movies)]
+        hour, minute = divmod(i // len(movies) % (24 * 60), 60)
+        yield {"kind": "showtime", "cinema": cinema, "movie": movie, "time": f"{hour:02d}:{minute:02d}",
+               "screen": i % 12 + 1, "layout": args.layout}
+    for i in range(args.coupons):
+        yield {"kind": "coupon", "code": f"BULK{i}", "coupon_type": "percentage", "value": 10,
+               "description": "Bulk coupon"}
+
+
+def write_file(args, directory):
+    path = os.path.join(directory, f"catalog.{args.format}")
+    with open(path, "w", newline="", encoding="utf-8") as handle:
+        if args.format == "csv":
+            writer = csv.DictWriter(handle, COLUMNS)
+            writer.writeheader()
+            writer.writerows(records(args))
+        else:
+            for record in records(args):
+                handle.write(json.dumps(record) + "\n")
+    return path
+
+
+def baseline(args):
+    # One showtime at a time through the admin path: S1..Sn seats and a notification per user.
+    admin = system.usuarios_registrados["admin"]
+    movie = system.MOVIE("Baseline", 120, "Drama")
+    system.cinemas["Cinema 0"].add_movie(movie)
+    seats = len(importer.layout_labels(args.layout))
+    start = time.perf_counter()
+    with quiet():
+        for i in range(args.baseline_rows):
+            hour, minute = divmod(i % (24 * 60), 60)
+            admin.add_showtime_to_movie(movie, f"{hour:02d}:{minute:02d}", 1,
+                                        [system.SEAT(f"S{n}") for n in range(1, seats + 1)])
+    elapsed = time.perf_counter() - start
+    return {"rows": args.baseline_rows, "seconds": elapsed, "rows_per_sec": args.baseline_rows / elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rows per second of the bulk catalog importer.")
+    parser.add_argument("--rows", type=int, default=20000, help="showtime rows in the file")
+    parser.add_argument("--movies", type=int, default=20, help="new movies per cinema")
+    parser.add_argument("--coupons", type=int, default=100)
+    parser.add_argument("--layout", default="A-L:20", help="hall layout of every imported showtime")
+    parser.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--cinemas", type=int, default=5)
+    parser.add_argument("--users", type=int, default=200, help="users to notify")
+    parser.add_argument("--baseline-rows", type=int, default=200, help="showtimes added one by one for comparison")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    datagen.build_catalog(args.cinemas, showtimes=1, seats=10, users=args.users)
+    system.notification_service.echo = False
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_file(args, directory)
+        size = os.path.getsize(path)
+        report = importer.Importer(system.cinemas, system.promotion_manager, system.notification_service,
+                                   system.usuarios_registrados, args.chunk_size).run(path)
+    rows = report["rows"]
+    results = {
+        "file_bytes": size,
+        "rows": rows,
+        "rejected": report["rejected"],
+        "seats": report["seats"],
+        "seconds": report["seconds"],
+        "rows_per_sec": rows / report["seconds"],
+        "seats_per_sec": report["seats"] / report["seconds"],
+        "notifications": len(system.notification_service.notifications),
+        "one_by_one": baseline(args),
+    }
+    results["speedup"] = results["rows_per_sec"] / results["one_by_one"]["rows_per_sec"]
+    emit("import", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import argparse
+import asyncio
+import time
+
+import system
+from benchmarks.common import emit
+
+
+def build_users(auth, count, password):
+    futures = [auth.hash_password(password) for _ in range(count)]
+    for i, future in enumerate(futures):
+        login = f"user{i}"
+        auth.users[login] = system.USER(f"User {i}", login, password_hash=future.result())
+    return [f"user{i}" for i in range(count)]
+
+
+async def concurrent_logins(auth, logins, password, total):
+    tasks = [auth.login_async(logins[i % len(logins)], password) for i in range(total)]
+    return await asyncio.gather(*tasks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Login throughput at a given scrypt cost.")
+    parser.add_argument("--cost", type=int, default=14, help="scrypt cost exponent (N = 2**cost)")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--lookups", type=int, default=100000)
+    parser.add_argument("--output", help="append the JSON result to this file")
+    args = parser.parse_args()
+
+    password = "benchmark-password"
+    hasher = system.PasswordHasher(cost=args.cost)
+    auth = system.AuthService({}, hasher, workers=args.workers)
+    system.password_hasher = hasher
+    logins = build_users(auth, args.users, password)
+
+    start = time.perf_counter()
+    for i in range(args.logins):
+        auth.login(logins[i % len(logins)], password)
+    sequential = time.perf_counter() - start
+
+    start = time.perf_counter()
+    tokens = asyncio.run(concurrent_logins(auth, logins, password, args.logins))
+    concurrent = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(args.lookups):
+        auth.resolve(tokens[i % len(tokens)])
+    lookups = time.perf_counter() - start
+
+    emit("login", vars(args), {
+        "sequential_logins_per_sec": args.logins / sequential,
+        "concurrent_logins_per_sec": args.logins / concurrent,
+        "session_lookups_per_sec": args.lookups / lookups,
+        "session_hits": auth.sessions.hits,
+        "session_misses": auth.sessions.misses,
+    }, args.output)
+
+
+if __name__ == "__main__":
+    main()
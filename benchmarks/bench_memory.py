@@ -0,0 +1,102 @@
+import argparse
+import gc
+import tracemalloc
+import uuid
+
+import system
+from benchmarks import datagen
+from benchmarks.common import emit
+
+
+class LegacySeat:
+    def __init__(self, row_and_number):
+        self.row_and_number = row_and_number
+        self.is_reserved = False
+        self.reservation_history = []
+        self.reservation_expiry = None
+        self.showtime = None
+
+
+class LegacyShowtime:
+    def __init__(self, movie, time, screen_number, seats):
+        self.id = str(uuid.uuid4())
+        self.movie = movie
+        self.time = time
+        self.screen_number = screen_number
+        self.seats = seats
+        for seat in seats:
+            seat.showtime = self
+
+
+class LegacyTicket:
+    def __init__(self, name, price, seat, showtime):
+        self.name = name
+        self.price = price
+        self.seat = seat
+        self.showtime = showtime
+
+
+def measure(build, *args):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = build(*args)
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return objects, used
+
+
+def build_showtimes(seat_class, showtime_class, movie, count, seats_per_showtime):
+    # Labels are formatted per seat, as loaders and admin input produce them.
+    return [showtime_class(movie, f"{10 + s % 12:02d}:00", s % 20 + 1,
+                           [seat_class(label) for label in datagen.seat_labels(seats_per_showtime)])
+            for s in range(count)]
+
+
+def build_tickets(ticket_class, showtimes, count):
+    seats = [(seat, showtime) for showtime in showtimes for seat in showtime.seats][:count]
+    return [ticket_class("Standard", 25.0, seat, showtime) for seat, showtime in seats]
+
+
+def run(seat_class, showtime_class, ticket_class, args):
+    movie = system.MOVIE("Memory", 120, "Drama")
+    count = max(1, args.seats // args.seats_per_showtime)
+    showtimes, seat_bytes = measure(build_showtimes, seat_class, showtime_class, movie, count,
+                                    args.seats_per_showtime)
+    seats = count * args.seats_per_showtime
+    tickets, ticket_bytes = measure(build_tickets, ticket_class, showtimes, args.tickets)
+    result = {
+        "seats": seats,
+        "seat_bytes": seat_bytes,
+        "bytes_per_seat": seat_bytes / seats,
+        "tickets": len(tickets),
+        "ticket_bytes": ticket_bytes,
+        "bytes_per_ticket": ticket_bytes / len(tickets),
+    }
+    del tickets, showtimes
+    gc.collect()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bytes per seat and per ticket, legacy objects vs compact ones.")
+    parser.add_argument("--seats", type=int, default=1_000_000)
+    parser.add_argument("--seats-per-showtime", type=int, default=200)
+    parser.add_argument("--tickets", type=int, default=200_000)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    legacy = run(LegacySeat, LegacyShowtime, LegacyTicket, args)
+    compact = run(system.SEAT, system.SHOWTIME, system.TICKET, args)
+    results = {
+        "legacy": legacy,
+        "compact": compact,
+        "seat_reduction": 1 - compact["bytes_per_seat"] / legacy["bytes_per_seat"],
+        "ticket_reduction": 1 - compact["bytes_per_ticket"] / legacy["bytes_per_ticket"],
+    }
+    emit("memory", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    main()
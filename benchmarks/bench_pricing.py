@@ -0,0 +1,71 @@
+import argparse
+import random
+import time
+
+import system
+from benchmarks import datagen
+from benchmarks.common import emit
+
+
+def churn(showtimes, engine, args, rng):
+    # Seats are taken and given back one at a time, as holds and releases do, so the
+    # tables are only ever moved across a tier boundary by the event handler. Each
+    # showtime drifts towards its own demand level, spreading them over all tiers.
+    demand = {showtime.id: rng.random() for showtime in showtimes}
+    start = time.perf_counter()
+    for _ in range(args.changes):
+        showtime = rng.choice(showtimes)
+        reserve = showtime.free_count > len(showtime.seats) * (1 - demand[showtime.id])
+        seat = rng.choice(showtime.seats)
+        while seat.is_reserved == reserve:
+            seat = rng.choice(showtime.seats)
+        seat.is_reserved = reserve
+        engine.seat_changed(seat)
+    return time.perf_counter() - start
+
+
+def lookups(seats, price):
+    start = time.perf_counter()
+    prices = [price(seat) for seat in seats]
+    return time.perf_counter() - start, prices
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checkout price lookups, precomputed tables vs computed on the fly.")
+    parser.add_argument("--cinemas", type=int, default=4)
+    parser.add_argument("--showtimes", type=int, default=8)
+    parser.add_argument("--seats", type=int, default=200)
+    parser.add_argument("--changes", type=int, default=200000, help="seat holds/releases applied before pricing")
+    parser.add_argument("--lookups", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    datagen.build_catalog(args.cinemas, args.showtimes, args.seats, users=10, seed=args.seed)
+    engine = system.PricingEngine()
+    showtimes = [showtime for _, _, showtime in datagen.showtimes()]
+    start = time.perf_counter()
+    for showtime in showtimes:
+        engine.table(showtime)
+    build = time.perf_counter() - start
+    rng = random.Random(args.seed)
+    update = churn(showtimes, engine, args, rng)
+
+    seats = [rng.choice(rng.choice(showtimes).seats) for _ in range(args.lookups)]
+    table_seconds, table_prices = lookups(seats, engine.price)
+    computed_seconds, computed_prices = lookups(seats, engine.compute)
+    results = {
+        "showtimes": len(showtimes),
+        "build_seconds": build,
+        "seat_change_us": update / args.changes * 1e6,
+        "table_lookup_us": table_seconds / args.lookups * 1e6,
+        "computed_lookup_us": computed_seconds / args.lookups * 1e6,
+        "speedup": computed_seconds / table_seconds,
+        "mismatches": sum(a != b for a, b in zip(table_prices, computed_prices)),
+        "tiers": sorted({engine.table(showtime).tier for showtime in showtimes}),
+    }
+    emit("pricing", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    main()
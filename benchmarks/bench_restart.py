@@ -0,0 +1,93 @@
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+import journal
+import system
+from benchmarks import datagen
+from benchmarks.common import emit, quiet
+
+
+def generate(directory, events, snapshot_every, rng):
+    diary = journal.Journal(directory, system.cinemas, system.usuarios_registrados, system.promotion_manager,
+                            system.notification_service, snapshot_every=snapshot_every, retain_segments=True)
+    diary.attach(system.event_bus)
+    seats = [seat for _, _, showtime in datagen.showtimes() for seat in showtime.seats]
+    users = datagen.buyers()
+    start = time.perf_counter()
+    for _ in range(events):
+        seat = rng.choice(seats)
+        if not seat.is_reserved:
+            seat.hold(rng.choice(users), 10)
+        elif seat.reservation_expiry is not None and rng.random() < 0.5:
+            seat.sell()
+        else:
+            seat.free(rng.choice(users))
+    elapsed = time.perf_counter() - start
+    diary.close()
+    return diary.seq, elapsed
+
+
+def restart(directory, use_latest_snapshot):
+    cinemas, users = {}, {}
+    with quiet():
+        promotions = system.PromotionManager()
+    notifications = system.NotificationService(echo=False)
+    diary = journal.Journal(directory, cinemas, users, promotions, notifications)
+    start = time.perf_counter()
+    diary.recover(use_latest_snapshot)
+    elapsed = time.perf_counter() - start
+    diary.close()
+    sold = sum(seat.is_reserved and seat.reservation_expiry is None for cinema in cinemas.values()
+               for movie in cinema.movies for showtime in movie.showtimes for seat in showtime.seats)
+    return elapsed, diary.replayed, sold
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Restart time from snapshot + journal tail vs full replay.")
+    parser.add_argument("--events", type=int, default=2000000)
+    parser.add_argument("--snapshot-every", type=int, default=250000)
+    parser.add_argument("--cinemas", type=int, default=10)
+    parser.add_argument("--showtimes", type=int, default=10)
+    parser.add_argument("--seats", type=int, default=200)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--skip-full-replay", action="store_true")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    datagen.build_catalog(args.cinemas, args.showtimes, args.seats, args.users, seed=args.seed)
+    system.notification_service.echo = False
+    system.metrics.registry.enabled = False
+
+    directory = tempfile.mkdtemp(prefix="cinema-journal-")
+    try:
+        written, write_seconds = generate(directory, args.events, args.snapshot_every, rng)
+        # Recovery releases temporary holds, so only sold seats survive a restart.
+        expected = sum(seat.is_reserved and seat.reservation_expiry is None
+                       for _, _, s in datagen.showtimes() for seat in s.seats)
+        results = {
+            "events": written,
+            "append_events_per_sec": args.events / write_seconds,
+            "journal_bytes": sum(os.path.getsize(os.path.join(directory, f)) for f in os.listdir(directory)
+                                 if f.startswith("journal-")),
+        }
+        seconds, replayed, sold = restart(directory, True)
+        results["snapshot_restart"] = {"seconds": seconds, "replayed_events": replayed,
+                                       "consistent": sold == expected}
+        if not args.skip_full_replay:
+            seconds, replayed, sold = restart(directory, False)
+            results["full_replay"] = {"seconds": seconds, "replayed_events": replayed,
+                                      "events_per_sec": replayed / seconds if seconds else 0.0,
+                                      "consistent": sold == expected}
+    finally:
+        shutil.rmtree(directory)
+    emit("restart", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import argparse
+import random
+import time
+
+import sharding
+from benchmarks import datagen
+from benchmarks.common import LatencyRecorder, emit
+
+
+def purchases(args):
+    datagen.build_catalog(args.cinemas, args.showtimes, args.seats, args.users, seed=args.seed)
+    users = [user.login for user in datagen.buyers()]
+    orders = [(cinema.name, movie.name, showtime.time, seat.row_and_number)
+              for cinema, movie, showtime in datagen.showtimes() for seat in showtime.seats]
+    random.Random(args.seed).shuffle(orders)
+    return [(users[i % len(users)],) + order for i, order in enumerate(orders[:args.purchases])]
+
+
+def run(shards, orders, args):
+    builder = ("benchmarks.datagen", "build_catalog",
+               {"cinemas": args.cinemas, "showtimes": args.showtimes, "seats": args.seats,
+                "users": args.users, "seed": args.seed})
+    router = sharding.ShardRouter(shards, builder)
+    recorder = LatencyRecorder()
+    failed = 0
+    try:
+        start = time.perf_counter()
+        for i in range(0, len(orders), args.window):
+            window = [router.submit(cinema, "purchase", login, cinema, movie, showtime, seat)
+                      for login, cinema, movie, showtime, seat in orders[i:i + args.window]]
+            router.flush()
+            for future in window:
+                try:
+                    future.result()
+                except sharding.ShardError:
+                    failed += 1
+        elapsed = time.perf_counter() - start
+        for _ in range(args.queries):
+            with recorder.measure("search"):
+                router.search("movie 1")
+            with recorder.measure("sales_report"):
+                report = router.sales_report()
+    finally:
+        router.close()
+    summary = recorder.summary()
+    summary.update({
+        "seconds": elapsed,
+        "purchases_per_sec": (len(orders) - failed) / elapsed,
+        "failed": failed,
+        "total_bookings": report["total_bookings"] if args.queries else None,
+    })
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Purchase throughput of the sharded engine by shard count.")
+    parser.add_argument("--shards", default="1,2,4", help="comma-separated shard counts to compare")
+    parser.add_argument("--purchases", type=int, default=20000)
+    parser.add_argument("--window", type=int, default=512, help="requests pipelined before waiting")
+    parser.add_argument("--queries", type=int, default=20, help="cross-shard searches and reports per run")
+    parser.add_argument("--cinemas", type=int, default=16)
+    parser.add_argument("--showtimes", type=int, default=8)
+    parser.add_argument("--seats", type=int, default=200)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    orders = purchases(args)
+    results = {}
+    for shards in [int(count) for count in args.shards.split(",")]:
+        results[shards] = run(shards, orders, args)
+    baseline = results[min(results)]["purchases_per_sec"]
+    for result in results.values():
+        result["speedup"] = result["purchases_per_sec"] / baseline
+    emit("shards", vars(args), {str(shards): result for shards, result in results.items()}, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import storage
+import system
+from benchmarks import datagen
+from benchmarks.common import emit, quiet
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a fresh interpreter: start up against the database, then do what a short-lived
+# CLI or worker does first, which is to list one cinema's movies and the seats of one session.
+PROBE = """
+import json, time
+start = time.perf_counter()
+import system
+imported = time.perf_counter()
+system.carregar_estado()
+loaded = time.perf_counter()
+cinema = next(iter(system.cinemas.values()))
+movie = system.booking_service.list_movies(cinema.name)[0]
+seats = system.booking_service.list_seats(cinema.name, movie["movie"], movie["showtimes"][0]["time"])
+accessed = time.perf_counter()
+print(json.dumps({"import_ms": (imported - start) * 1000, "load_ms": (loaded - imported) * 1000,
+                  "first_access_ms": (accessed - loaded) * 1000}))
+"""
+
+
+def import_times(stderr):
+    # -X importtime lines: "import time: self [us] | cumulative | imported package", nested by indent.
+    times = {}
+    top_level = 0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name[1:].startswith(" "):
+            top_level += int(cumulative)
+        times.setdefault(name.strip(), int(cumulative))
+    return times, top_level
+
+
+def build_database(path, args):
+    with quiet():
+        datagen.build_catalog(args.cinemas, args.showtimes, args.seats, args.users,
+                              movies_per_cinema=args.movies, seed=args.seed)
+    database = storage.Storage(path)
+    database.save_all(system.cinemas, system.usuarios_registrados, system.promotion_manager,
+                      system.notification_service)
+    database.close()
+    return sum(len(showtime.seats) for _, _, showtime in datagen.showtimes())
+
+
+def run(path, lazy, args):
+    env = dict(os.environ, CINEMA_DB=path, CINEMA_LAZY="1" if lazy else "0")
+    samples = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        process = subprocess.run([sys.executable, "-X", "importtime", "-c", PROBE], cwd=ROOT, env=env,
+                                 capture_output=True, text=True, check=True)
+        wall = (time.perf_counter() - start) * 1000
+        times, top_level = import_times(process.stderr)
+        sample = json.loads(process.stdout.strip().splitlines()[-1])
+        sample.update({"wall_ms": wall, "importtime_ms": top_level / 1000,
+                       "system_importtime_ms": times.get("system", 0) / 1000, "qrcode_imported": "qrcode" in times})
+        samples.append(sample)
+    result = {key: statistics.median(sample[key] for sample in samples)
+              for key in samples[0] if key != "qrcode_imported"}
+    result["qrcode_imported"] = any(sample["qrcode_imported"] for sample in samples)
+    return result
+
+
+def qrcode_cost(args):
+    costs = []
+    for _ in range(args.runs):
+        process = subprocess.run([sys.executable, "-X", "importtime", "-c", "import qrcode"], cwd=ROOT,
+                                 capture_output=True, text=True, check=True)
+        costs.append(import_times(process.stderr)[0].get("qrcode", 0) / 1000)
+    return statistics.median(costs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold start time with -X importtime, lazy vs eager catalog loading.")
+    parser.add_argument("--cinemas", type=int, default=20)
+    parser.add_argument("--movies", type=int, default=10, help="movies per cinema")
+    parser.add_argument("--showtimes", type=int, default=40, help="showtimes per cinema")
+    parser.add_argument("--seats", type=int, default=200)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "cinema.db")
+        seats = build_database(path, args)
+        lazy = run(path, True, args)
+        eager = run(path, False, args)
+    results = {
+        "seats": seats,
+        "lazy": lazy,
+        "eager": eager,
+        "qrcode_import_ms": qrcode_cost(args),
+        "speedup": eager["wall_ms"] / lazy["wall_ms"],
+    }
+    emit("startup", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    main()
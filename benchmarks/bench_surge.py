@@ -0,0 +1,115 @@
+import argparse
+import asyncio
+import random
+import time
+
+import payments
+import system
+from benchmarks import datagen
+from benchmarks.common import LatencyRecorder, emit
+
+BACKOFF = 0.05
+
+
+async def buyer(service, user, targets, rng, recorder, stats, patience):
+    # Every path back to the top of the loop awaits, so a buyer that keeps losing
+    # races yields to the others instead of spinning on the event loop.
+    targets = list(targets)
+    arrived = time.perf_counter()
+    while targets and time.perf_counter() - arrived < patience:
+        cinema, movie, showtime = rng.choice(targets)
+        started = time.perf_counter()
+        try:
+            admission = service.enter_checkout(user, cinema.name, movie.name, showtime.time)
+        except system.BookingError as error:
+            recorder.record("rejected", time.perf_counter() - started)
+            stats[error.code] = stats.get(error.code, 0) + 1
+            if error.retry_after is None:
+                return
+            await asyncio.sleep(error.retry_after)
+            continue
+        free = [seat for seat in showtime.seats if not seat.is_reserved]
+        if not free:
+            service.leave_checkout(admission, completed=False)
+            targets.remove((cinema, movie, showtime))
+            await asyncio.sleep(0)
+            continue
+        try:
+            cart = service.hold_seat(user, cinema.name, movie.name, showtime.time,
+                                     rng.choice(free).row_and_number, admission=admission)
+        except system.BookingError:
+            service.leave_checkout(admission, completed=False)
+            stats["hold_conflicts"] += 1
+            await asyncio.sleep(rng.uniform(0, BACKOFF))
+            continue
+        stats["holds_peak"] = max(stats["holds_peak"], len(service.carts))
+        service.price_cart(cart, "Standard")
+        try:
+            await service.pay_async(cart, "pix")
+        except system.BookingError as error:
+            stats[error.code] = stats.get(error.code, 0) + 1
+            continue
+        service.confirm(cart)
+        stats["confirmed"] += 1
+        recorder.record("checkout", time.perf_counter() - started)
+        recorder.record("end_to_end", time.perf_counter() - arrived)
+        return
+    stats["gave_up" if targets else "sold_out"] += 1
+
+
+async def run(args, controlled):
+    datagen.build_catalog(1, args.showtimes, args.seats, args.users, movies_per_cinema=1, seed=args.seed)
+    gateway = payments.SimulatedGateway(args.latency, args.jitter, seed=args.seed)
+    processor = payments.PaymentProcessor(gateway, timeout=args.timeout, max_in_flight=args.max_in_flight)
+    service = system.BookingService(system.cinemas, system.promotion_manager, system.notification_service,
+                                    processor)
+    if controlled:
+        service.admission = system.AdmissionControl(args.rate, args.burst, args.queue_limit)
+        service.admission.attach(system.event_bus)
+    rng = random.Random(args.seed)
+    targets = datagen.showtimes()
+    users = datagen.buyers()
+    recorder = LatencyRecorder()
+    stats = {"confirmed": 0, "hold_conflicts": 0, "gave_up": 0, "sold_out": 0, "holds_peak": 0}
+
+    start = time.perf_counter()
+    tasks = []
+    for i in range(args.buyers):
+        tasks.append(asyncio.ensure_future(buyer(service, users[i % len(users)], targets, random.Random(rng.random()),
+                                                 recorder, stats, args.patience)))
+        await asyncio.sleep(rng.expovariate(args.arrival_rate))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+
+    summary = recorder.summary()
+    summary.update(stats)
+    summary.update({"seconds": elapsed, "checkouts_per_sec": stats["confirmed"] / elapsed})
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checkout latency under a buyer surge, with and without admission control.")
+    parser.add_argument("--buyers", type=int, default=3000)
+    parser.add_argument("--arrival-rate", type=float, default=1500, help="buyers arriving per second")
+    parser.add_argument("--patience", type=float, default=30, help="seconds a buyer keeps retrying")
+    parser.add_argument("--max-in-flight", type=int, default=20, help="gateway authorizations in flight")
+    parser.add_argument("--latency", type=float, default=0.05, help="gateway latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--rate", type=float, default=1.0, help="checkout attempts per second per user")
+    parser.add_argument("--burst", type=int, default=5)
+    parser.add_argument("--queue-limit", type=int, default=8, help="checkouts in progress per showtime")
+    parser.add_argument("--showtimes", type=int, default=4)
+    parser.add_argument("--seats", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=3000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    system.notification_service.echo = False
+    results = {mode: asyncio.run(run(args, mode == "admission")) for mode in ("unlimited", "admission")}
+    emit("surge", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    main()
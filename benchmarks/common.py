@@ -0,0 +1,73 @@
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+class LatencyRecorder:
+    def __init__(self):
+        self.samples = {}
+        self.elapsed = {}
+
+    def record(self, operation, seconds):
+        self.samples.setdefault(operation, []).append(seconds)
+
+    @contextlib.contextmanager
+    def measure(self, operation):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(operation, time.perf_counter() - start)
+
+    def set_elapsed(self, operation, seconds):
+        self.elapsed[operation] = seconds
+
+    def summary(self):
+        result = {}
+        for operation, samples in self.samples.items():
+            ordered = sorted(samples)
+            total = self.elapsed.get(operation, sum(ordered))
+            result[operation] = {
+                "count": len(ordered),
+                "ops_per_sec": len(ordered) / total if total else 0.0,
+                "mean_ms": sum(ordered) / len(ordered) * 1000,
+                "p50_ms": percentile(ordered, 0.50) * 1000,
+                "p99_ms": percentile(ordered, 0.99) * 1000,
+                "max_ms": ordered[-1] * 1000,
+            }
+        return result
+
+
+@contextlib.contextmanager
+def quiet():
+    with contextlib.redirect_stdout(io.StringIO()) as buffer:
+        yield buffer
+
+
+def emit(benchmark, params, results, output=None):
+    record = {
+        "benchmark": benchmark,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "params": params,
+        "results": results,
+    }
+    line = json.dumps(record, sort_keys=True)
+    print(line, file=sys.__stdout__)
+    if output:
+        with open(output, "a") as handle:
+            handle.write(line + "\n")
+    return record
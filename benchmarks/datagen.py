@@ -0,0 +1,57 @@
+import random
+import string
+
+import system
+
+GENRES = ["Action", "Romance", "Horror", "Sci-Fi", "Animation", "Drama", "Comedy"]
+ROWS = string.ascii_uppercase
+
+
+def seat_labels(count, per_row=20):
+    return [f"{ROWS[(i // per_row) % len(ROWS)]}{i // (per_row * len(ROWS)) or ''}{i % per_row + 1}"
+            for i in range(count)]
+
+
+def build_catalog(cinemas=3, showtimes=4, seats=100, users=100, movies_per_cinema=2,
+                  hash_cost=4, seed=7):
+    rng = random.Random(seed)
+    system.cinemas.clear()
+    system.usuarios_registrados.clear()
+    system.notification_service.notifications.clear()
+    system.password_hasher = system.PasswordHasher(cost=hash_cost)
+    system.auth_service.hasher = system.password_hasher
+
+    labels = seat_labels(seats)
+    for c in range(cinemas):
+        cinema = system.CINEMA(f"Cinema {c}")
+        movies = [system.MOVIE(f"Movie {c}-{m}", rng.randint(80, 180), rng.choice(GENRES))
+                  for m in range(movies_per_cinema)]
+        for s in range(showtimes):
+            hour, minute = divmod(10 * 60 + s * 15, 60)
+            movies[s % len(movies)].add_showtime(f"{hour % 24:02d}:{minute:02d}", s + 1,
+                                                 [system.SEAT(label) for label in labels])
+        for movie in movies:
+            cinema.add_movie(movie)
+        system.cinemas[cinema.name] = cinema
+
+    password = "bench-password"
+    password_hash = system.password_hasher.hash(password)
+    for u in range(users):
+        login = f"user{u}"
+        system.usuarios_registrados[login] = system.USER(f"User {u}", login, password_hash=password_hash)
+    system.usuarios_registrados["admin"] = system.ADMIN("Admin", "admin", password_hash=password_hash)
+    system.snapshot_store.invalidate()
+    system.listing_cache.invalidate()
+    system.pricing_engine.invalidate()
+    return password
+
+
+def showtimes():
+    return [(cinema, movie, showtime)
+            for cinema in system.cinemas.values()
+            for movie in cinema.movies
+            for showtime in movie.showtimes]
+
+
+def buyers():
+    return [user for user in system.usuarios_registrados.values() if user.user_type != "admin"]
@@ -0,0 +1,246 @@
+"""Streaming bulk import of movies, showtimes with hall layouts, and coupons.
+
+Records are read one at a time from a CSV file (with a header row) or a JSON
+Lines file, so a week's schedule never has to fit in memory. Each record has
+a ``kind`` of ``movie``, ``showtime`` or ``coupon``:
+
+    kind,cinema,movie,duration,genre,time,screen,layout,code,coupon_type,value,description
+    movie,Kinoplex,Dune,155,Sci-Fi,,,,,,,
+    showtime,Kinoplex,Dune,,,19:00,2,A-J:20,,,,
+    coupon,,,,,,,,DUNE10,percentage,10,10% off
+
+Coupons also accept ``min_purchase``, ``max_uses``, ``valid_until``
+(``YYYY-MM-DD HH:MM``), ``applicable_movies`` (``|``-separated) and
+``user_type``. A layout is either ``A-J:20`` (rows A to J with 20 seats each)
+or a plain seat count (generic seats ``S1..Sn``, as the admin menu names
+them). Records are validated in chunks; the valid records of a chunk are
+applied together and invalid ones are reported with their line number. Seat
+labels are built once per distinct layout and shared by every showtime that
+uses it. Text fields must be strings and numeric fields numbers or numeric
+strings; a JSON line that is not an object is rejected like any other invalid
+row. The cyclic garbage collector is paused while rows are applied, so
+millions of new seats do not trigger a collection per chunk. Users get one summary notification per import
+instead of one per movie, showtime and coupon.
+"""
+import csv
+import gc
+import json
+import time
+from datetime import datetime
+from functools import lru_cache
+
+import metrics
+import system
+
+MAX_ERRORS = 50
+
+
+def read_records(path):
+    if path.endswith((".jsonl", ".json")):
+        with open(path, encoding="utf-8") as handle:
+            for line_number, line in enumerate(handle, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as error:
+                    record = {"kind": "invalid", "reason": f"invalid JSON ({error.msg})"}
+                if not isinstance(record, dict):
+                    record = {"kind": "invalid", "reason": "record is not a JSON object"}
+                yield line_number, record
+    else:
+        with open(path, newline="", encoding="utf-8") as handle:
+            reader = csv.DictReader(handle)
+            try:
+                for record in reader:
+                    yield reader.line_num, record
+            except csv.Error as error:
+                raise ValueError(f"line {reader.line_num}: {error}") from error
+
+
+def chunks(records, size):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+@lru_cache(maxsize=256)
+def layout_labels(layout):
+    layout = str(layout).strip().upper()
+    if layout.isdigit():
+        return tuple(f"S{i}" for i in range(1, int(layout) + 1))
+    rows, _, per_row = layout.partition(":")
+    first, _, last = rows.partition("-")
+    last = last or first
+    if not (len(first) == len(last) == 1 and first.isalpha() and last.isalpha() and first <= last
+            and per_row.isdigit() and int(per_row) > 0):
+        raise ValueError(f"invalid layout '{layout}'")
+    return tuple(f"{chr(row)}{number}" for row in range(ord(first), ord(last) + 1)
+                 for number in range(1, int(per_row) + 1))
+
+
+def field(record, name):
+    value = record.get(name)
+    if value is None:
+        return ""
+    return value.strip() if isinstance(value, str) else value
+
+
+def text(record, name):
+    value = field(record, name)
+    if not isinstance(value, str):
+        raise ValueError(f"{name} must be text")
+    return value
+
+
+class Importer:
+    def __init__(self, cinemas, promotions, notifications, users, chunk_size=1000):
+        self.cinemas = cinemas
+        self.promotions = promotions
+        self.notifications = notifications
+        self.users = users
+        self.chunk_size = chunk_size
+        self.movie_index = {}
+        self.showtime_keys = set()
+
+    def index(self):
+        self.movie_index = {(cinema.name, movie.name.lower()): movie
+                            for cinema in self.cinemas.values() for movie in cinema.movies}
+        self.showtime_keys = {(movie.id, showtime.time) for movie in self.movie_index.values()
+                              for showtime in movie.showtimes}
+
+    # --- Validação ---
+    def validate(self, kind, record, pending):
+        if kind == "movie":
+            cinema, name = text(record, "cinema"), text(record, "movie")
+            if cinema not in self.cinemas:
+                raise ValueError(f"unknown cinema '{cinema}'")
+            if not name:
+                raise ValueError("missing movie name")
+            key = (cinema, name.lower())
+            if key in self.movie_index or key in pending:
+                raise ValueError(f"movie '{name}' already exists at {cinema}")
+            duration = int(field(record, "duration"))
+            if duration <= 0:
+                raise ValueError("duration must be positive")
+            pending.add(key)
+            return (cinema, name, duration, text(record, "genre") or "Unknown")
+        if kind == "showtime":
+            cinema, name = text(record, "cinema"), text(record, "movie")
+            key = (cinema, name.lower())
+            if key not in self.movie_index and key not in pending:
+                raise ValueError(f"unknown movie '{name}' at '{cinema}'")
+            showtime_time = text(record, "time")
+            datetime.strptime(showtime_time, "%H:%M")
+            if ("showtime", key, showtime_time) in pending:
+                raise ValueError(f"duplicate showtime {showtime_time} for '{name}'")
+            movie = self.movie_index.get(key)
+            if movie is not None and (movie.id, showtime_time) in self.showtime_keys:
+                raise ValueError(f"'{name}' already has a showtime at {showtime_time}")
+            pending.add(("showtime", key, showtime_time))
+            return (key, showtime_time, int(field(record, "screen") or 1), layout_labels(field(record, "layout")))
+        if kind == "coupon":
+            code = text(record, "code").upper()
+            if not code:
+                raise ValueError("missing coupon code")
+            if code in self.promotions.coupons or ("coupon", code) in pending:
+                raise ValueError(f"coupon '{code}' already exists")
+            coupon_type = text(record, "coupon_type")
+            if coupon_type not in (system.PERCENTAGE, system.FIXED_AMOUNT):
+                raise ValueError(f"invalid coupon type '{coupon_type}'")
+            kwargs = {}
+            if field(record, "min_purchase"):
+                kwargs["min_purchase"] = float(field(record, "min_purchase"))
+            if field(record, "max_uses"):
+                kwargs["max_uses"] = int(field(record, "max_uses")) or None
+            if field(record, "valid_until"):
+                kwargs["valid_until"] = datetime.strptime(text(record, "valid_until"), "%Y-%m-%d %H:%M")
+            movies = field(record, "applicable_movies")
+            if movies:
+                if isinstance(movies, str):
+                    movies = [name.strip() for name in movies.split("|")]
+                if not isinstance(movies, list) or not all(isinstance(name, str) for name in movies):
+                    raise ValueError("applicable_movies must be text")
+                kwargs["applicable_movies"] = movies
+            if text(record, "user_type"):
+                kwargs["user_type"] = text(record, "user_type")
+            pending.add(("coupon", code))
+            return (code, coupon_type, float(field(record, "value")), text(record, "description"), kwargs)
+        raise ValueError(record.get("reason") or f"unknown kind '{kind}'")
+
+    # --- Aplicação em lote ---
+    def apply(self, valid, report):
+        for kind, values in valid:
+            if kind == "movie":
+                cinema_name, name, duration, genre = values
+                movie = system.MOVIE(name, duration, genre)
+                self.cinemas[cinema_name].add_movie(movie)
+                self.movie_index[(cinema_name, name.lower())] = movie
+                report["movies"] += 1
+            elif kind == "showtime":
+                key, showtime_time, screen_number, labels = values
+                movie = self.movie_index[key]
+                movie.add_showtime(showtime_time, screen_number, [system.SEAT(label) for label in labels])
+                self.showtime_keys.add((movie.id, showtime_time))
+                report["showtimes"] += 1
+                report["seats"] += len(labels)
+            else:
+                code, coupon_type, value, description, kwargs = values
+                self.promotions.add_coupon(system.Coupon(code, coupon_type, value, description, **kwargs))
+                report["coupons"] += 1
+
+    def run(self, path, notify=True):
+        start = time.perf_counter()
+        report = {"path": path, "rows": 0, "movies": 0, "showtimes": 0, "seats": 0, "coupons": 0,
+                  "rejected": 0, "errors": []}
+        self.index()
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            for chunk in chunks(read_records(path), self.chunk_size):
+                valid = []
+                pending = set()
+                for line_number, record in chunk:
+                    kind = str(field(record, "kind")).lower()
+                    try:
+                        valid.append((kind, self.validate(kind, record, pending)))
+                    except (ValueError, TypeError) as error:
+                        report["rejected"] += 1
+                        if len(report["errors"]) < MAX_ERRORS:
+                            report["errors"].append((line_number, str(error)))
+                self.apply(valid, report)
+                report["rows"] += len(chunk)
+        finally:
+            if collecting:
+                gc.enable()
+        report["seconds"] = time.perf_counter() - start
+        metrics.inc("import.rows", report["rows"])
+        metrics.inc("import.rejected", report["rejected"])
+        if notify:
+            self.notify(report)
+        return report
+
+    @metrics.timed("import.notify")
+    def notify(self, report):
+        parts = [f"{report[kind]} {kind}" for kind in ("movies", "showtimes", "coupons") if report[kind]]
+        if not parts:
+            return
+        message = f" Catalog updated: {', '.join(parts)} added!"
+        data = {kind: report[kind] for kind in ("movies", "showtimes", "coupons")}
+        for user in self.users.values():
+            if user.user_type != "admin":
+                self.notifications.send_notification(user, system.CATALOG_UPDATE, message, data)
+
+
+def import_file(admin, path, chunk_size=1000, notify=True):
+    booking_service = system.booking_service
+    booking_service._require(admin, "manage_movies")
+    booking_service._require(admin, "manage_coupons")
+    importer = Importer(system.cinemas, system.promotion_manager, system.notification_service,
+                        system.usuarios_registrados, chunk_size)
+    return importer.run(path, notify)
@@ -0,0 +1,412 @@
+"""Append-only binary journal of state changes, with periodic snapshots.
+
+Every event published on ``system.event_bus`` is encoded as a small tuple of
+primitives and appended to the current segment as
+``<length:u32><crc32:u32><seq:u64><pickled payload>``. Every
+``snapshot_every`` events the whole state is written to a compact snapshot and
+a new segment is started, so a restart loads the newest snapshot and replays
+only the events recorded after it. A torn record at the end of the last
+segment (a crash mid-write) is detected by its length or checksum and cut off.
+Temporary seat holds are replayed like any other event and then released once
+recovery finishes, because the carts that owned them are gone.
+"""
+import glob
+import os
+import pickle
+import struct
+import zlib
+from datetime import datetime
+
+import system
+
+HEADER = struct.Struct("<IIQ")
+SEGMENT = "journal-{:012d}.log"
+SNAPSHOT = "snapshot-{:012d}.bin"
+
+EVENT_CODES = {
+    system.SEAT_HELD: 1,
+    system.SEAT_RELEASED: 2,
+    system.SEAT_SOLD: 3,
+    system.SALE_RECORDED: 4,
+    system.BOOKING_ADDED: 5,
+    system.BOOKING_REMOVED: 6,
+    system.COUPON_ADDED: 7,
+    system.COUPON_USED: 8,
+    system.USER_REGISTERED: 9,
+    system.PASSWORD_CHANGED: 10,
+    system.MOVIE_ADDED: 11,
+    system.SHOWTIME_ADDED: 12,
+    system.REVIEW_ADDED: 13,
+    system.NOTIFICATION_SENT: 14,
+    system.NOTIFICATION_READ: 15,
+}
+
+
+def stamp(moment):
+    return moment.timestamp() if moment else None
+
+
+def unstamp(value):
+    return datetime.fromtimestamp(value) if value is not None else None
+
+
+def encode_showtime(showtime):
+    return (system.ids.key(showtime.id), showtime.time, showtime.screen_number,
+            tuple(seat.row_and_number for seat in showtime.seats),
+            bytes(1 if seat.is_reserved else 0 for seat in showtime.seats),
+            {i: stamp(seat.reservation_expiry) for i, seat in enumerate(showtime.seats) if seat.reservation_expiry})
+
+
+def encode_movie(movie):
+    return (system.ids.key(movie.id), movie.name, movie.duration_in_minutes, movie.genre,
+            movie.total_tickets_sold, movie.total_revenue,
+            tuple((review["rating"], review["comment"]) for review in movie.reviews),
+            tuple(encode_showtime(showtime) for showtime in movie.showtimes))
+
+
+def encode_coupon(coupon):
+    return (coupon.code, coupon.type, coupon.value, coupon.description, stamp(coupon.valid_until),
+            coupon.min_purchase, coupon.max_uses, coupon.uses_count, tuple(coupon.applicable_cinemas),
+            tuple(coupon.applicable_movies), coupon.user_type, coupon.is_active)
+
+
+def encode_user(user):
+    return (user.login, system.ids.key(user.id), user.name, user.email, user.password, user.user_type)
+
+
+def encode_notification(n):
+    return (n['id'], system.ids.key(n['user_id']), n['user_name'], n['user_email'], n['type'], n['message'],
+            n['data'], stamp(n['timestamp']), n['read'])
+
+
+def encode_event(event_type, e):
+    if event_type in (system.SEAT_HELD, system.SEAT_RELEASED, system.SEAT_SOLD):
+        seat = e['seat']
+        if seat.showtime is None:
+            return None
+        user = e.get('user')
+        return (system.ids.key(seat.showtime.id), seat.row_and_number, system.ids.key(user.id) if user else None,
+                stamp(e.get('expires_at')))
+    if event_type == system.SALE_RECORDED:
+        return (system.ids.key(e['movie'].id), e['amount'])
+    if event_type in (system.BOOKING_ADDED, system.BOOKING_REMOVED):
+        ticket = e['ticket']
+        return (e['user'].login, system.ids.key(ticket.showtime.id), ticket.seat.row_and_number, ticket.name,
+                ticket.price)
+    if event_type == system.COUPON_ADDED:
+        return encode_coupon(e['coupon'])
+    if event_type == system.COUPON_USED:
+        return (e['coupon'].code,)
+    if event_type in (system.USER_REGISTERED, system.PASSWORD_CHANGED):
+        return encode_user(e['user'])
+    if event_type == system.MOVIE_ADDED:
+        return (e['cinema'].name, encode_movie(e['movie']))
+    if event_type == system.SHOWTIME_ADDED:
+        return (system.ids.key(e['showtime'].movie.id), encode_showtime(e['showtime']))
+    if event_type == system.REVIEW_ADDED:
+        return (system.ids.key(e['movie'].id), e['rating'], e['comment'])
+    if event_type == system.NOTIFICATION_SENT:
+        return encode_notification(e['notification'])
+    if event_type == system.NOTIFICATION_READ:
+        return (e['notification_id'],)
+    return None
+
+
+class Journal:
+    def __init__(self, directory, cinemas, users, promotions, notifications,
+                 snapshot_every=100000, fsync=False, retain_segments=False):
+        self.directory = directory
+        self.cinemas = cinemas
+        self.users = users
+        self.promotions = promotions
+        self.notifications = notifications
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        self.retain_segments = retain_segments
+        self.seq = 0
+        self.since_snapshot = 0
+        self.segment = None
+        self.bus = None
+        self.movies = {}
+        self.showtimes = {}
+        self.seat_index = {}
+        self.notification_index = {}
+        self.replayed = 0
+        os.makedirs(directory, exist_ok=True)
+
+    # --- Gravação ---
+    def attach(self, bus):
+        if self.segment is None:
+            # Without recover() the in-memory state becomes the new baseline.
+            self.seq = self.last_seq()
+            self.snapshot()
+        self.bus = bus
+        bus.subscribe(self.on_event)
+
+    def on_event(self, event_type, payload):
+        code = EVENT_CODES.get(event_type)
+        if code is None:
+            return
+        fields = encode_event(event_type, payload)
+        if fields is None:
+            return
+        self.append(code, fields)
+
+    def append(self, code, fields):
+        self.seq += 1
+        data = pickle.dumps((code, fields), protocol=pickle.HIGHEST_PROTOCOL)
+        self.segment.write(HEADER.pack(len(data), zlib.crc32(data), self.seq))
+        self.segment.write(data)
+        if self.fsync:
+            self.segment.flush()
+            os.fsync(self.segment.fileno())
+        self.since_snapshot += 1
+        if self.snapshot_every and self.since_snapshot >= self.snapshot_every:
+            self.snapshot()
+
+    def open_segment(self, first_seq):
+        if self.segment:
+            self.segment.close()
+        self.segment = open(os.path.join(self.directory, SEGMENT.format(first_seq)), "ab")
+
+    def snapshot(self):
+        state = {
+            "seq": self.seq,
+            "cinemas": tuple((cinema.name, tuple(encode_movie(movie) for movie in cinema.movies))
+                             for cinema in self.cinemas.values()),
+            "users": tuple(encode_user(user) + (tuple((system.ids.key(t.showtime.id), t.seat.row_and_number,
+                                                       t.name, t.price) for t in user.booking_history),)
+                           for user in self.users.values()),
+            "coupons": tuple(encode_coupon(coupon) for coupon in self.promotions.coupons.values()),
+            "notifications": tuple(encode_notification(n) for n in self.notifications.notifications),
+        }
+        if self.segment:
+            self.segment.flush()
+        path = os.path.join(self.directory, SNAPSHOT.format(self.seq))
+        with open(path + ".tmp", "wb") as handle:
+            handle.write(zlib.compress(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL), 1))
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(path + ".tmp", path)
+        self.open_segment(self.seq + 1)
+        self.since_snapshot = 0
+        if not self.retain_segments:
+            self.compact()
+        return path
+
+    def compact(self):
+        snapshots = self.snapshots()
+        for old in snapshots[:-1]:
+            os.remove(old[1])
+        latest = snapshots[-1][0]
+        for first_seq, path in self.segments():
+            if first_seq <= latest and path != self.segment.name:
+                os.remove(path)
+
+    def close(self):
+        if self.bus:
+            self.bus.unsubscribe(self.on_event)
+            self.bus = None
+        if self.segment:
+            self.segment.close()
+            self.segment = None
+
+    # --- Recuperação ---
+    def files(self, pattern):
+        found = []
+        for path in glob.glob(os.path.join(self.directory, pattern.replace("{:012d}", "*"))):
+            found.append((int(os.path.basename(path).split("-")[1].split(".")[0]), path))
+        return sorted(found)
+
+    def snapshots(self):
+        return self.files(SNAPSHOT)
+
+    def last_seq(self):
+        last = max([seq for seq, _ in self.snapshots()], default=0)
+        segments = self.segments()
+        if segments:
+            with open(segments[-1][1], "rb") as handle:
+                data = handle.read()
+            offset = 0
+            while offset + HEADER.size <= len(data):
+                length, _, seq = HEADER.unpack_from(data, offset)
+                offset += HEADER.size + length
+                if offset <= len(data):
+                    last = max(last, seq)
+        return last
+
+    def segments(self):
+        return self.files(SEGMENT)
+
+    def recover(self, use_latest_snapshot=True):
+        snapshots = self.snapshots()
+        if not snapshots:
+            return False
+        seq, path = snapshots[-1] if use_latest_snapshot else snapshots[0]
+        with open(path, "rb") as handle:
+            self.load_snapshot(pickle.loads(zlib.decompress(handle.read())))
+        self.seq = seq
+        self.replayed = 0
+        segments = self.segments()
+        for i, (first_seq, segment_path) in enumerate(segments):
+            if i + 1 < len(segments) and segments[i + 1][0] <= self.seq + 1:
+                continue
+            self.replay_segment(segment_path)
+        self.release_holds()
+        self.open_segment(self.seq + 1)
+        return True
+
+    def release_holds(self):
+        # Carts do not survive a restart, so a temporary hold restored from the
+        # snapshot or the log would never be confirmed or released.
+        for seats in self.seat_index.values():
+            for seat in seats.values():
+                if seat.is_reserved and seat.reservation_expiry:
+                    seat.is_reserved = False
+                    seat.reservation_expiry = None
+
+    def replay_segment(self, path):
+        with open(path, "rb") as handle:
+            data = handle.read()
+        offset = 0
+        while offset + HEADER.size <= len(data):
+            length, checksum, seq = HEADER.unpack_from(data, offset)
+            start = offset + HEADER.size
+            payload = data[start:start + length]
+            if len(payload) < length or zlib.crc32(payload) != checksum:
+                break
+            offset = start + length
+            if seq <= self.seq:
+                continue
+            code, fields = pickle.loads(payload)
+            self.apply(code, fields)
+            self.seq = seq
+            self.replayed += 1
+        if offset < len(data):
+            with open(path, "r+b") as handle:
+                handle.truncate(offset)
+
+    def load_snapshot(self, state):
+        self.cinemas.clear()
+        self.users.clear()
+        self.movies.clear()
+        self.showtimes.clear()
+        self.seat_index.clear()
+        for name, movies in state["cinemas"]:
+            cinema = self.cinemas[name] = system.CINEMA(name)
+            for encoded in movies:
+                cinema.movies.append(self.build_movie(encoded))
+        for (login, user_id, name, email, password_hash, user_type, bookings) in state["users"]:
+            user = self.build_user(login, user_id, name, email, password_hash, user_type)
+            for showtime_id, label, ticket_type, price in bookings:
+                user.booking_history.append(self.build_ticket(showtime_id, label, ticket_type, price))
+        self.promotions.coupons.clear()
+        for encoded in state["coupons"]:
+            self.build_coupon(encoded)
+        self.notifications.notifications[:] = []
+        self.notification_index.clear()
+        for encoded in state["notifications"]:
+            self.build_notification(encoded)
+
+    def build_showtime(self, movie, encoded):
+        showtime_id, showtime_time, screen_number, labels, reserved, expiries = encoded
+        seats = [system.SEAT(label) for label in labels]
+        for seat, taken in zip(seats, reserved):
+            seat.is_reserved = bool(taken)
+        for index, expires_at in expiries.items():
+            seats[index].reservation_expiry = unstamp(expires_at)
+        showtime = system.SHOWTIME(movie, showtime_time, screen_number, seats)
+        showtime.id = system.ids.adopt(showtime_id)
+        self.showtimes[showtime_id] = showtime
+        self.seat_index[showtime_id] = {seat.row_and_number: seat for seat in seats}
+        return showtime
+
+    def build_movie(self, encoded):
+        movie_id, name, duration, genre, sold, revenue, reviews, showtimes = encoded
+        movie = system.MOVIE(name, duration, genre)
+        movie.id = system.ids.adopt(movie_id)
+        movie.total_tickets_sold = sold
+        movie.total_revenue = revenue
+        movie.reviews = [{"rating": rating, "comment": comment} for rating, comment in reviews]
+        movie.showtimes = [self.build_showtime(movie, showtime) for showtime in showtimes]
+        self.movies[movie_id] = movie
+        return movie
+
+    def build_user(self, login, user_id, name, email, password_hash, user_type):
+        user_class = system.ADMIN if user_type == "admin" else system.USER
+        user = user_class(name, login, email=email, password_hash=password_hash)
+        user.id = system.ids.adopt(user_id)
+        user.user_type = user_type
+        self.users[login] = user
+        return user
+
+    def build_ticket(self, showtime_id, label, ticket_type, price):
+        showtime = self.showtimes[showtime_id]
+        return system.TICKET(ticket_type, price, self.seat(showtime_id, label), showtime)
+
+    def build_coupon(self, encoded):
+        (code, coupon_type, value, description, valid_until, min_purchase, max_uses, uses_count,
+         cinemas, movies, user_type, is_active) = encoded
+        coupon = system.Coupon(code, coupon_type, value, description, unstamp(valid_until), min_purchase,
+                               max_uses, list(cinemas), list(movies), user_type)
+        coupon.uses_count = uses_count
+        coupon.is_active = is_active
+        self.promotions.coupons[coupon.code] = coupon
+
+    def build_notification(self, encoded):
+        notification_id, user_id, user_name, user_email, kind, message, data, timestamp, read = encoded
+        self.notification_index[notification_id] = len(self.notifications.notifications)
+        self.notifications.notifications.append({
+            'id': notification_id, 'user_id': system.ids.adopt(user_id), 'user_name': user_name, 'user_email': user_email,
+            'type': kind, 'message': message, 'data': data, 'timestamp': unstamp(timestamp), 'read': read,
+        })
+
+    def seat(self, showtime_id, label):
+        return self.seat_index[showtime_id][label]
+
+    def apply(self, code, f):
+        if code == 1:
+            seat = self.seat(f[0], f[1])
+            seat.is_reserved = True
+            seat.reservation_expiry = unstamp(f[3])
+        elif code == 2:
+            seat = self.seat(f[0], f[1])
+            seat.is_reserved = False
+            seat.reservation_expiry = None
+        elif code == 3:
+            self.seat(f[0], f[1]).reservation_expiry = None
+        elif code == 4:
+            movie = self.movies[f[0]]
+            movie.total_tickets_sold += 1
+            movie.total_revenue += f[1]
+        elif code == 5:
+            self.users[f[0]].booking_history.append(self.build_ticket(f[1], f[2], f[3], f[4]))
+        elif code == 6:
+            history = self.users[f[0]].booking_history
+            for ticket in history:
+                if system.ids.key(ticket.showtime.id) == f[1] and ticket.seat.row_and_number == f[2]:
+                    history.remove(ticket)
+                    break
+        elif code == 7:
+            self.build_coupon(f)
+        elif code == 8:
+            self.promotions.coupons[f[0]].uses_count += 1
+        elif code == 9:
+            self.build_user(*f)
+        elif code == 10:
+            self.users[f[0]].restore_password_hash(f[4])
+        elif code == 11:
+            if f[1][0] not in self.movies:
+                self.cinemas[f[0]].movies.append(self.build_movie(f[1]))
+        elif code == 12:
+            movie = self.movies.get(f[0])
+            if movie is not None and f[1][0] not in self.showtimes:
+                movie.showtimes.append(self.build_showtime(movie, f[1]))
+        elif code == 13:
+            self.movies[f[0]].reviews.append({"rating": f[1], "comment": f[2]})
+        elif code == 14:
+            self.build_notification(f)
+        elif code == 15:
+            index = self.notification_index.get(f[0])
+            if index is not None:
+                self.notifications.notifications[index]['read'] = True
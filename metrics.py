@@ -0,0 +1,202 @@
+"""Low-overhead counters, gauges and latency histograms.
+
+Set CINEMA_METRICS=0 before start-up to make every decorator return the
+undecorated function (no cost at all), or flip ``registry.enabled`` at
+run time to skip recording with a single attribute check per call.
+"""
+import os
+import time
+from functools import wraps
+
+ENABLED = os.environ.get("CINEMA_METRICS", "1") != "0"
+
+SUB_BUCKET_BITS = 7
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+SUB_BUCKET_HALF = SUB_BUCKET_COUNT >> 1
+
+
+class Counter:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+
+class Gauge:
+    __slots__ = ("_value", "callback")
+
+    def __init__(self, callback=None):
+        self._value = 0
+        self.callback = callback
+
+    def set(self, value):
+        self._value = value
+
+    @property
+    def value(self):
+        return self.callback() if self.callback else self._value
+
+
+class Histogram:
+    # Log-linear buckets in the style of HdrHistogram: exact below 128us,
+    # then 64 sub-buckets per power of two, i.e. under 1.6% relative error.
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    @staticmethod
+    def bucket(value):
+        if value < SUB_BUCKET_COUNT:
+            return value
+        shift = value.bit_length() - SUB_BUCKET_BITS
+        return (shift * SUB_BUCKET_HALF) + (value >> shift)
+
+    @staticmethod
+    def bucket_value(index):
+        if index < SUB_BUCKET_COUNT:
+            return index
+        shift = index // SUB_BUCKET_HALF - 1
+        mantissa = index - shift * SUB_BUCKET_HALF
+        return ((mantissa << shift) + ((mantissa + 1) << shift) - 1) // 2
+
+    def record(self, seconds):
+        value = int(seconds * 1_000_000)
+        index = self.bucket(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, fraction):
+        if not self.count:
+            return 0
+        target = max(1, int(round(fraction * self.count)))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self.bucket_value(index), self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_us": self.total / self.count if self.count else 0,
+            "min_us": self.min or 0,
+            "p50_us": self.percentile(0.50),
+            "p90_us": self.percentile(0.90),
+            "p99_us": self.percentile(0.99),
+            "max_us": self.max,
+        }
+
+
+class Registry:
+    def __init__(self, enabled=ENABLED):
+        self.enabled = enabled
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+
+    def counter(self, name):
+        counter = self.counters.get(name)
+        if counter is None:
+            counter = self.counters[name] = Counter()
+        return counter
+
+    def gauge(self, name, callback=None):
+        gauge = self.gauges.get(name)
+        if gauge is None:
+            gauge = self.gauges[name] = Gauge(callback)
+        elif callback is not None:
+            gauge.callback = callback
+        return gauge
+
+    def histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        return histogram
+
+    def reset(self):
+        for counter in self.counters.values():
+            counter.value = 0
+        for histogram in self.histograms.values():
+            histogram.reset()
+
+    def snapshot(self):
+        return {
+            "counters": {name: c.value for name, c in sorted(self.counters.items())},
+            "gauges": {name: g.value for name, g in sorted(self.gauges.items())},
+            "histograms": {name: h.summary() for name, h in sorted(self.histograms.items())},
+        }
+
+    def dump(self):
+        data = self.snapshot()
+        lines = [f"Metrics ({'enabled' if self.enabled else 'disabled'})", "=" * 78]
+        lines.append(f"{'latency (us)':<38}{'count':>8}{'p50':>8}{'p90':>8}{'p99':>8}{'max':>8}")
+        for name, h in data["histograms"].items():
+            lines.append(f"{name:<38}{h['count']:>8}{h['p50_us']:>8}{h['p90_us']:>8}{h['p99_us']:>8}{h['max_us']:>8}")
+        lines.append("-" * 78)
+        for name, value in data["counters"].items():
+            lines.append(f"{name:<38}{value:>8}")
+        for name, value in data["gauges"].items():
+            lines.append(f"{name:<38}{value:>8}")
+        return "\n".join(lines)
+
+
+registry = Registry()
+
+
+def inc(name, amount=1):
+    if registry.enabled:
+        registry.counter(name).inc(amount)
+
+
+def timed(name):
+    def decorator(function):
+        if not ENABLED:
+            return function
+        histogram = registry.histogram(name)
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not registry.enabled:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                histogram.record(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+class timer:
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, name):
+        self.histogram = registry.histogram(name) if registry.enabled else None
+
+    def __enter__(self):
+        if self.histogram is not None:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.histogram is not None:
+            self.histogram.record(time.perf_counter() - self.start)
+        return False
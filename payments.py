@@ -0,0 +1,161 @@
+"""Asynchronous payment authorization.
+
+``PaymentProcessor`` sits between checkout and a ``PaymentGateway``. It
+enforces a per-request timeout, caps the number of authorizations in
+flight, and remembers final outcomes by idempotency key, so a retried
+checkout never charges twice. A key is bound to the cart and amount of its
+first request; a replay for another cart or amount is refused with
+``CONFLICT`` instead of reusing the earlier approval. When a request times
+out the processor voids the key at the gateway, so an authorization that
+lands late is not left standing. A gateway that raises is treated
+the same way and reported as ``ERROR``. ``void`` does the same for a paid
+cart that is released before it is confirmed.
+"""
+import asyncio
+import random
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+import metrics
+
+APPROVED = "approved"
+DECLINED = "declined"
+TIMEOUT = "timeout"
+ERROR = "error"
+CONFLICT = "conflict"
+
+
+class PaymentRequest:
+    def __init__(self, idempotency_key, amount, method, card_number=None, reference=None):
+        self.idempotency_key = idempotency_key
+        self.amount = amount
+        self.method = method
+        self.card_number = card_number
+        self.reference = reference
+
+    @property
+    def fingerprint(self):
+        return (self.reference, round(self.amount, 2))
+
+
+class AuthorizationResult:
+    def __init__(self, status, authorization_id=None, reason=None):
+        self.status = status
+        self.authorization_id = authorization_id
+        self.reason = reason
+
+    @property
+    def approved(self):
+        return self.status == APPROVED
+
+
+class PaymentGateway(ABC):
+
+    @abstractmethod
+    async def authorize(self, request):
+        pass
+
+    @abstractmethod
+    async def void(self, idempotency_key):
+        pass
+
+
+class SimulatedGateway(PaymentGateway):
+    def __init__(self, latency=0.0, jitter=0.0, failure_rate=0.0, stall_rate=0.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.stall_rate = stall_rate
+        self.random = random.Random(seed)
+        self.charges = {}
+        self.voided = set()
+        self.calls = 0
+
+    async def authorize(self, request):
+        self.calls += 1
+        delay = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+        if self.random.random() < self.stall_rate:
+            delay *= 100
+        if delay:
+            await asyncio.sleep(delay)
+        key = request.idempotency_key
+        if key in self.charges:
+            return self.charges[key]
+        if key in self.voided:
+            return AuthorizationResult(DECLINED, reason="voided")
+        if self.random.random() < self.failure_rate:
+            result = AuthorizationResult(DECLINED, reason="card_declined")
+        else:
+            result = AuthorizationResult(APPROVED, authorization_id=str(uuid.uuid4()))
+        self.charges[key] = result
+        return result
+
+    async def void(self, idempotency_key):
+        self.voided.add(idempotency_key)
+        result = self.charges.get(idempotency_key)
+        if result is not None and result.approved:
+            self.charges[idempotency_key] = AuthorizationResult(DECLINED, reason="voided")
+        return True
+
+    def captured(self):
+        return [key for key, result in self.charges.items() if result.approved]
+
+
+class PaymentProcessor:
+    def __init__(self, gateway, timeout=5.0, max_in_flight=100, max_results=10000):
+        self.gateway = gateway
+        self.timeout = timeout
+        self.max_in_flight = max_in_flight
+        self.max_results = max_results
+        self.semaphore = asyncio.Semaphore(max_in_flight)
+        self.results = OrderedDict()
+        self.in_flight = {}
+
+    async def authorize(self, request):
+        key = request.idempotency_key
+        cached = self.results.get(key) or self.in_flight.get(key)
+        if cached is not None:
+            fingerprint, outcome = cached
+            if fingerprint != request.fingerprint:
+                metrics.inc("payments.conflict")
+                return AuthorizationResult(CONFLICT, reason="idempotency_key_reused")
+            metrics.inc("payments.idempotent_hits")
+            if isinstance(outcome, AuthorizationResult):
+                return outcome
+            return await asyncio.shield(outcome)
+        pending = asyncio.ensure_future(self._authorize(request))
+        self.in_flight[key] = (request.fingerprint, pending)
+        pending.add_done_callback(lambda _: self.in_flight.pop(key, None))
+        return await asyncio.shield(pending)
+
+    async def void(self, idempotency_key):
+        self.results.pop(idempotency_key, None)
+        await self.gateway.void(idempotency_key)
+        metrics.inc("payments.voided")
+
+    def remember(self, request, result):
+        self.results[request.idempotency_key] = (request.fingerprint, result)
+        self.results.move_to_end(request.idempotency_key)
+        while len(self.results) > self.max_results:
+            self.results.popitem(last=False)
+
+    async def _authorize(self, request):
+        async with self.semaphore:
+            try:
+                with metrics.timer("payments.gateway"):
+                    result = await asyncio.wait_for(self.gateway.authorize(request), self.timeout)
+            except asyncio.TimeoutError:
+                await self.gateway.void(request.idempotency_key)
+                metrics.inc("payments.timeout")
+                return AuthorizationResult(TIMEOUT, reason="gateway_timeout")
+            except Exception as error:
+                metrics.inc("payments.error")
+                try:
+                    await self.gateway.void(request.idempotency_key)
+                except Exception:
+                    metrics.inc("payments.void_failed")
+                return AuthorizationResult(ERROR, reason=f"gateway_error: {error}")
+        self.remember(request, result)
+        metrics.inc(f"payments.{result.status}")
+        return result
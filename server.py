@@ -0,0 +1,447 @@
+"""Asyncio JSON-lines front-end for the booking service.
+
+Each request is one JSON object per line, for example
+{"id": 1, "op": "hold", "cinema": "Kinoplex", "movie": "Interestelar", "time": "17:00", "seat": "D4"},
+and each response echoes the id: {"id": 1, "ok": true, "result": {...}} or
+{"id": 1, "ok": false, "error": "seat_taken", "message": "..."}. A hold lasts
+"minutes" (a whole number from 1 to 30, 10 by default). Holds go
+through admission control, whose rejections ("rate_limited", "busy",
+"at_capacity") carry a "retry_after" hint in seconds. Pushed notifications
+arrive as {"event": "notification", "data": {...}} once a connection has
+sent "subscribe".
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from datetime import datetime
+
+import system
+from system import BookingError
+
+MAX_HOLD_MINUTES = 30
+
+
+def encode(message):
+    return (json.dumps(message, default=str) + "\n").encode()
+
+
+def ticket_data(ticket):
+    return {
+        "type": ticket.name,
+        "price": ticket.price,
+        "movie": ticket.showtime.movie.name,
+        "time": ticket.showtime.time,
+        "room": ticket.showtime.screen_number,
+        "seat": ticket.seat.row_and_number,
+    }
+
+
+class Session:
+    def __init__(self, writer):
+        self.writer = writer
+        self.token = None
+        self.user = None
+        self.carts = set()
+        self.subscribed = False
+
+
+class BookingServer:
+    def __init__(self, service=None, auth=None, notifications=None, users=None):
+        self.service = service or system.booking_service
+        self.auth = auth or system.auth_service
+        self.notifications = notifications or system.notification_service
+        self.users = users if users is not None else system.usuarios_registrados
+        self.subscribers = {}
+        self.connections = 0
+        self.requests = 0
+        self.server = None
+        self.expiry_timer = None
+        self.expiry_at = None
+        self.path = None
+        self.handlers = {
+            "ping": (self.op_ping, False),
+            "register": (self.op_register, False),
+            "login": (self.op_login, False),
+            "logout": (self.op_logout, True),
+            "cinemas": (self.op_cinemas, False),
+            "movies": (self.op_movies, False),
+            "showtimes": (self.op_showtimes, False),
+            "seats": (self.op_seats, False),
+            "coupons": (self.op_coupons, False),
+            "hold": (self.op_hold, True),
+            "price": (self.op_price, True),
+            "pay": (self.op_pay, True),
+            "confirm": (self.op_confirm, True),
+            "release": (self.op_release, True),
+            "waitlist": (self.op_waitlist, True),
+            "leave_waitlist": (self.op_leave_waitlist, True),
+            "bookings": (self.op_bookings, True),
+            "cancel": (self.op_cancel, True),
+            "notifications": (self.op_notifications, True),
+            "mark_read": (self.op_mark_read, True),
+            "subscribe": (self.op_subscribe, True),
+        }
+        self.notifications.listeners.append(self.push_notification)
+
+    async def start(self, host="127.0.0.1", port=8765, path=None):
+        self.path = path
+        if path:
+            self.server = await asyncio.start_unix_server(self.handle, path=path, backlog=4096)
+        else:
+            self.server = await asyncio.start_server(self.handle, host, port, backlog=4096)
+        self.service.expiry_listeners.append(self.schedule_expiry)
+        self.expire()
+        return self.server
+
+    async def close(self):
+        if self.schedule_expiry in self.service.expiry_listeners:
+            self.service.expiry_listeners.remove(self.schedule_expiry)
+        if self.expiry_timer:
+            self.expiry_timer.cancel()
+            self.expiry_timer = None
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.path and os.path.exists(self.path):
+            os.unlink(self.path)
+        if self.push_notification in self.notifications.listeners:
+            self.notifications.listeners.remove(self.push_notification)
+
+    def schedule_expiry(self, expires_at):
+        if self.expiry_timer is not None:
+            if self.expiry_at <= expires_at:
+                return
+            self.expiry_timer.cancel()
+        delay = max(0.0, (expires_at - datetime.now()).total_seconds()) + 0.01
+        self.expiry_at = expires_at
+        self.expiry_timer = asyncio.get_running_loop().call_later(delay, self.expire)
+
+    def expire(self):
+        self.expiry_timer = None
+        self.service.release_expired()
+        expires_at = self.service.next_expiry()
+        if expires_at is not None:
+            self.schedule_expiry(expires_at)
+
+    async def handle(self, reader, writer):
+        session = Session(writer)
+        self.connections += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                writer.write(encode(await self.dispatch(session, line)))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.close_session(session)
+            self.connections -= 1
+            writer.close()
+
+    async def dispatch(self, session, line):
+        self.requests += 1
+        try:
+            request = json.loads(line)
+        except ValueError:
+            request = None
+        if not isinstance(request, dict) or not isinstance(request.get("op"), str):
+            return {"id": None, "ok": False, "error": "bad_request", "message": "Malformed request."}
+        request_id = request.pop("id", None)
+        op = request.pop("op")
+        handler = self.handlers.get(op)
+        if handler is None:
+            return {"id": request_id, "ok": False, "error": "unknown_op", "message": f"Unknown op '{op}'."}
+        method, needs_auth = handler
+        try:
+            if needs_auth and self.session_user(session) is None:
+                raise BookingError("unauthorized", "Login required.")
+            result = method(session, **request)
+            if asyncio.iscoroutine(result):
+                result = await result
+            return {"id": request_id, "ok": True, "result": result}
+        except BookingError as error:
+            response = {"id": request_id, "ok": False, "error": error.code, "message": error.message}
+            if error.retry_after is not None:
+                response["retry_after"] = error.retry_after
+            return response
+        except (TypeError, ValueError) as error:
+            return {"id": request_id, "ok": False, "error": "bad_request", "message": str(error)}
+
+    def session_user(self, session):
+        if session.token and self.auth.resolve(session.token) is None:
+            self.close_session(session)
+        return session.user
+
+    def close_session(self, session):
+        for cart_id in list(session.carts):
+            cart = self.service.carts.get(cart_id)
+            if cart:
+                self.service.release(cart)
+        session.carts.clear()
+        if session.user and session.subscribed:
+            self.subscribers.get(session.user.id, set()).discard(session)
+        if session.token:
+            self.auth.logout(session.token)
+        session.token = None
+        session.user = None
+        session.subscribed = False
+
+    def push_notification(self, notification):
+        for session in self.subscribers.get(notification["user_id"], ()):
+            session.writer.write(encode({"event": "notification", "data": notification}))
+
+    def cart(self, session, cart_id):
+        return self.service.get_cart(session.user, cart_id)
+
+    # --- Operações ---
+    def op_ping(self, session):
+        return "pong"
+
+    async def op_register(self, session, name, login, password, email=None):
+        user = await self.auth.register_async(name, login, password, email)
+        if user is None:
+            raise BookingError("registration_failed", "Login taken or password shorter than 5 characters.")
+        return {"login": user.login, "name": user.name}
+
+    async def op_login(self, session, login, password):
+        token = await self.auth.login_async(login, password)
+        if token is None:
+            raise BookingError("invalid_credentials", "Incorrect login or password.")
+        self.close_session(session)
+        session.token = token
+        session.user = self.auth.resolve(token)
+        return {"token": token, "name": session.user.name, "user_type": session.user.user_type}
+
+    def op_logout(self, session):
+        self.close_session(session)
+        return True
+
+    def op_cinemas(self, session):
+        return self.service.list_cinemas()
+
+    def op_movies(self, session, cinema):
+        return self.service.list_movies(cinema)
+
+    def op_showtimes(self, session, cinema, movie):
+        return self.service.list_showtimes(cinema, movie)
+
+    def op_seats(self, session, cinema, movie, time):
+        return self.service.list_seats(cinema, movie, time)
+
+    def op_coupons(self, session):
+        return [{"code": c.code, "description": c.description, "type": c.type, "value": c.value}
+                for c in self.service.list_coupons()]
+
+    def op_hold(self, session, cinema, movie, time, seat, minutes=10):
+        if isinstance(minutes, bool) or not isinstance(minutes, int) or not 1 <= minutes <= MAX_HOLD_MINUTES:
+            raise BookingError("invalid_minutes", f"minutes must be a whole number from 1 to {MAX_HOLD_MINUTES}.")
+        admission = self.service.enter_checkout(session.user, cinema, movie, time)
+        try:
+            cart = self.service.hold_seat(session.user, cinema, movie, time, seat, minutes, admission)
+        except Exception:
+            self.service.leave_checkout(admission, completed=False)
+            raise
+        session.carts.add(cart.id)
+        return cart.summary()
+
+    def op_price(self, session, cart_id, ticket_type="Standard", coupon=None, popcorn=None):
+        return self.service.price_cart(self.cart(session, cart_id), ticket_type, coupon, popcorn)
+
+    async def op_pay(self, session, cart_id, method, card_number=None, idempotency_key=None):
+        cart = self.cart(session, cart_id)
+        try:
+            return await self.service.pay_async(cart, method, card_number, idempotency_key)
+        finally:
+            if cart.status == "released":
+                session.carts.discard(cart_id)
+
+    def op_confirm(self, session, cart_id):
+        ticket = self.service.confirm(self.cart(session, cart_id))
+        session.carts.discard(cart_id)
+        return ticket_data(ticket)
+
+    def op_release(self, session, cart_id):
+        released = self.service.release(self.cart(session, cart_id))
+        session.carts.discard(cart_id)
+        return released
+
+    def op_waitlist(self, session, cinema, movie, time):
+        return {"waiting": self.service.join_waitlist(session.user, cinema, movie, time)}
+
+    def op_leave_waitlist(self, session, cinema, movie, time):
+        return self.service.leave_waitlist(session.user, cinema, movie, time)
+
+    def op_bookings(self, session):
+        return [ticket_data(ticket) for ticket in self.service.bookings(session.user)]
+
+    def op_cancel(self, session, index):
+        bookings = self.service.bookings(session.user)
+        if not 0 <= index < len(bookings):
+            raise BookingError("booking_not_found", "Booking not found.")
+        return ticket_data(self.service.cancel(session.user, bookings[index]))
+
+    def op_notifications(self, session, unread_only=False):
+        return self.service.list_notifications(session.user, unread_only)
+
+    def op_mark_read(self, session, notification_id):
+        return self.service.mark_read(session.user, notification_id)
+
+    def op_subscribe(self, session):
+        session.subscribed = True
+        self.subscribers.setdefault(session.user.id, set()).add(session)
+        return True
+
+
+class BookingClient:
+    def __init__(self):
+        self.reader = None
+        self.writer = None
+        self.pending = {}
+        self.events = asyncio.Queue()
+        self.next_id = 0
+        self.listener = None
+
+    async def connect(self, host="127.0.0.1", port=8765, path=None):
+        if path:
+            self.reader, self.writer = await asyncio.open_unix_connection(path)
+        else:
+            self.reader, self.writer = await asyncio.open_connection(host, port)
+        self.listener = asyncio.create_task(self.listen())
+        return self
+
+    async def listen(self):
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                if "event" in message:
+                    self.events.put_nowait(message)
+                    continue
+                future = self.pending.pop(message.get("id"), None)
+                if future and not future.done():
+                    future.set_result(message)
+        finally:
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Connection closed."))
+            self.pending.clear()
+
+    async def call(self, op, **params):
+        self.next_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self.pending[self.next_id] = future
+        self.writer.write(encode(dict(params, id=self.next_id, op=op)))
+        await self.writer.drain()
+        response = await future
+        if not response["ok"]:
+            raise BookingError(response["error"], response["message"], response.get("retry_after"))
+        return response["result"]
+
+    async def close(self):
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+        if self.listener:
+            self.listener.cancel()
+
+
+async def demo_buyer(client, login, password, stats):
+    await client.call("login", login=login, password=password)
+    cinemas = await client.call("cinemas")
+    cinema = random.choice(cinemas)
+    movie = random.choice(await client.call("movies", cinema=cinema))
+    showtime = random.choice(movie["showtimes"])
+    while True:
+        seats = await client.call("seats", cinema=cinema, movie=movie["movie"], time=showtime["time"])
+        if not seats:
+            stats["sold_out"] += 1
+            return
+        try:
+            cart = await client.call("hold", cinema=cinema, movie=movie["movie"],
+                                     time=showtime["time"], seat=random.choice(seats))
+            break
+        except BookingError as error:
+            if error.code == "sold_out":
+                stats["sold_out"] += 1
+                return
+            if error.code != "seat_taken" and error.retry_after is None:
+                raise
+            stats["retries"] += 1
+            if error.retry_after:
+                await asyncio.sleep(error.retry_after)
+    await client.call("price", cart_id=cart["cart_id"], ticket_type="Standard")
+    await client.call("pay", cart_id=cart["cart_id"], method="pix")
+    await client.call("confirm", cart_id=cart["cart_id"])
+    stats["purchased"] += 1
+
+
+async def demo(clients, hash_cost, host, port, path):
+    system.notification_service.echo = False
+    system.password_hasher = system.PasswordHasher(cost=hash_cost)
+    system.auth_service.hasher = system.password_hasher
+    system.inicializar_dados()
+    password = "demo-password"
+    password_hash = system.password_hasher.hash(password)
+    for i in range(clients):
+        login = f"demo{i}"
+        system.usuarios_registrados[login] = system.USER(f"Demo {i}", login, password_hash=password_hash)
+
+    server = BookingServer()
+    await server.start(host, port, path)
+    if not path:
+        port = server.server.sockets[0].getsockname()[1]
+    stats = {"purchased": 0, "sold_out": 0, "retries": 0, "errors": 0}
+
+    async def run(i):
+        client = await BookingClient().connect(host, port, path)
+        try:
+            await demo_buyer(client, f"demo{i}", password, stats)
+        except (BookingError, ConnectionError):
+            stats["errors"] += 1
+        finally:
+            await client.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run(i) for i in range(clients)))
+    elapsed = time.perf_counter() - start
+    await server.close()
+    print(json.dumps(dict(stats, clients=clients, requests=server.requests,
+                          seconds=elapsed, requests_per_sec=server.requests / elapsed)))
+
+
+async def serve(host, port, path):
+    system.notification_service.echo = False
+    system.inicializar_dados()
+    server = BookingServer()
+    await server.start(host, port, path)
+    print(f"Booking server listening on {path or f'{host}:{port}'}")
+    async with server.server:
+        await server.server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON-lines booking server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="listen on a Unix socket path instead of TCP")
+    parser.add_argument("--demo", type=int, metavar="CLIENTS",
+                        help="run an in-process server plus CLIENTS loopback buyers and exit")
+    parser.add_argument("--hash-cost", type=int, default=10, help="scrypt cost used for demo logins")
+    args = parser.parse_args()
+    if args.demo:
+        asyncio.run(demo(args.demo, args.hash_cost, args.host, 0 if not args.unix else args.port, args.unix))
+    else:
+        asyncio.run(serve(args.host, args.port, args.unix))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""Sharded booking engine: one worker process per partition of cinemas.
+
+Each worker builds the catalog, keeps only the cinemas that hash to it and
+serves seat holds and purchases for them with its own ``BookingService``.
+The router forwards each request to the owning shard by cinema name, and
+fans out cross-shard queries (catalog search, sales reports) to every shard,
+then merges the results. Requests are pipelined in batches over one pipe per
+shard, so a router can keep every worker busy. An idle worker waits on its
+pipe only until its next hold expires, then releases the expired holds.
+"""
+import asyncio
+import importlib
+import multiprocessing
+import threading
+import zlib
+from concurrent.futures import Future
+from datetime import datetime
+
+
+def shard_for(cinema_name, shards):
+    return zlib.crc32(cinema_name.encode()) % shards
+
+
+class ShardWorker:
+    def __init__(self, shard_id, shards):
+        import system
+
+        self.system = system
+        self.shard_id = shard_id
+        self.shards = shards
+        self.loop = asyncio.new_event_loop()
+        system.notification_service.echo = False
+        system.metrics.registry.enabled = False
+        self.service = system.booking_service
+
+    def load(self, builder):
+        module_name, function_name, kwargs = builder
+        getattr(importlib.import_module(module_name), function_name)(**kwargs)
+        for name in list(self.system.cinemas):
+            if shard_for(name, self.shards) != self.shard_id:
+                del self.system.cinemas[name]
+
+    def user(self, login):
+        user = self.system.usuarios_registrados.get(login)
+        if user is None:
+            raise self.system.BookingError("user_not_found", f"Unknown user '{login}'.")
+        return user
+
+    def execute(self, op, args):
+        return getattr(self, f"op_{op}")(*args)
+
+    def op_cinemas(self):
+        return list(self.system.cinemas)
+
+    def op_movies(self, cinema):
+        return self.service.list_movies(cinema)
+
+    def op_seats(self, cinema, movie, time):
+        return self.service.list_seats(cinema, movie, time)
+
+    def op_hold(self, login, cinema, movie, time, seat, minutes=10):
+        return self.service.hold_seat(self.user(login), cinema, movie, time, seat, minutes).summary()
+
+    def op_price(self, login, cart_id, ticket_type="Standard", coupon=None, popcorn=None):
+        return self.service.price_cart(self.service.get_cart(self.user(login), cart_id), ticket_type, coupon, popcorn)
+
+    def op_pay(self, login, cart_id, method, card_number=None):
+        cart = self.service.get_cart(self.user(login), cart_id)
+        return self.loop.run_until_complete(self.service.pay_async(cart, method, card_number))
+
+    def op_confirm(self, login, cart_id):
+        ticket = self.service.confirm(self.service.get_cart(self.user(login), cart_id))
+        return {"movie": ticket.showtime.movie.name, "time": ticket.showtime.time,
+                "seat": ticket.seat.row_and_number, "price": ticket.price}
+
+    def op_release(self, login, cart_id):
+        return self.service.release(self.service.get_cart(self.user(login), cart_id))
+
+    def op_purchase(self, login, cinema, movie, time, seat, ticket_type="Standard", method="pix", card_number=None):
+        cart_id = self.op_hold(login, cinema, movie, time, seat)["cart_id"]
+        try:
+            self.op_price(login, cart_id, ticket_type)
+            self.op_pay(login, cart_id, method, card_number)
+        except self.system.BookingError:
+            cart = self.service.carts.get(cart_id)
+            if cart:
+                self.service.release(cart)
+            raise
+        return self.op_confirm(login, cart_id)
+
+    def op_bookings(self, login):
+        return [{"cinema": cinema.name, "movie": t.showtime.movie.name, "time": t.showtime.time,
+                 "seat": t.seat.row_and_number, "price": t.price}
+                for t in self.user(login).booking_history
+                for cinema in self.system.cinemas.values() if t.showtime.movie in cinema.movies]
+
+    def op_search(self, text):
+        text = text.lower()
+        return [{"cinema": cinema.name, "movie": movie.name, "genre": movie.genre,
+                 "showtimes": [s.time for s in movie.showtimes]}
+                for cinema in self.system.cinemas.values() for movie in cinema.movies
+                if text in movie.name.lower() or text in movie.genre.lower()]
+
+    def op_report(self):
+        admin = next((u for u in self.system.usuarios_registrados.values()
+                      if isinstance(u, self.system.ADMIN)), None)
+        return self.service.sales_report(admin, self.system.usuarios_registrados.values())
+
+
+def worker_main(shard_id, shards, builder, connection):
+    worker = ShardWorker(shard_id, shards)
+    worker.load(builder)
+    connection.send(("ready", shard_id))
+    BookingError = worker.system.BookingError
+    while True:
+        expires_at = worker.service.next_expiry()
+        timeout = None if expires_at is None else max(0.0, (expires_at - datetime.now()).total_seconds())
+        if not connection.poll(timeout):
+            worker.service.release_expired()
+            continue
+        batch = connection.recv()
+        if batch is None:
+            break
+        responses = []
+        for request_id, op, args in batch:
+            try:
+                responses.append((request_id, True, worker.execute(op, args)))
+            except BookingError as error:
+                responses.append((request_id, False, (error.code, error.message)))
+            except Exception as error:
+                responses.append((request_id, False, ("shard_error", repr(error))))
+        connection.send(responses)
+    connection.close()
+
+
+class ShardError(Exception):
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+class Shard:
+    def __init__(self, shard_id, shards, builder, context):
+        self.shard_id = shard_id
+        self.connection, child = context.Pipe()
+        self.process = context.Process(target=worker_main, args=(shard_id, shards, builder, child),
+                                       name=f"shard-{shard_id}", daemon=True)
+        self.process.start()
+        child.close()
+        self.pending = {}
+        self.outbox = []
+        self.lock = threading.Lock()
+        self.reader = None
+
+    def start_reader(self):
+        self.connection.recv()
+        self.reader = threading.Thread(target=self.read, name=f"shard-{self.shard_id}-reader", daemon=True)
+        self.reader.start()
+
+    def read(self):
+        while True:
+            try:
+                responses = self.connection.recv()
+            except (EOFError, OSError):
+                break
+            for request_id, ok, result in responses:
+                future = self.pending.pop(request_id)
+                if ok:
+                    future.set_result(result)
+                else:
+                    future.set_exception(ShardError(*result))
+        for future in self.pending.values():
+            future.set_exception(ShardError("shard_down", f"Shard {self.shard_id} stopped."))
+
+    def submit(self, request_id, op, args):
+        future = Future()
+        with self.lock:
+            self.pending[request_id] = future
+            self.outbox.append((request_id, op, args))
+        return future
+
+    def flush(self):
+        with self.lock:
+            batch, self.outbox = self.outbox, []
+            if batch:
+                self.connection.send(batch)
+
+    def stop(self):
+        self.flush()
+        self.connection.send(None)
+        self.process.join()
+        self.connection.close()
+
+
+class ShardRouter:
+    def __init__(self, shards, builder=("system", "inicializar_dados", {}), start_method="spawn"):
+        context = multiprocessing.get_context(start_method)
+        self.count = shards
+        self.shards = [Shard(i, shards, builder, context) for i in range(shards)]
+        for shard in self.shards:
+            shard.start_reader()
+        self.next_id = 0
+        self.id_lock = threading.Lock()
+
+    def _id(self):
+        with self.id_lock:
+            self.next_id += 1
+            return self.next_id
+
+    def shard(self, cinema):
+        return self.shards[shard_for(cinema, self.count)]
+
+    def submit(self, cinema, op, *args):
+        return self.shard(cinema).submit(self._id(), op, args)
+
+    def flush(self):
+        for shard in self.shards:
+            shard.flush()
+
+    def call(self, cinema, op, *args):
+        future = self.submit(cinema, op, *args)
+        self.flush()
+        return future.result()
+
+    def gather(self, op, *args):
+        futures = [shard.submit(self._id(), op, args) for shard in self.shards]
+        self.flush()
+        return [future.result() for future in futures]
+
+    # --- Consultas entre shards ---
+    def cinemas(self):
+        return sorted(name for names in self.gather("cinemas") for name in names)
+
+    def search(self, text):
+        return [match for matches in self.gather("search", text) for match in matches]
+
+    def bookings(self, login):
+        return [booking for bookings in self.gather("bookings", login) for booking in bookings]
+
+    def sales_report(self):
+        reports = self.gather("report")
+        return {
+            "total_bookings": sum(report["total_bookings"] for report in reports),
+            "active_coupons": max((report["active_coupons"] for report in reports), default=0),
+            "movies": [movie for report in reports for movie in report["movies"]],
+        }
+
+    # --- Compra, roteada pelo cinema ---
+    def movies(self, cinema):
+        return self.call(cinema, "movies", cinema)
+
+    def seats(self, cinema, movie, time):
+        return self.call(cinema, "seats", cinema, movie, time)
+
+    def hold(self, login, cinema, movie, time, seat, minutes=10):
+        return self.call(cinema, "hold", login, cinema, movie, time, seat, minutes)
+
+    def price(self, login, cinema, cart_id, ticket_type="Standard", coupon=None, popcorn=None):
+        return self.call(cinema, "price", login, cart_id, ticket_type, coupon, popcorn)
+
+    def pay(self, login, cinema, cart_id, method, card_number=None):
+        return self.call(cinema, "pay", login, cart_id, method, card_number)
+
+    def confirm(self, login, cinema, cart_id):
+        return self.call(cinema, "confirm", login, cart_id)
+
+    def release(self, login, cinema, cart_id):
+        return self.call(cinema, "release", login, cart_id)
+
+    def purchase(self, login, cinema, movie, time, seat, ticket_type="Standard", method="pix", card_number=None):
+        return self.call(cinema, "purchase", login, cinema, movie, time, seat, ticket_type, method, card_number)
+
+    def close(self):
+        for shard in self.shards:
+            shard.stop()
@@ -0,0 +1,595 @@
+"""SQLite persistence for the booking system.
+
+The in-memory objects stay authoritative: every state change published on
+``system.event_bus`` is turned into a write and handed to a single writer
+thread that group-commits batches in WAL mode. Readers borrow connections
+from a small pool, and seat availability is served from an in-memory
+bitmap kept in step with those writes.
+
+Loading is lazy by default: cinemas, movies, users and coupons are read up
+front, but a movie's showtimes and seats are only read the first time they
+are accessed, and a user's bookings the first time their history is. Seats
+that were only held, not sold, when the process stopped come back free.
+"""
+import itertools
+import json
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import metrics
+import system
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cinemas (
+    name TEXT PRIMARY KEY,
+    position INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS movies (
+    id TEXT PRIMARY KEY,
+    cinema TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    duration INTEGER NOT NULL,
+    genre TEXT NOT NULL,
+    total_tickets_sold INTEGER NOT NULL DEFAULT 0,
+    total_revenue REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS showtimes (
+    id TEXT PRIMARY KEY,
+    movie_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    time TEXT NOT NULL,
+    screen_number INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS showtimes_movie ON showtimes (movie_id, position);
+CREATE TABLE IF NOT EXISTS seats (
+    showtime_id TEXT NOT NULL,
+    label TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    is_reserved INTEGER NOT NULL DEFAULT 0,
+    expires_at TEXT,
+    PRIMARY KEY (showtime_id, label)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS users (
+    login TEXT PRIMARY KEY,
+    id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL,
+    password_hash TEXT NOT NULL,
+    user_type TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS bookings (
+    user_login TEXT NOT NULL,
+    showtime_id TEXT NOT NULL,
+    seat_label TEXT NOT NULL,
+    ticket_type TEXT NOT NULL,
+    price REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS bookings_user ON bookings (user_login);
+CREATE TABLE IF NOT EXISTS coupons (
+    code TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    value REAL NOT NULL,
+    description TEXT NOT NULL,
+    valid_until TEXT,
+    min_purchase REAL NOT NULL,
+    max_uses INTEGER,
+    uses_count INTEGER NOT NULL,
+    applicable_cinemas TEXT NOT NULL,
+    applicable_movies TEXT NOT NULL,
+    user_type TEXT,
+    is_active INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS reviews (
+    movie_id TEXT NOT NULL,
+    rating INTEGER NOT NULL,
+    comment TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS notifications (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    user_name TEXT NOT NULL,
+    user_email TEXT NOT NULL,
+    type TEXT NOT NULL,
+    message TEXT NOT NULL,
+    data TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    read INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+def connect(path):
+    connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.execute("PRAGMA busy_timeout=5000")
+    return connection
+
+
+def to_text(moment):
+    return moment.isoformat() if moment else None
+
+
+def from_text(text):
+    return datetime.fromisoformat(text) if text else None
+
+
+class ConnectionPool:
+    def __init__(self, path, size=4):
+        self.path = path
+        self.size = size
+        self.idle = queue.LifoQueue()
+        for _ in range(size):
+            self.idle.put(connect(path))
+
+    @contextmanager
+    def connection(self, timeout=None):
+        connection = self.idle.get(timeout=timeout)
+        try:
+            yield connection
+        finally:
+            self.idle.put(connection)
+
+    def close(self):
+        for _ in range(self.size):
+            self.idle.get().close()
+
+MAX_FAILED_WRITES = 100
+
+
+class WriteBatcher:
+    def __init__(self, path, max_batch=500, max_delay=0.05):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.pending = queue.Queue()
+        self.connection = connect(path)
+        self.batches = 0
+        self.writes = 0
+        self.errors = 0
+        self.last_error = None
+        self.failed = []
+        self.thread = threading.Thread(target=self.run, name="sqlite-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, sql, params=()):
+        self.pending.put((sql, params, False))
+
+    def submit_many(self, sql, rows):
+        self.pending.put((sql, rows, True))
+
+    def flush(self, timeout=None):
+        done = threading.Event()
+        self.pending.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        self.pending.put(None)
+        self.thread.join()
+        self.connection.close()
+
+    def run(self):
+        while True:
+            batch = [self.pending.get()]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch and isinstance(batch[-1], tuple):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            if not self.commit(batch):
+                return
+
+    def execute(self, writes):
+        self.connection.execute("BEGIN")
+        try:
+            for sql, params, many in writes:
+                if many:
+                    self.connection.executemany(sql, params)
+                else:
+                    self.connection.execute(sql, params)
+            self.connection.execute("COMMIT")
+        except sqlite3.Error:
+            self.connection.execute("ROLLBACK")
+            raise
+
+    def commit(self, batch):
+        writes = [item for item in batch if isinstance(item, tuple)]
+        if writes:
+            try:
+                self.execute(writes)
+                self.batches += 1
+                self.writes += len(writes)
+            except sqlite3.Error:
+                # A single bad write must not lose the rest of the group.
+                for write in writes:
+                    try:
+                        self.execute([write])
+                        self.writes += 1
+                    except sqlite3.Error as error:
+                        self.errors += 1
+                        self.last_error = error
+                        metrics.inc("storage.write_errors")
+                        if len(self.failed) < MAX_FAILED_WRITES:
+                            self.failed.append((write[0], str(error)))
+        for item in batch:
+            if isinstance(item, threading.Event):
+                item.set()
+        return None not in batch
+
+
+class SeatAvailabilityCache:
+    def __init__(self):
+        self.labels = {}
+        self.index = {}
+        self.free = {}
+
+    def track(self, showtime_id, labels, reserved):
+        self.labels[showtime_id] = tuple(labels)
+        self.index[showtime_id] = {label: i for i, label in enumerate(labels)}
+        self.free[showtime_id] = bytearray(0 if taken else 1 for taken in reserved)
+
+    def track_showtime(self, showtime):
+        self.track(showtime.id, [seat.row_and_number for seat in showtime.seats],
+                   [seat.is_reserved for seat in showtime.seats])
+
+    def set(self, showtime_id, label, is_free):
+        position = self.index.get(showtime_id, {}).get(label)
+        if position is not None:
+            self.free[showtime_id][position] = 1 if is_free else 0
+
+    def available(self, showtime):
+        if showtime.id not in self.free:
+            self.track_showtime(showtime)
+        return list(itertools.compress(self.labels[showtime.id], self.free[showtime.id]))
+
+    def count(self, showtime):
+        if showtime.id not in self.free:
+            self.track_showtime(showtime)
+        return self.free[showtime.id].count(1)
+
+
+class Repository:
+    def __init__(self, storage):
+        self.writer = storage.writer
+        self.pool = storage.pool
+
+    def rows(self, sql, params=()):
+        with self.pool.connection() as connection:
+            return connection.execute(sql, params).fetchall()
+
+
+class CinemaRepository(Repository):
+    def save(self, cinema, position):
+        self.writer.submit("INSERT OR REPLACE INTO cinemas VALUES (?, ?)", (cinema.name, position))
+
+    def all(self):
+        return self.rows("SELECT name FROM cinemas ORDER BY position")
+
+
+class MovieRepository(Repository):
+    SAVE = "INSERT OR REPLACE INTO movies VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+
+    def row(self, movie, cinema, position):
+        return (system.ids.key(movie.id), cinema.name, position, movie.name, movie.duration_in_minutes,
+                movie.genre, movie.total_tickets_sold, movie.total_revenue)
+
+    def save(self, movie, cinema, position):
+        self.writer.submit(self.SAVE, self.row(movie, cinema, position))
+
+    def update_sales(self, movie):
+        self.writer.submit("UPDATE movies SET total_tickets_sold = ?, total_revenue = ? WHERE id = ?",
+                           (movie.total_tickets_sold, movie.total_revenue, system.ids.key(movie.id)))
+
+    def all(self):
+        return self.rows("SELECT id, cinema, name, duration, genre, total_tickets_sold, total_revenue "
+                         "FROM movies ORDER BY cinema, position")
+
+
+class ShowtimeRepository(Repository):
+    def save(self, showtime, position):
+        self.writer.submit("INSERT OR REPLACE INTO showtimes VALUES (?, ?, ?, ?, ?)",
+                           (system.ids.key(showtime.id), system.ids.key(showtime.movie.id), position, showtime.time,
+                            showtime.screen_number))
+
+    def all(self):
+        return self.rows("SELECT id, movie_id, time, screen_number FROM showtimes ORDER BY movie_id, position")
+
+    def for_movie(self, movie_id):
+        return self.rows("SELECT id, movie_id, time, screen_number FROM showtimes WHERE movie_id = ? "
+                         "ORDER BY position", (movie_id,))
+
+    def movie_of(self, showtime_id):
+        rows = self.rows("SELECT movie_id FROM showtimes WHERE id = ?", (showtime_id,))
+        return rows[0][0] if rows else None
+
+
+class SeatRepository(Repository):
+    SAVE = "INSERT OR REPLACE INTO seats VALUES (?, ?, ?, ?, ?)"
+
+    def save_all(self, showtime):
+        showtime_id = system.ids.key(showtime.id)
+        self.writer.submit_many(self.SAVE, [
+            (showtime_id, seat.row_and_number, i, int(seat.is_reserved), to_text(seat.reservation_expiry))
+            for i, seat in enumerate(showtime.seats)])
+
+    def update(self, seat):
+        self.writer.submit("UPDATE seats SET is_reserved = ?, expires_at = ? WHERE showtime_id = ? AND label = ?",
+                           (int(seat.is_reserved), to_text(seat.reservation_expiry),
+                            system.ids.key(seat.showtime.id), seat.row_and_number))
+
+    def all(self):
+        return self.rows("SELECT showtime_id, label, is_reserved, expires_at FROM seats "
+                         "ORDER BY showtime_id, position")
+
+    def for_movie(self, movie_id):
+        return self.rows("SELECT showtime_id, label, is_reserved, expires_at FROM seats WHERE showtime_id IN "
+                         "(SELECT id FROM showtimes WHERE movie_id = ?) ORDER BY showtime_id, position", (movie_id,))
+
+
+class UserRepository(Repository):
+    def save(self, user):
+        self.writer.submit("INSERT OR REPLACE INTO users VALUES (?, ?, ?, ?, ?, ?)",
+                           (user.login, system.ids.key(user.id), user.name, user.email, user.password,
+                            user.user_type))
+
+    def all(self):
+        return self.rows("SELECT login, id, name, email, password_hash, user_type FROM users")
+
+
+class BookingRepository(Repository):
+    def add(self, user, ticket):
+        self.writer.submit("INSERT INTO bookings VALUES (?, ?, ?, ?, ?)",
+                           (user.login, system.ids.key(ticket.showtime.id), ticket.seat.row_and_number, ticket.name,
+                            ticket.price))
+
+    def remove(self, user, ticket):
+        self.writer.submit("DELETE FROM bookings WHERE rowid = (SELECT rowid FROM bookings WHERE user_login = ? "
+                           "AND showtime_id = ? AND seat_label = ? LIMIT 1)",
+                           (user.login, system.ids.key(ticket.showtime.id), ticket.seat.row_and_number))
+
+    def all(self):
+        return self.rows("SELECT user_login, showtime_id, seat_label, ticket_type, price FROM bookings ORDER BY rowid")
+
+    def for_user(self, login):
+        return self.rows("SELECT user_login, showtime_id, seat_label, ticket_type, price FROM bookings "
+                         "WHERE user_login = ? ORDER BY rowid", (login,))
+
+    def counts(self):
+        return self.rows("SELECT user_login, COUNT(*) FROM bookings GROUP BY user_login")
+
+
+class CouponRepository(Repository):
+    def save(self, coupon):
+        self.writer.submit("INSERT OR REPLACE INTO coupons VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", (
+            coupon.code, coupon.type, coupon.value, coupon.description, to_text(coupon.valid_until),
+            coupon.min_purchase, coupon.max_uses, coupon.uses_count, json.dumps(coupon.applicable_cinemas),
+            json.dumps(coupon.applicable_movies), coupon.user_type, int(coupon.is_active)))
+
+    def all(self):
+        return self.rows("SELECT * FROM coupons")
+
+
+class ReviewRepository(Repository):
+    def add(self, movie, rating, comment):
+        self.writer.submit("INSERT INTO reviews VALUES (?, ?, ?)", (system.ids.key(movie.id), rating, comment))
+
+    def all(self):
+        return self.rows("SELECT movie_id, rating, comment FROM reviews ORDER BY rowid")
+
+
+class NotificationRepository(Repository):
+    def save(self, notification):
+        self.writer.submit("INSERT OR REPLACE INTO notifications VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", (
+            notification['id'], system.ids.key(notification['user_id']), notification['user_name'], notification['user_email'],
+            notification['type'], notification['message'], json.dumps(notification['data'], default=str),
+            to_text(notification['timestamp']), int(notification['read'])))
+
+    def mark_read(self, notification_id):
+        self.writer.submit("UPDATE notifications SET read = 1 WHERE id = ?", (notification_id,))
+
+    def all(self):
+        return self.rows("SELECT * FROM notifications ORDER BY timestamp")
+
+
+class Storage:
+    def __init__(self, path, pool_size=4, max_batch=500, max_delay=0.05):
+        self.path = path
+        self.movie_index = {}
+        self.showtime_index = {}
+        schema = connect(path)
+        schema.executescript(SCHEMA)
+        schema.close()
+        self.pool = ConnectionPool(path, pool_size)
+        self.writer = WriteBatcher(path, max_batch, max_delay)
+        self.availability = SeatAvailabilityCache()
+        self.cinemas = CinemaRepository(self)
+        self.movies = MovieRepository(self)
+        self.showtimes = ShowtimeRepository(self)
+        self.seats = SeatRepository(self)
+        self.users = UserRepository(self)
+        self.bookings = BookingRepository(self)
+        self.coupons = CouponRepository(self)
+        self.reviews = ReviewRepository(self)
+        self.notifications = NotificationRepository(self)
+        self.bus = None
+        self.handlers = {
+            system.SEAT_HELD: lambda e: self.seat_changed(e['seat']),
+            system.SEAT_RELEASED: lambda e: self.seat_changed(e['seat']),
+            system.SEAT_SOLD: lambda e: self.seat_changed(e['seat']),
+            system.SALE_RECORDED: lambda e: self.movies.update_sales(e['movie']),
+            system.BOOKING_ADDED: lambda e: self.bookings.add(e['user'], e['ticket']),
+            system.BOOKING_REMOVED: lambda e: self.bookings.remove(e['user'], e['ticket']),
+            system.COUPON_ADDED: lambda e: self.coupons.save(e['coupon']),
+            system.COUPON_USED: lambda e: self.coupons.save(e['coupon']),
+            system.USER_REGISTERED: lambda e: self.users.save(e['user']),
+            system.PASSWORD_CHANGED: lambda e: self.users.save(e['user']),
+            system.MOVIE_ADDED: lambda e: self.movie_added(e['cinema'], e['movie']),
+            system.SHOWTIME_ADDED: lambda e: self.showtime_added(e['showtime']),
+            system.REVIEW_ADDED: lambda e: self.reviews.add(e['movie'], e['rating'], e['comment']),
+            system.NOTIFICATION_SENT: lambda e: self.notifications.save(e['notification']),
+            system.NOTIFICATION_READ: lambda e: self.notifications.mark_read(e['notification_id']),
+        }
+
+    def attach(self, bus):
+        self.bus = bus
+        bus.subscribe(self.on_event)
+
+    def on_event(self, event_type, payload):
+        handler = self.handlers.get(event_type)
+        if handler:
+            handler(payload)
+
+    def seat_changed(self, seat):
+        if seat.showtime is None:
+            return
+        self.availability.set(seat.showtime.id, seat.row_and_number, not seat.is_reserved)
+        self.seats.update(seat)
+
+    def movie_added(self, cinema, movie):
+        self.movie_index[system.ids.key(movie.id)] = movie
+        self.movies.save(movie, cinema, cinema.movies.index(movie))
+        for showtime in movie.showtimes:
+            self.showtime_added(showtime)
+
+    def showtime_added(self, showtime):
+        self.showtime_index[system.ids.key(showtime.id)] = showtime
+        self.showtimes.save(showtime, showtime.movie.showtimes.index(showtime))
+        self.seats.save_all(showtime)
+        self.availability.track_showtime(showtime)
+
+    def save_all(self, cinemas, users, promotions, notifications):
+        for position, cinema in enumerate(cinemas.values()):
+            self.cinemas.save(cinema, position)
+            for movie_position, movie in enumerate(cinema.movies):
+                self.movies.save(movie, cinema, movie_position)
+                for showtime_position, showtime in enumerate(movie.showtimes):
+                    self.showtimes.save(showtime, showtime_position)
+                    self.seats.save_all(showtime)
+                    self.availability.track_showtime(showtime)
+                for review in movie.reviews:
+                    self.reviews.add(movie, review['rating'], review['comment'])
+        for user in users.values():
+            self.users.save(user)
+            for ticket in user.booking_history:
+                self.bookings.add(user, ticket)
+        for coupon in promotions.coupons.values():
+            self.coupons.save(coupon)
+        for notification in notifications.notifications:
+            self.notifications.save(notification)
+        self.writer.flush()
+
+    def load_into(self, cinemas, users, promotions, notifications, lazy=True):
+        cinema_rows = self.cinemas.all()
+        if not cinema_rows:
+            return False
+        for (name,) in cinema_rows:
+            cinemas[name] = system.CINEMA(name)
+
+        movies = self.movie_index = {}
+        self.showtime_index = {}
+        for movie_id, cinema_name, name, duration, genre, sold, revenue in self.movies.all():
+            movie = system.MOVIE(name, duration, genre)
+            movie.id = system.ids.adopt(movie_id)
+            movie.total_tickets_sold = sold
+            movie.total_revenue = revenue
+            if lazy:
+                movie.loader = self.load_showtimes
+            cinemas[cinema_name].movies.append(movie)
+            movies[movie_id] = movie
+        for movie_id, rating, comment in self.reviews.all():
+            movies[movie_id].reviews.append({"rating": rating, "comment": comment})
+        if not lazy:
+            for showtime in self.build_showtimes(self.showtimes.all(), self.seats.all()):
+                showtime.movie.showtimes.append(showtime)
+
+        counts = dict(self.bookings.counts()) if lazy else {}
+        for login, user_id, name, email, password_hash, user_type in self.users.all():
+            user_class = system.ADMIN if user_type == "admin" else system.USER
+            user = user_class(name, login, email=email, password_hash=password_hash)
+            user.id = system.ids.adopt(user_id)
+            user.user_type = user_type
+            if lazy:
+                user.loader = self.load_bookings
+                user.stored_bookings = counts.get(login, 0)
+            users[login] = user
+        if not lazy:
+            for login, showtime_id, seat_label, ticket_type, price in self.bookings.all():
+                users[login].booking_history.append(self.build_ticket(showtime_id, seat_label, ticket_type, price))
+
+        promotions.coupons.clear()
+        for (code, coupon_type, value, description, valid_until, min_purchase, max_uses, uses_count,
+             applicable_cinemas, applicable_movies, user_type, is_active) in self.coupons.all():
+            coupon = system.Coupon(code, coupon_type, value, description, from_text(valid_until), min_purchase,
+                                   max_uses, json.loads(applicable_cinemas), json.loads(applicable_movies),
+                                   user_type)
+            coupon.uses_count = uses_count
+            coupon.is_active = bool(is_active)
+            promotions.coupons[coupon.code] = coupon
+
+        notifications.notifications[:] = [{
+            'id': notification_id,
+            'user_id': system.ids.adopt(user_id),
+            'user_name': user_name,
+            'user_email': user_email,
+            'type': notification_type,
+            'message': message,
+            'data': json.loads(data),
+            'timestamp': from_text(timestamp),
+            'read': bool(read),
+        } for (notification_id, user_id, user_name, user_email, notification_type, message, data,
+               timestamp, read) in self.notifications.all()]
+        return True
+
+    # --- Hidratação sob demanda ---
+    def build_showtimes(self, showtime_rows, seat_rows):
+        seats = {}
+        for showtime_id, label, is_reserved, expires_at in seat_rows:
+            seat = system.SEAT(label)
+            # A row with an expiry is a temporary hold; its cart did not survive the restart.
+            seat.is_reserved = bool(is_reserved) and expires_at is None
+            seats.setdefault(showtime_id, []).append(seat)
+        showtimes = []
+        for showtime_id, movie_id, showtime_time, screen_number in showtime_rows:
+            showtime = system.SHOWTIME(self.movie_index[movie_id], showtime_time, screen_number,
+                                       seats.get(showtime_id, []))
+            showtime.id = system.ids.adopt(showtime_id)
+            self.showtime_index[showtime_id] = showtime
+            self.availability.track_showtime(showtime)
+            showtimes.append(showtime)
+        return showtimes
+
+    def load_showtimes(self, movie):
+        movie_id = system.ids.key(movie.id)
+        return self.build_showtimes(self.showtimes.for_movie(movie_id), self.seats.for_movie(movie_id))
+
+    def find_showtime(self, showtime_id):
+        showtime = self.showtime_index.get(showtime_id)
+        if showtime is None:
+            movie = self.movie_index.get(self.showtimes.movie_of(showtime_id))
+            if movie is not None and movie.showtimes:
+                showtime = self.showtime_index.get(showtime_id)
+        return showtime
+
+    def build_ticket(self, showtime_id, seat_label, ticket_type, price):
+        showtime = self.find_showtime(showtime_id)
+        seat = next(s for s in showtime.seats if s.row_and_number == seat_label)
+        return system.TICKET(ticket_type, price, seat, showtime)
+
+    def load_bookings(self, user):
+        return [self.build_ticket(showtime_id, seat_label, ticket_type, price)
+                for _, showtime_id, seat_label, ticket_type, price in self.bookings.for_user(user.login)]
+
+    def close(self):
+        if self.bus:
+            self.bus.unsubscribe(self.on_event)
+            self.bus = None
+        self.writer.close()
+        self.pool.close()
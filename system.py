@@ -1,5 +1,16 @@
 import sys
-import qrcode
+import os
+import hmac
+import hashlib
+import secrets
+import time
+import asyncio
+import heapq
+import itertools
+import metrics
+import payments
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import uuid
 from abc import ABC, abstractmethod
@@ -10,14 +21,95 @@ NEW_SHOWTIME = "new_showtime"
 DISCOUNT_COUPON = "discount_coupon"
 SEAT_RESERVATION = "seat_reservation"
 PAYMENT_SUCCESS = "payment_success"
+CATALOG_UPDATE = "catalog_update"
+WAITLIST_OFFER = "waitlist_offer"
+
+LOYALTY_TIERS = [("gold", 20), ("silver", 5), ("standard", 0)]
 
 PERCENTAGE = "percentage"
 FIXED_AMOUNT = "fixed_amount"
 
-class NotificationService:
+SEAT_HELD = "seat_held"
+SEAT_RELEASED = "seat_released"
+SEAT_SOLD = "seat_sold"
+SALE_RECORDED = "sale_recorded"
+BOOKING_ADDED = "booking_added"
+BOOKING_REMOVED = "booking_removed"
+COUPON_ADDED = "coupon_added"
+COUPON_USED = "coupon_used"
+USER_REGISTERED = "user_registered"
+PASSWORD_CHANGED = "password_changed"
+MOVIE_ADDED = "movie_added"
+SHOWTIME_ADDED = "showtime_added"
+SHOWTIMES_LOADED = "showtimes_loaded"
+REVIEW_ADDED = "review_added"
+NOTIFICATION_SENT = "notification_sent"
+NOTIFICATION_READ = "notification_read"
+
+class EventBus:
+    def __init__(self):
+        self.subscribers = []
+        self.depth = 0
+        self.deferred = []
+
+    def subscribe(self, callback):
+        self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self.subscribers:
+            self.subscribers.remove(callback)
+
+    def publish(self, event_type, **payload):
+        self.depth += 1
+        try:
+            for callback in self.subscribers:
+                callback(event_type, payload)
+        finally:
+            self.depth -= 1
+        if not self.depth and self.deferred:
+            deferred, self.deferred = self.deferred, []
+            for callback in deferred:
+                callback()
+
+    def defer(self, callback):
+        if self.depth:
+            self.deferred.append(callback)
+        else:
+            callback()
+
+class IdRegistry:
     def __init__(self):
+        self.next_id = 0
+        self.keys = {}
+        self.numbers = {}
+
+    def new(self):
+        self.next_id += 1
+        return self.next_id
+
+    def key(self, number):
+        key = self.keys.get(number)
+        if key is None:
+            key = str(uuid.uuid4())
+            self.keys[number] = key
+            self.numbers[key] = number
+        return key
+
+    def adopt(self, key):
+        number = self.numbers.get(key)
+        if number is None:
+            number = self.new()
+            self.keys[number] = key
+            self.numbers[key] = number
+        return number
+
+class NotificationService:
+    def __init__(self, echo=True):
         self.notifications = []
+        self.echo = echo
+        self.listeners = []
     
+    @metrics.timed("notification.send")
     def send_notification(self, user, notification_type, message, data=None):
         notification = {
             'id': str(uuid.uuid4()),
@@ -31,7 +123,12 @@ class NotificationService:
             'read': False
         }
         self.notifications.append(notification)
+        event_bus.publish(NOTIFICATION_SENT, notification=notification)
+        for listener in self.listeners:
+            listener(notification)
         
+        if not self.echo:
+            return notification['id']
         print(f"\nNOTIFICATION SENT TO {user.name} ({user.email})")
         print(f" Type: {notification_type.upper()}")
         print(f" Message: {message}")
@@ -45,18 +142,24 @@ class NotificationService:
             user_notifications = [n for n in user_notifications if not n['read']]
         return user_notifications
     
-    def mark_as_read(self, notification_id):
+    def mark_as_read(self, notification_id, user_id=None):
         for notification in self.notifications:
             if notification['id'] == notification_id:
+                if user_id is not None and notification['user_id'] != user_id:
+                    return False
                 notification['read'] = True
+                event_bus.publish(NOTIFICATION_READ, notification_id=notification_id)
                 return True
         return False
 
 class Coupon:
+    __slots__ = ("code", "type", "value", "description", "valid_until", "min_purchase", "max_uses",
+                 "uses_count", "applicable_cinemas", "applicable_movies", "user_type", "is_active")
+
     def __init__(self, code, coupon_type, value, description, valid_until=None, 
                  min_purchase=0, max_uses=None, applicable_cinemas=None, 
                  applicable_movies=None, user_type=None):
-        self.code = code.upper()
+        self.code = sys.intern(code.upper())
         self.type = coupon_type
         self.value = value
         self.description = description
@@ -78,6 +181,7 @@ class Coupon:
             return False
         return True
     
+    @metrics.timed("coupon.can_apply")
     def can_apply(self, total_amount, cinema_name=None, movie_name=None, user_type=None):
         if not self.is_valid():
             return False
@@ -102,6 +206,8 @@ class Coupon:
     
     def use(self):
         self.uses_count += 1
+        metrics.inc("coupon.uses")
+        event_bus.publish(COUPON_USED, coupon=self)
 
 class PromotionManager:
     def __init__(self):
@@ -118,6 +224,7 @@ class PromotionManager:
                                valid_until=datetime.now() + timedelta(days=30)))   
     def add_coupon(self, coupon):
         self.coupons[coupon.code] = coupon
+        event_bus.publish(COUPON_ADDED, coupon=coupon)
     
     def get_coupon(self, code):
         return self.coupons.get(code.upper())
@@ -125,12 +232,137 @@ class PromotionManager:
     def list_active_coupons(self):
         return [c for c in self.coupons.values() if c.is_valid()]
 
+class PasswordHasher:
+    def __init__(self, cost=14, r=8, p=1):
+        self.cost = cost
+        self.r = r
+        self.p = p
+
+    def _derive(self, password, salt, cost, r, p):
+        n = 2 ** cost
+        return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                              maxmem=256 * r * n + 1024 * 1024, dklen=32)
+
+    def hash(self, password):
+        salt = os.urandom(16)
+        digest = self._derive(password, salt, self.cost, self.r, self.p)
+        return f"scrypt${self.cost}${self.r}${self.p}${salt.hex()}${digest.hex()}"
+
+    def dummy(self):
+        return f"scrypt${self.cost}${self.r}${self.p}${'00' * 16}${'00' * 32}"
+
+    def verify(self, password, encoded):
+        try:
+            scheme, cost, r, p, salt, digest = encoded.split("$")
+        except (AttributeError, ValueError):
+            return False
+        if scheme != "scrypt":
+            return False
+        candidate = self._derive(password, bytes.fromhex(salt), int(cost), int(r), int(p))
+        return hmac.compare_digest(candidate.hex(), digest)
+
+class SessionCache:
+    def __init__(self, ttl_seconds=30 * 60, max_sessions=10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.sessions = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def create(self, user):
+        token = secrets.token_urlsafe(32)
+        self.sessions[token] = (user, time.monotonic() + self.ttl_seconds)
+        while len(self.sessions) > self.max_sessions:
+            self.sessions.popitem(last=False)
+            self.evictions += 1
+        return token
+
+    def get(self, token):
+        entry = self.sessions.get(token)
+        if entry is None:
+            self.misses += 1
+            return None
+        user, expires_at = entry
+        now = time.monotonic()
+        if now > expires_at:
+            del self.sessions[token]
+            self.misses += 1
+            return None
+        self.sessions[token] = (user, now + self.ttl_seconds)
+        self.sessions.move_to_end(token)
+        self.hits += 1
+        return user
+
+    def revoke(self, token):
+        return self.sessions.pop(token, None) is not None
+
+class AuthService:
+    def __init__(self, users, hasher, sessions=None, workers=4):
+        self.users = users
+        self.hasher = hasher
+        self.sessions = sessions or SessionCache()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="auth")
+
+    def hash_password(self, password):
+        return self.executor.submit(self.hasher.hash, password)
+
+    def _can_register(self, login, password):
+        return login not in self.users and isinstance(password, str) and len(password) >= 5
+
+    def _add_user(self, name, login, email, password_hash):
+        if login in self.users:
+            return None
+        user = USER(name, login, email=email, password_hash=password_hash)
+        self.users[login] = user
+        event_bus.publish(USER_REGISTERED, user=user)
+        return user
+
+    def register(self, name, login, password, email=None):
+        if not self._can_register(login, password):
+            return None
+        return self._add_user(name, login, email, self.hash_password(password).result())
+
+    async def register_async(self, name, login, password, email=None):
+        if not self._can_register(login, password):
+            return None
+        loop = asyncio.get_running_loop()
+        password_hash = await loop.run_in_executor(self.executor, self.hasher.hash, password)
+        return self._add_user(name, login, email, password_hash)
+
+    def _check(self, login, password):
+        user = self.users.get(login)
+        if user is None:
+            self.hasher.verify(password, self.hasher.dummy())
+            return None
+        if not self.hasher.verify(password, user.password):
+            return None
+        return user
+
+    def login(self, login, password):
+        user = self.executor.submit(self._check, login, password).result()
+        return self.sessions.create(user) if user else None
+
+    async def login_async(self, login, password):
+        loop = asyncio.get_running_loop()
+        user = await loop.run_in_executor(self.executor, self._check, login, password)
+        return self.sessions.create(user) if user else None
+
+    def resolve(self, token):
+        if not token:
+            return None
+        return self.sessions.get(token)
+
+    def logout(self, token):
+        return self.sessions.revoke(token)
+
 
 class PRODUCT(ABC):
+    __slots__ = ("name", "price")
 
     @abstractmethod
     def __init__(self, name, price):
-        self.name = name  
+        self.name = sys.intern(name)
         self.price = price
 
     @abstractmethod
@@ -146,16 +378,34 @@ class PRODUCT(ABC):
         pass
 
 class USER:
-    def __init__(self, name, login, password, email=None):  
+    def __init__(self, name, login, password=None, email=None, password_hash=None):  
         self.name = name
         self.login = login
         self.email = email if email else f"{login}@example.com" 
-        self.__password = password
-        self.booking_history = []
-        self.id = str(uuid.uuid4())
+        self.__password = password_hash if password_hash else auth_service.hash_password(password).result()
+        self._booking_history = []
+        self.loader = None
+        self.stored_bookings = 0
+        self.id = ids.new()
         self.user_type = "regular"
         self.created_at = datetime.now()
 
+    @property
+    def booking_history(self):
+        if self.loader is not None:
+            loader, self.loader = self.loader, None
+            self._booking_history = loader(self)
+        return self._booking_history
+
+    @property
+    def booking_count(self):
+        return self.stored_bookings if self.loader is not None else len(self._booking_history)
+
+    @property
+    def loyalty_tier(self):
+        bookings = self.booking_count
+        return next(tier for tier, (_, minimum) in enumerate(LOYALTY_TIERS) if bookings >= minimum)
+
     @property
     def password(self):
         return self.__password
@@ -165,14 +415,23 @@ class USER:
         if not isinstance(new_password, str) or len(new_password) < 5:
             print("The password must be a string and have at least 5 characters.")
         else:
-            self.__password = new_password
+            self.__password = auth_service.hash_password(new_password).result()
+            event_bus.publish(PASSWORD_CHANGED, user=self)
+
+    def check_password(self, password):
+        return password_hasher.verify(password, self.__password)
+
+    def restore_password_hash(self, password_hash):
+        self.__password = password_hash
     
     def add_booking(self, ticket):
         self.booking_history.append(ticket)
+        event_bus.publish(BOOKING_ADDED, user=self, ticket=ticket)
 
     def remove_booking(self, ticket):
         if ticket in self.booking_history:
             self.booking_history.remove(ticket)
+            event_bus.publish(BOOKING_REMOVED, user=self, ticket=ticket)
 
     def view_booking_history(self):
         if not self.booking_history:
@@ -210,8 +469,8 @@ class USER:
         return notifications
 
 class ADMIN(USER):
-    def __init__(self, name, login, password, email=None):
-        super().__init__(name, login, password, email)
+    def __init__(self, name, login, password=None, email=None, password_hash=None):
+        super().__init__(name, login, password, email, password_hash)
         self.user_type = "admin"
         self.permissions = ["manage_movies", "manage_cinemas", "manage_coupons", "view_reports"]
     
@@ -225,6 +484,7 @@ class ADMIN(USER):
         print(f"Movie '{movie.name}' added to {cinema.name} successfully!")
         return True
     
+    @metrics.timed("admin.notify_new_movie")
     def notify_new_movie(self, movie, cinema):
         for user in usuarios_registrados.values():
             if user.user_type != "admin":
@@ -242,6 +502,7 @@ class ADMIN(USER):
         print(f"Showtime {time} added to '{movie.name}' successfully!")
         return True
     
+    @metrics.timed("admin.notify_new_showtime")
     def notify_new_showtime(self, movie, time):
         for user in usuarios_registrados.values():
             if user.user_type != "admin":
@@ -261,6 +522,7 @@ class ADMIN(USER):
         print(f"Coupon '{code}' created successfully!")
         return True
     
+    @metrics.timed("admin.notify_new_coupon")
     def notify_new_coupon(self, coupon):
         for user in usuarios_registrados.values():
             if user.user_type != "admin":
@@ -273,24 +535,25 @@ class ADMIN(USER):
             print("Access denied: Insufficient permissions.")
             return False
         
+        report = snapshot_store.snapshot()
         print("\nMovie Reports:")
         print("=" * 50)
-        total_bookings = sum(len(user.booking_history) for user in usuarios_registrados.values())
-        print(f" System-Wide Total Bookings: {total_bookings}")
-        print(f" System-Wide Active Coupons: {len(promotion_manager.list_active_coupons())}")
+        print(f" System-Wide Total Bookings: {report.total_bookings}")
+        print(f" System-Wide Active Coupons: {report.active_coupons}")
         print("-" * 50)
 
-        for cinema in cinemas.values():
-            for movie in cinema.movies:
-                print(f"\nMovie: {movie.name} ({cinema.name})")
-                print("-" * 30)
-                print(f" Total tickets sold: {movie.total_tickets_sold}")
-                print(f" Total revenue: R$ {movie.total_revenue:.2f}")
-                print(f" Average ticket price: R$ {movie.average_ticket_price:.2f}")
-                print("-" * 30)
+        for movie in report.all_movies():
+            print(f"\nMovie: {movie.name} ({movie.cinema})")
+            print("-" * 30)
+            print(f" Total tickets sold: {movie.tickets_sold}")
+            print(f" Total revenue: R$ {movie.revenue:.2f}")
+            print(f" Average ticket price: R$ {movie.average_ticket_price:.2f}")
+            print("-" * 30)
         return True
     
 class POPCORN(PRODUCT):
+    __slots__ = ("size",)
+
     def __init__(self, name, price, size):
         super().__init__(name, price)
         self.size = size
@@ -318,6 +581,8 @@ class POPCORN(PRODUCT):
         return self.price
         
 class TICKET(PRODUCT):
+    __slots__ = ("seat", "showtime")
+
     def __init__(self, name, price, seat, showtime):
         super().__init__(name, price)
         self.seat = seat
@@ -330,15 +595,18 @@ class TICKET(PRODUCT):
         print(f"Ticket for seat {self.seat.row_and_number} cancelled.")
         self.seat.release()  
        
+    def quote(self, coupon, cinema_name=None):
+        movie_name = self.showtime.movie.name
+        user_type = "student" if "student" in self.name.lower() else "regular"
+        if coupon.can_apply(self.price, cinema_name, movie_name, user_type):
+            return coupon.apply_discount(self.price)
+        return None
+
     def promotion(self, coupon=None):
         if coupon:
-            
-            cinema_name = None 
-            movie_name = self.showtime.movie.name
-            user_type = "student" if "student" in self.name.lower() else "regular"
-            
-            if coupon.can_apply(self.price, cinema_name, movie_name, user_type):
-                new_price, discount = coupon.apply_discount(self.price)
+            quote = self.quote(coupon)
+            if quote:
+                new_price, discount = quote
                 self.price = new_price
                 print(f"Coupon '{coupon.code}' applied! Discount: R${discount:.2f}")
                 coupon.use()
@@ -347,6 +615,7 @@ class TICKET(PRODUCT):
         
         return self.price
 
+    @metrics.timed("ticket.generate_qr_code")
     def generate_qr_code(self):
         data = f"""
         Ticket for seat {self.seat.row_and_number}
@@ -354,6 +623,7 @@ class TICKET(PRODUCT):
         Time: {self.showtime.time}
         Room: {self.showtime.screen_number}
         """
+        import qrcode
         qr = qrcode.QRCode(box_size=2)
         qr.add_data(data)
         print("\n📲 Mobile Ticket With QR Code:")
@@ -364,47 +634,96 @@ class TICKET(PRODUCT):
         print("-"*40)
 
 class SEAT:
+    __slots__ = ("row_and_number", "_reserved", "reservation_history", "reservation_expiry", "showtime")
+
     def __init__(self, row_and_number):
-        self.row_and_number = row_and_number
-        self.is_reserved = False
-        self.reservation_history = []
+        self.row_and_number = sys.intern(row_and_number)
+        self._reserved = False
+        self.reservation_history = None
         self.reservation_expiry = None
+        self.showtime = None
+
+    @property
+    def is_reserved(self):
+        return self._reserved
+
+    @is_reserved.setter
+    def is_reserved(self, reserved):
+        if reserved != self._reserved and self.showtime is not None:
+            self.showtime.free_count += -1 if reserved else 1
+        self._reserved = reserved
+
+    def log(self, entry):
+        if self.reservation_history is None:
+            self.reservation_history = []
+        self.reservation_history.append(entry)
     
-    def reserver(self, user, minutes=0):  
+    @metrics.timed("seat.hold")
+    def hold(self, user, minutes=0):
+        if self.is_reserved:
+            metrics.inc("seat.hold_conflicts")
+            return False
+        now = datetime.now()
+        reservation = {
+            'user_id': user.id,
+            'user_name': user.name,
+            'time': now,
+            'action': 'reserved',
+            'expires_at': (now + timedelta(minutes=minutes)) if minutes > 0 else None
+        }
+        self.is_reserved = True
+        self.log(reservation)
+        self.reservation_expiry = reservation['expires_at']
+        metrics.inc("seat.holds")
+        event_bus.publish(SEAT_HELD, seat=self, user=user, expires_at=self.reservation_expiry)
+        return True
+
+    def free(self, user=None):
         if not self.is_reserved:
-            self.is_reserved = True
-            reservation = {
-                'user_id': user.id,
-                'user_name': user.name,
-                'time': datetime.now(),
-                'action': 'reserved',
-                'expires_at': (datetime.now() + timedelta(minutes=minutes)) if minutes > 0 else None
-            }
-            self.reservation_history.append(reservation)
-            self.reservation_expiry = reservation['expires_at']
-            print(f"Seat {self.row_and_number} reserved for {user.name}!")
+            return False
+        self.is_reserved = False
+        user_id = user.id if user and hasattr(user, 'id') else 'system'
+        user_name = user.name if user and hasattr(user, 'name') else 'System'
+        
+        self.log({
+            'user_id': user_id,
+            'user_name': user_name,
+            'time': datetime.now(),
+            'action': 'released'
+        })
+        self.reservation_expiry = None
+        metrics.inc("seat.releases")
+        event_bus.publish(SEAT_RELEASED, seat=self, user=user)
+        return True
+
+    def sell(self):
+        if not self.is_reserved:
+            return False
+        self.reservation_expiry = None
+        event_bus.publish(SEAT_SOLD, seat=self)
+        return True
+
+    def notify_reservation(self, user):
+        message = f"🪑 Seat {self.row_and_number} reserved successfully!"
+        expiry_str = self.reservation_expiry.strftime("%H:%M:%S") if self.reservation_expiry else "Permanent"
+        data = {"seat": self.row_and_number, "expires_at": expiry_str}
+        notification_service.send_notification(user, SEAT_RESERVATION, message, data)
 
-            message = f"🪑 Seat {self.row_and_number} reserved successfully!"
-            expiry_str = self.reservation_expiry.strftime("%H:%M:%S") if self.reservation_expiry else "Permanent"
-            data = {"seat": self.row_and_number, "expires_at": expiry_str}
-            notification_service.send_notification(user, SEAT_RESERVATION, message, data)
+    def is_expired(self):
+        return bool(self.is_reserved and self.reservation_expiry and datetime.now() > self.reservation_expiry)
+
+    @metrics.timed("seat.reserver")
+    def reserver(self, user, minutes=0):  
+        if self.hold(user, minutes):
+            print(f"Seat {self.row_and_number} reserved for {user.name}!")
+            self.notify_reservation(user)
             return True
         return False
 
     def release(self, user=None): 
-        if self.is_reserved:
-            self.is_reserved = False
-            user_id = user.id if user and hasattr(user, 'id') else 'system'
+        if self.free(user):
             user_name = user.name if user and hasattr(user, 'name') else 'System'
-            
-            self.reservation_history.append({
-                'user_id': user_id,
-                'user_name': user_name,
-                'time': datetime.now(),
-                'action': 'released'
-            })
             print(f"Seat {self.row_and_number} reservation cancelled by {user_name}.")
-            self.reservation_expiry = None
             return True
         return False
     
@@ -447,27 +766,54 @@ class SEAT:
 
 class SHOWTIME:
     def __init__(self, movie, time, screen_number, seats):
+        self.id = ids.new()
         self.movie = movie
-        self.time = time
+        self.time = sys.intern(time)
         self.screen_number = screen_number
         self.seats = seats 
+        self.free_count = 0
+        for seat in seats:
+            seat.showtime = self
+            if not seat.is_reserved:
+                self.free_count += 1
 
     def list_available_seats(self):
-        available_seats = [seat.row_and_number for seat in self.seats if not seat.is_reserved]
+        seat_map = snapshot_store.snapshot().seat_map(self.id)
+        if seat_map is not None:
+            available_seats = seat_map.available()
+        else:
+            available_seats = [seat.row_and_number for seat in self.seats if not seat.is_reserved]
         print(f"Available seats for '{self.movie.name}' at {self.time}: {', '.join(available_seats)}")
         return available_seats    
 
 class MOVIE:
+    __slots__ = ("id", "name", "duration_in_minutes", "genre", "_showtimes", "loader", "reviews",
+                 "total_tickets_sold", "total_revenue")
+
     def __init__(self, name, duration_in_minutes, genre):
-        self.id = str(uuid.uuid4())
-        self.name = name
+        self.id = ids.new()
+        self.name = sys.intern(name)
         self.duration_in_minutes = duration_in_minutes
-        self.genre = genre
-        self.showtimes = []
+        self.genre = sys.intern(genre)
+        self._showtimes = []
+        self.loader = None
         self.reviews = []
         self.total_tickets_sold = 0
         self.total_revenue = 0.0
 
+    @property
+    def showtimes(self):
+        if self.loader is not None:
+            loader, self.loader = self.loader, None
+            self._showtimes = loader(self)
+            event_bus.publish(SHOWTIMES_LOADED, movie=self)
+        return self._showtimes
+
+    @showtimes.setter
+    def showtimes(self, showtimes):
+        self.loader = None
+        self._showtimes = showtimes
+
     @property
     def average_ticket_price(self):
         if self.total_tickets_sold == 0:
@@ -477,19 +823,29 @@ class MOVIE:
     def add_showtime(self, time, screen_number, seats):
         new_showtime = SHOWTIME(self, time, screen_number, seats)
         self.showtimes.append(new_showtime)
+        event_bus.publish(SHOWTIME_ADDED, showtime=new_showtime)
+        return new_showtime
+
+    def record_sale(self, amount):
+        self.total_tickets_sold += 1
+        self.total_revenue += amount
+        event_bus.publish(SALE_RECORDED, movie=self, amount=amount)
     
-    def list_showtimes(self):
+    def render_showtimes(self):
         if not self.showtimes:
-            print(f"No sessions available at {self.name}.") 
-            return
+            return f"No sessions available at {self.name}."
         
-        print(f"Sessions available at {self.name}:")
+        lines = [f"Sessions available at {self.name}:"]
         for showtime in self.showtimes:
-            available_count = len([s for s in showtime.seats if not s.is_reserved])
-            print(f"- Time: {showtime.time} | Room: {showtime.screen_number} | seats available: {available_count}")        
+            lines.append(f"- Time: {showtime.time} | Room: {showtime.screen_number} | seats available: {showtime.free_count}")
+        return "\n".join(lines)
+
+    def list_showtimes(self):
+        print(self.render_showtimes())
     
     def add_review(self, rating, comment):
         self.reviews.append({"rating": rating, "comment": comment})
+        event_bus.publish(REVIEW_ADDED, movie=self, rating=rating, comment=comment)
 
     def get_average_rating(self):
         if not self.reviews:
@@ -499,63 +855,1188 @@ class MOVIE:
 
 class CINEMA:
     def __init__(self, name):
-        self.name = name
+        self.name = sys.intern(name)
         self.movies = []
     
     def add_movie(self, movie):
         self.movies.append(movie)
+        event_bus.publish(MOVIE_ADDED, cinema=self, movie=movie)
     
     def list_movies(self):
         if not self.movies:
             print("No movies available at this time.")
             return
         
-        print(f"\nMovies available at {self.name}:\n")  
-        for movie in self.movies:
-            movie.list_showtimes()
-            print("-" * 20)
+        print(listing_cache.cinema_page(self), end="")
+
+def loaded_showtimes(movie):
+    return movie.showtimes if movie.loader is None else ()
+
+def free_seats(showtime, snapshot=None):
+    free = snapshot.free(showtime.id) if snapshot is not None else None
+    return showtime.free_count if free is None else free
+
+TICKET_PRICE = 25.0
+PRICE_TIERS = [(0.0, 1.0), (0.5, 1.1), (0.75, 1.25), (0.9, 1.4)]  # (ocupação mínima, multiplicador)
+PRICE_PERIODS = [(0, 0.8), (17, 1.0), (22, 0.9)]  # (hora inicial, multiplicador)
+PRICE_ZONES = [("front", 0.85), ("middle", 1.0), ("back", 1.15)]
+POPCORN_SIZES = ["S", "M", "L"]
+PAYMENT_METHODS = ["credit_card", "debit_card", "pix"]
+
+class BookingError(Exception):
+    def __init__(self, code, message, retry_after=None):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.retry_after = retry_after
+
+class CART:
+    def __init__(self, user, cinema, showtime, seat):
+        self.id = str(uuid.uuid4())
+        self.user = user
+        self.cinema = cinema
+        self.showtime = showtime
+        self.seat = seat
+        self.ticket = None
+        self.popcorn = None
+        self.coupon = None
+        self.discount = 0.0
+        self.total = 0.0
+        self.payment_method = None
+        self.authorization_id = None
+        self.payment_key = None
+        self.admission = None
+        self.status = "held"
+
+    def summary(self):
+        return {
+            "cart_id": self.id,
+            "status": self.status,
+            "cinema": self.cinema.name,
+            "movie": self.showtime.movie.name,
+            "time": self.showtime.time,
+            "room": self.showtime.screen_number,
+            "seat": self.seat.row_and_number,
+            "expires_at": self.seat.reservation_expiry.isoformat() if self.seat.reservation_expiry else None,
+            "ticket_type": self.ticket.name if self.ticket else None,
+            "ticket_price": self.ticket.price if self.ticket else None,
+            "popcorn": self.popcorn.name if self.popcorn else None,
+            "popcorn_price": self.popcorn.price if self.popcorn else None,
+            "coupon": self.coupon.code if self.coupon else None,
+            "discount": self.discount,
+            "total": self.total,
+        }
+
+SEAT_FREE, SEAT_ON_HOLD, SEAT_TAKEN = 0, 1, 2
+
+ShowtimeView = namedtuple("ShowtimeView", "id time screen_number")
+MovieView = namedtuple("MovieView", "id cinema name genre duration rating tickets_sold revenue "
+                                    "average_ticket_price showtimes")
+
+class SeatMap(namedtuple("SeatMap", "showtime_id version labels states free")):
+    __slots__ = ()
+
+    def available(self):
+        return [label for label, state in zip(self.labels, self.states) if state == SEAT_FREE]
+
+class CatalogSnapshot:
+    def __init__(self, version, cinemas, seat_maps, total_bookings, active_coupons):
+        self.version = version
+        self.cinemas = cinemas
+        self.seat_maps = seat_maps
+        self.total_bookings = total_bookings
+        self.active_coupons = active_coupons
+
+    def movies(self, cinema_name):
+        return self.cinemas.get(cinema_name)
+
+    def all_movies(self):
+        return [view for views in self.cinemas.values() for view in views]
+
+    def seat_map(self, showtime_id):
+        return self.seat_maps.get(showtime_id)
+
+    def free(self, showtime_id):
+        seat_map = self.seat_maps.get(showtime_id)
+        return seat_map.free if seat_map else None
+
+class SnapshotStore:
+    def __init__(self, cinemas, users, promotions, min_interval=0.0):
+        self.cinemas = cinemas
+        self.users = users
+        self.promotions = promotions
+        self.min_interval = min_interval
+        self.current = None
+        self.version = 0
+        self.published_at = 0.0
+        self.dirty = True
+        self.stale = True
+        self.dirty_showtimes = {}
+        self.dirty_movies = set()
+        self.dirty_totals = True
+        self.movie_cinema = {}
+        self.handlers = {
+            SEAT_HELD: lambda e: self.seat_changed(e["seat"]),
+            SEAT_RELEASED: lambda e: self.seat_changed(e["seat"]),
+            SEAT_SOLD: lambda e: self.seat_changed(e["seat"]),
+            SALE_RECORDED: lambda e: self.movie_changed(e["movie"]),
+            REVIEW_ADDED: lambda e: self.movie_changed(e["movie"]),
+            MOVIE_ADDED: lambda e: self.movie_added(e["cinema"], e["movie"]),
+            SHOWTIME_ADDED: lambda e: self.showtime_added(e["showtime"]),
+            SHOWTIMES_LOADED: lambda e: self.showtimes_loaded(e["movie"]),
+            BOOKING_ADDED: lambda e: self.totals_changed(),
+            BOOKING_REMOVED: lambda e: self.totals_changed(),
+            COUPON_ADDED: lambda e: self.totals_changed(),
+            COUPON_USED: lambda e: self.totals_changed(),
+        }
+
+    def attach(self, bus):
+        bus.subscribe(self.on_event)
+
+    def on_event(self, event_type, payload):
+        handler = self.handlers.get(event_type)
+        if handler:
+            handler(payload)
+
+    def seat_changed(self, seat):
+        showtime = getattr(seat, "showtime", None)
+        if showtime is not None and showtime.movie.id in self.movie_cinema:
+            self.dirty_showtimes[showtime.id] = showtime
+            self.dirty = True
+
+    def movie_changed(self, movie):
+        if movie.id in self.movie_cinema:
+            self.dirty_movies.add(movie.id)
+            self.dirty = True
+
+    def movie_added(self, cinema, movie):
+        if self.cinemas.get(cinema.name) is cinema:
+            self.movie_cinema[movie.id] = cinema.name
+            self.showtimes_loaded(movie)
+
+    def showtime_added(self, showtime):
+        if showtime.movie.id in self.movie_cinema:
+            self.dirty_showtimes[showtime.id] = showtime
+        self.movie_changed(showtime.movie)
+
+    def showtimes_loaded(self, movie):
+        if movie.id in self.movie_cinema:
+            self.dirty_showtimes.update((showtime.id, showtime) for showtime in loaded_showtimes(movie))
+        self.movie_changed(movie)
+
+    def totals_changed(self):
+        self.dirty_totals = True
+        self.dirty = True
+
+    def invalidate(self):
+        self.stale = True
+        self.dirty = True
+
+    def snapshot(self):
+        if self.current is None or (self.dirty and time.monotonic() - self.published_at >= self.min_interval):
+            return self.publish()
+        return self.current
+
+    @metrics.timed("snapshots.publish")
+    def publish(self):
+        stale, dirty_showtimes, dirty_movies = self.stale, self.dirty_showtimes, self.dirty_movies
+        dirty_totals = self.dirty_totals
+        self.stale = self.dirty = self.dirty_totals = False
+        self.dirty_showtimes, self.dirty_movies = {}, set()
+        previous = self.current
+        version = self.version + 1
+
+        if stale or previous is None:
+            seat_maps, cinemas = self.build_all(version)
+        else:
+            seat_maps = dict(previous.seat_maps)
+            for showtime in dirty_showtimes.values():
+                seat_maps[showtime.id] = self.build_seat_map(showtime, version, seat_maps.get(showtime.id))
+            cinemas = dict(previous.cinemas)
+            for cinema_name in {self.movie_cinema[movie_id] for movie_id in dirty_movies}:
+                cinema = self.cinemas.get(cinema_name)
+                if cinema is None:
+                    cinemas.pop(cinema_name, None)
+                    continue
+                old_movies = {view.id: view for view in cinemas.get(cinema_name, ())}
+                cinemas[cinema_name] = tuple(
+                    self.build_movie(cinema, movie) if movie.id in dirty_movies or movie.id not in old_movies
+                    else old_movies[movie.id] for movie in cinema.movies)
+
+        if stale or dirty_totals or previous is None:
+            total_bookings = sum(user.booking_count for user in self.users.values())
+            active_coupons = len(self.promotions.list_active_coupons())
+        else:
+            total_bookings, active_coupons = previous.total_bookings, previous.active_coupons
+
+        self.version = version
+        self.current = CatalogSnapshot(version, cinemas, seat_maps, total_bookings, active_coupons)
+        self.published_at = time.monotonic()
+        metrics.inc("snapshots.published")
+        return self.current
+
+    def build_all(self, version):
+        self.movie_cinema = {}
+        seat_maps = {}
+        cinemas = {}
+        for cinema in self.cinemas.values():
+            views = []
+            for movie in cinema.movies:
+                self.movie_cinema[movie.id] = cinema.name
+                for showtime in loaded_showtimes(movie):
+                    seat_maps[showtime.id] = self.build_seat_map(showtime, version)
+                views.append(self.build_movie(cinema, movie))
+            cinemas[cinema.name] = tuple(views)
+        return seat_maps, cinemas
+
+    def build_seat_map(self, showtime, version, previous=None):
+        labels = previous.labels if previous and len(previous.labels) == len(showtime.seats) else \
+            tuple(seat.row_and_number for seat in showtime.seats)
+        states = bytes(SEAT_FREE if not seat.is_reserved else SEAT_ON_HOLD if seat.reservation_expiry else SEAT_TAKEN
+                       for seat in showtime.seats)
+        return SeatMap(showtime.id, version, labels, states, states.count(SEAT_FREE))
+
+    def build_movie(self, cinema, movie):
+        return MovieView(movie.id, cinema.name, movie.name, movie.genre, movie.duration_in_minutes,
+                         movie.get_average_rating(), movie.total_tickets_sold, movie.total_revenue,
+                         movie.average_ticket_price,
+                         tuple(ShowtimeView(s.id, s.time, s.screen_number) for s in loaded_showtimes(movie)))
+
+class ListingCache:
+    def __init__(self, promotions):
+        self.promotions = promotions
+        self.movie_blocks = {}
+        self.cinema_pages = {}
+        self.movie_cinema = {}
+        self.coupon_blocks = {}
+        self.coupon_page = None
+        self.coupon_page_expires = None
+        self.hits = 0
+        self.misses = 0
+        self.handlers = {
+            SEAT_HELD: lambda e: self.seat_changed(e["seat"]),
+            SEAT_RELEASED: lambda e: self.seat_changed(e["seat"]),
+            SHOWTIME_ADDED: lambda e: self.movie_changed(e["showtime"].movie),
+            MOVIE_ADDED: lambda e: self.cinema_pages.pop(e["cinema"].name, None),
+            COUPON_ADDED: lambda e: self.coupon_changed(e["coupon"]),
+            COUPON_USED: lambda e: self.coupon_changed(e["coupon"]),
+        }
+
+    def attach(self, bus):
+        bus.subscribe(self.on_event)
+
+    def on_event(self, event_type, payload):
+        handler = self.handlers.get(event_type)
+        if handler:
+            handler(payload)
+
+    def seat_changed(self, seat):
+        if seat.showtime is not None:
+            self.movie_changed(seat.showtime.movie)
+
+    def movie_changed(self, movie):
+        self.movie_blocks.pop(movie.id, None)
+        cinema_name = self.movie_cinema.get(movie.id)
+        if cinema_name is not None:
+            self.cinema_pages.pop(cinema_name, None)
+
+    def coupon_changed(self, coupon):
+        self.coupon_blocks.pop(coupon.code, None)
+        self.coupon_page = None
+
+    def invalidate(self):
+        self.movie_blocks.clear()
+        self.cinema_pages.clear()
+        self.movie_cinema.clear()
+        self.coupon_blocks.clear()
+        self.coupon_page = None
+
+    def hit(self):
+        self.hits += 1
+        metrics.inc("listing.hits")
+
+    def miss(self):
+        self.misses += 1
+        metrics.inc("listing.misses")
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def cinema_page(self, cinema):
+        page = self.cinema_pages.get(cinema.name)
+        if page is not None:
+            self.hit()
+            return page
+        self.miss()
+        parts = [f"\nMovies available at {cinema.name}:\n\n"]
+        for movie in cinema.movies:
+            self.movie_cinema[movie.id] = cinema.name
+            block = self.movie_blocks.get(movie.id)
+            if block is None:
+                block = self.movie_blocks[movie.id] = movie.render_showtimes()
+            parts.append(f"{block}\n{'-' * 20}\n")
+        page = self.cinema_pages[cinema.name] = "".join(parts)
+        return page
+
+    def coupons_page(self):
+        if self.coupon_page is not None and (self.coupon_page_expires is None
+                                             or datetime.now() < self.coupon_page_expires):
+            self.hit()
+            return self.coupon_page
+        self.miss()
+        active_coupons = self.promotions.list_active_coupons()
+        if not active_coupons:
+            page = "No active coupons.\n"
+        else:
+            parts = ["\nActive Coupons:\n"]
+            for coupon in active_coupons:
+                block = self.coupon_blocks.get(coupon.code)
+                if block is None:
+                    block = self.coupon_blocks[coupon.code] = self.render_coupon(coupon)
+                parts.append(block)
+            page = "".join(parts)
+        self.coupon_page = page
+        self.coupon_page_expires = min((c.valid_until for c in active_coupons if c.valid_until), default=None)
+        return page
+
+    def render_coupon(self, coupon):
+        lines = [f"\n Code: {coupon.code}", f" Description: {coupon.description}"]
+        if coupon.type == PERCENTAGE:
+            lines.append(f" Type: Percentage | Discount: {coupon.value}%")
+        elif coupon.type == FIXED_AMOUNT:
+            lines.append(f" Type: Fixed Amount | Discount: R$ {coupon.value:.2f}")
+        if coupon.min_purchase > 0:
+            lines.append(f" Minimum purchase: R$ {coupon.min_purchase:.2f}")
+        if coupon.max_uses:
+            lines.append(f" Max uses: {coupon.max_uses} (Used {coupon.uses_count} times)")
+        if coupon.valid_until:
+            lines.append(f" Valid until: {coupon.valid_until.strftime('%Y-%m-%d %H:%M:%S')}")
+        if coupon.applicable_cinemas:
+            lines.append(f" Applicable cinemas: {', '.join(coupon.applicable_cinemas)}")
+        if coupon.applicable_movies:
+            lines.append(f" Applicable movies: {', '.join(coupon.applicable_movies)}")
+        if coupon.user_type:
+            lines.append(f" User type: {coupon.user_type}")
+        lines.append("-" * 50)
+        return "\n".join(lines) + "\n"
+
+def seat_row(label):
+    return label.rstrip("0123456789") or label
+
+def period_factor(showtime_time):
+    try:
+        hour = int(str(showtime_time).split(":")[0])
+    except ValueError:
+        return 1.0
+    factor = PRICE_PERIODS[0][1]
+    for start, multiplier in PRICE_PERIODS:
+        if hour >= start:
+            factor = multiplier
+    return factor
+
+def tier_bounds(total):
+    return [total] + [round(total * (1 - occupancy)) for occupancy, _ in PRICE_TIERS[1:]]
+
+def row_zones(labels):
+    rows = sorted({seat_row(label) for label in labels})
+    if len(rows) < 2:
+        return {row: 1 for row in rows}
+    last = len(rows) - 1
+    return {row: 0 if i * 3 < last else 2 if i * 3 > 2 * last else 1 for i, row in enumerate(rows)}
+
+class PricingTable:
+    __slots__ = ("zones", "prices", "bounds", "tier", "current")
+
+    def __init__(self, showtime, base_price):
+        self.zones = row_zones(seat.row_and_number for seat in showtime.seats)
+        period = period_factor(showtime.time)
+        self.prices = [tuple(round(base_price * period * zone * tier, 2) for _, zone in PRICE_ZONES)
+                       for _, tier in PRICE_TIERS]
+        self.bounds = tier_bounds(len(showtime.seats))
+        self.tier = 0
+        self.current = self.prices[0]
+        self.update(showtime.free_count)
+
+    def update(self, free):
+        tier = self.tier
+        while tier + 1 < len(self.bounds) and free <= self.bounds[tier + 1]:
+            tier += 1
+        while tier > 0 and free > self.bounds[tier]:
+            tier -= 1
+        if tier != self.tier:
+            self.tier = tier
+            self.current = self.prices[tier]
+            return True
+        return False
+
+    def price(self, seat):
+        return self.current[self.zones.get(seat_row(seat.row_and_number), 1)]
+
+class PricingEngine:
+    def __init__(self, base_price=TICKET_PRICE):
+        self.base_price = base_price
+        self.tables = {}
+        self.handlers = {
+            SEAT_HELD: lambda e: self.seat_changed(e["seat"]),
+            SEAT_RELEASED: lambda e: self.seat_changed(e["seat"]),
+        }
+
+    def attach(self, bus):
+        bus.subscribe(self.on_event)
+
+    def on_event(self, event_type, payload):
+        handler = self.handlers.get(event_type)
+        if handler:
+            handler(payload)
+
+    def seat_changed(self, seat):
+        showtime = seat.showtime
+        table = self.tables.get(showtime.id) if showtime is not None else None
+        if table is not None and table.update(showtime.free_count):
+            metrics.inc("pricing.tier_changes")
+
+    def invalidate(self):
+        self.tables.clear()
+
+    def table(self, showtime):
+        table = self.tables.get(showtime.id)
+        if table is None:
+            table = self.tables[showtime.id] = PricingTable(showtime, self.base_price)
+        return table
+
+    def price(self, seat):
+        return self.table(seat.showtime).price(seat)
+
+    def compute(self, seat):
+        showtime = seat.showtime
+        free = sum(1 for s in showtime.seats if not s.is_reserved)
+        tier = PRICE_TIERS[0][1]
+        for bound, (_, multiplier) in zip(tier_bounds(len(showtime.seats)), PRICE_TIERS):
+            if free <= bound:
+                tier = multiplier
+        zone = row_zones(s.row_and_number for s in showtime.seats).get(seat_row(seat.row_and_number), 1)
+        return round(self.base_price * period_factor(showtime.time) * PRICE_ZONES[zone][1] * tier, 2)
+
+class Waitlist:
+    def __init__(self, service, notifications, hold_minutes=10, by_tier=True):
+        self.service = service
+        self.notifications = notifications
+        self.hold_minutes = hold_minutes
+        self.by_tier = by_tier
+        self.queues = {}
+        self.members = {}
+        self.sizes = {}
+        self.offers = {}
+        self.sequence = itertools.count()
+        self.bus = None
+
+    def attach(self, bus):
+        self.bus = bus
+        bus.subscribe(self.on_event)
+
+    def on_event(self, event_type, payload):
+        if event_type == SEAT_RELEASED:
+            seat = payload["seat"]
+            if seat.showtime is not None and self.sizes.get(seat.showtime.id):
+                self.bus.defer(lambda: self.allocate(seat))
+
+    def join(self, user, showtime):
+        key = (showtime.id, user.id)
+        if key not in self.members:
+            entry = (user.loyalty_tier if self.by_tier else 0, next(self.sequence), user)
+            heapq.heappush(self.queues.setdefault(showtime.id, []), entry)
+            self.members[key] = entry[1]
+            self.sizes[showtime.id] = self.sizes.get(showtime.id, 0) + 1
+            metrics.inc("waitlist.joined")
+        return self.sizes[showtime.id]
+
+    def leave(self, user, showtime):
+        if self.members.pop((showtime.id, user.id), None) is None:
+            return False
+        self.sizes[showtime.id] -= 1
+        return True
+
+    def waiting(self, showtime):
+        return self.sizes.get(showtime.id, 0)
+
+    def is_waiting(self, user, showtime):
+        return (showtime.id, user.id) in self.members
+
+    @metrics.timed("waitlist.allocate")
+    def allocate(self, seat):
+        showtime = seat.showtime
+        queue = self.queues.get(showtime.id)
+        cart = None
+        while cart is None and queue and not seat.is_reserved:
+            _, sequence, user = heapq.heappop(queue)
+            if self.members.get((showtime.id, user.id)) != sequence:
+                continue
+            del self.members[(showtime.id, user.id)]
+            self.sizes[showtime.id] -= 1
+            cart = self.service.allocate_seat(user, showtime, seat, self.hold_minutes)
+        if not self.sizes.get(showtime.id):
+            self.queues.pop(showtime.id, None)
+            self.sizes.pop(showtime.id, None)
+        if cart is not None:
+            self.offer(cart)
+        return cart
+
+    def offer(self, cart):
+        showtime, seat = cart.showtime, cart.seat
+        self.offers[(showtime.id, cart.user.id)] = cart.id
+        message = (f" A seat opened up! Seat {seat.row_and_number} for '{showtime.movie.name}' at "
+                   f"{showtime.time} is held for you for {self.hold_minutes} minutes.")
+        data = {"cart_id": cart.id, "cinema": cart.cinema.name, "movie": showtime.movie.name,
+                "time": showtime.time, "seat": seat.row_and_number}
+        self.notifications.send_notification(cart.user, WAITLIST_OFFER, message, data)
+        metrics.inc("waitlist.allocated")
+
+    def offer_for(self, user, showtime):
+        cart_id = self.offers.get((showtime.id, user.id))
+        cart = self.service.carts.get(cart_id) if cart_id else None
+        if cart is None or cart.status == "released":
+            self.offers.pop((showtime.id, user.id), None)
+            return None
+        return cart
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate, capacity, now):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def take(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+class Admission:
+    __slots__ = ("user", "showtime", "started", "deadline", "seat")
+
+    def __init__(self, user, showtime, started, deadline):
+        self.user = user
+        self.showtime = showtime
+        self.started = started
+        self.deadline = deadline
+        self.seat = None
+
+class AdmissionControl:
+    def __init__(self, rate=1.0, burst=5, queue_limit=50, admit_timeout=120):
+        self.rate = rate
+        self.burst = burst
+        self.queue_limit = queue_limit
+        self.admit_timeout = admit_timeout
+        self.buckets = {}
+        self.queues = {}
+        self.unheld = {}
+        self.checkout_time = None
+        self.clock = time.monotonic
+        self.expiries = {}
+        self.sequence = itertools.count()
+        self.handlers = {
+            SEAT_HELD: lambda e: self.seat_held(e["seat"], e["expires_at"]),
+        }
+
+    def attach(self, bus):
+        bus.subscribe(self.on_event)
+
+    def on_event(self, event_type, payload):
+        handler = self.handlers.get(event_type)
+        if handler:
+            handler(payload)
+
+    def seat_held(self, seat, expires_at):
+        showtime = seat.showtime
+        if showtime is None or expires_at is None:
+            return
+        heap = self.expiries.setdefault(showtime.id, [])
+        if len(heap) >= 2 * len(showtime.seats):
+            heap[:] = [entry for entry in heap if entry[2].reservation_expiry == entry[0]]
+            heapq.heapify(heap)
+        heapq.heappush(heap, (expires_at, next(self.sequence), seat))
+
+    def earliest_expiry(self, showtime):
+        heap = self.expiries.get(showtime.id)
+        while heap and heap[0][2].reservation_expiry != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def admit(self, user, showtime):
+        now = self.clock()
+        bucket = self.buckets.get(user.id)
+        if bucket is None:
+            bucket = self.buckets[user.id] = TokenBucket(self.rate, self.burst, now)
+        wait = bucket.take(now)
+        if wait:
+            self.reject("rate_limited", "Too many checkout attempts. Please slow down.", wait)
+        queue = self.queues.setdefault(showtime.id, {})
+        self.purge(showtime, queue, now)
+        if showtime.free_count - self.unheld.get(showtime.id, 0) <= 0:
+            retry_after = self.capacity_retry(showtime, queue, now)
+            if retry_after is None:
+                self.reject("sold_out", "This session is sold out.", None)
+            self.reject("at_capacity", "Every free seat is being checked out right now.", retry_after)
+        if len(queue) >= self.queue_limit:
+            self.reject("busy", "Too many checkouts for this session right now.", self.checkout_time or 1.0)
+        admission = Admission(user, showtime, now, now + self.admit_timeout)
+        queue[admission] = None
+        self.unheld[showtime.id] = self.unheld.get(showtime.id, 0) + 1
+        metrics.inc("admission.admitted")
+        return admission
+
+    def reject(self, code, message, retry_after):
+        metrics.inc(f"admission.{code}")
+        raise BookingError(code, message, None if retry_after is None else round(max(retry_after, 0.01), 2))
+
+    def held(self, admission, seat):
+        if admission.seat is None and admission in self.queues.get(admission.showtime.id, ()):
+            self.unheld[admission.showtime.id] -= 1
+        admission.seat = seat
+
+    def leave(self, admission, completed=True):
+        if not self.remove(admission) or not completed:
+            return False
+        elapsed = self.clock() - admission.started
+        self.checkout_time = elapsed if self.checkout_time is None else 0.8 * self.checkout_time + 0.2 * elapsed
+        if metrics.registry.enabled:
+            metrics.registry.histogram("admission.checkout").record(elapsed)
+        return True
+
+    def remove(self, admission):
+        queue = self.queues.get(admission.showtime.id)
+        if queue is None or admission not in queue:
+            return False
+        del queue[admission]
+        if admission.seat is None:
+            self.unheld[admission.showtime.id] -= 1
+        return True
+
+    def purge(self, showtime, queue, now):
+        expired = [admission for admission in queue
+                   if (admission.seat.is_expired() if admission.seat is not None else now > admission.deadline)]
+        for admission in expired:
+            self.remove(admission)
+        if expired:
+            metrics.inc("admission.expired", len(expired))
+
+    def capacity_retry(self, showtime, queue, now):
+        waits = []
+        deadline = next((admission.deadline for admission in queue if admission.seat is None), None)
+        if deadline is not None:
+            waits.append(deadline - now)
+        expiry = self.earliest_expiry(showtime)
+        if expiry is not None:
+            waits.append((expiry - datetime.now()).total_seconds())
+        if not waits:
+            return None
+        return min(min(waits), self.checkout_time or 1.0)
+
+    def queued(self):
+        return sum(len(queue) for queue in self.queues.values())
+
+class BookingService:
+    def __init__(self, cinemas, promotions, notifications, payment_processor=None):
+        self.cinemas = cinemas
+        self.promotions = promotions
+        self.notifications = notifications
+        self.payments = payment_processor or payments.PaymentProcessor(payments.SimulatedGateway())
+        self.carts = {}
+        self.voids = set()
+        self.expiries = []
+        self.expiry_sequence = itertools.count()
+        self.expiry_listeners = []
+        self.movie_cinemas = {}
+        self.availability = None
+        self.snapshots = None
+        self.waitlist = Waitlist(self, notifications)
+        self.pricing = None
+        self.admission = None
+
+    # --- Catálogo ---
+    def find_cinema(self, cinema_name):
+        cinema = self.cinemas.get(cinema_name)
+        if cinema is None:
+            raise BookingError("cinema_not_found", f"Cinema '{cinema_name}' not found.")
+        return cinema
+
+    def find_movie(self, cinema, movie_name):
+        movie = next((m for m in cinema.movies if m.name.lower() == str(movie_name).lower()), None)
+        if movie is None:
+            raise BookingError("movie_not_found", f"Movie '{movie_name}' not found at {cinema.name}.")
+        return movie
+
+    def find_showtime(self, movie, time):
+        self.release_expired()
+        showtime = next((s for s in movie.showtimes if s.time == time), None)
+        if showtime is None:
+            raise BookingError("showtime_not_found", f"No session of '{movie.name}' at {time}.")
+        return showtime
+
+    def find_seat(self, showtime, seat_label):
+        label = str(seat_label).upper()
+        seat = next((s for s in showtime.seats if s.row_and_number.upper() == label), None)
+        if seat is None:
+            raise BookingError("seat_not_found", f"Seat '{seat_label}' does not exist.")
+        return seat
+
+    def list_cinemas(self):
+        return list(self.cinemas.keys())
+
+    def list_movies(self, cinema_name):
+        cinema = self.find_cinema(cinema_name)
+        return [{
+            "movie": movie.name,
+            "genre": movie.genre,
+            "duration": movie.duration_in_minutes,
+            "rating": movie.get_average_rating(),
+            "showtimes": self._showtimes(movie),
+        } for movie in cinema.movies]
+
+    def list_showtimes(self, cinema_name, movie_name):
+        movie = self.find_movie(self.find_cinema(cinema_name), movie_name)
+        return self._showtimes(movie)
+
+    def _showtimes(self, movie):
+        snapshot = self.snapshots.snapshot() if self.snapshots is not None else None
+        return [{
+            "time": showtime.time,
+            "room": showtime.screen_number,
+            "available": free_seats(showtime, snapshot),
+        } for showtime in movie.showtimes]
+
+    def list_seats(self, cinema_name, movie_name, time):
+        movie = self.find_movie(self.find_cinema(cinema_name), movie_name)
+        showtime = self.find_showtime(movie, time)
+        if self.availability is not None:
+            return self.availability.available(showtime)
+        seat_map = self.snapshots.snapshot().seat_map(showtime.id) if self.snapshots is not None else None
+        if seat_map is not None:
+            return seat_map.available()
+        return [seat.row_and_number for seat in showtime.seats if not seat.is_reserved]
+
+    # --- Compra ---
+    @metrics.timed("booking.enter_checkout")
+    def enter_checkout(self, user, cinema_name, movie_name, time):
+        showtime = self.find_showtime(self.find_movie(self.find_cinema(cinema_name), movie_name), time)
+        return self.admission.admit(user, showtime) if self.admission is not None else None
+
+    def leave_checkout(self, admission, completed=True):
+        if admission is not None and self.admission is not None:
+            self.admission.leave(admission, completed)
+
+    @metrics.timed("booking.hold_seat")
+    def hold_seat(self, user, cinema_name, movie_name, time, seat_label, minutes=10, admission=None):
+        cinema = self.find_cinema(cinema_name)
+        showtime = self.find_showtime(self.find_movie(cinema, movie_name), time)
+        seat = self.find_seat(showtime, seat_label)
+        if not seat.hold(user, minutes):
+            raise BookingError("seat_taken", f"Seat {seat.row_and_number} is already reserved.")
+        seat.notify_reservation(user)
+        cart = self._open_cart(user, cinema, showtime, seat)
+        if admission is not None and self.admission is not None:
+            self.admission.held(admission, seat)
+            cart.admission = admission
+        return cart
+
+    def _open_cart(self, user, cinema, showtime, seat):
+        cart = CART(user, cinema, showtime, seat)
+        self.carts[cart.id] = cart
+        expires_at = seat.reservation_expiry
+        if expires_at is not None:
+            heapq.heappush(self.expiries, (expires_at, next(self.expiry_sequence), cart))
+            if self.expiries[0][2] is cart:
+                for listener in self.expiry_listeners:
+                    listener(expires_at)
+        return cart
+
+    def cinema_of(self, movie):
+        cinema = self.movie_cinemas.get(movie.id)
+        if cinema is not None and self.cinemas.get(cinema.name) is cinema:
+            return cinema
+        self.movie_cinemas = {m.id: c for c in self.cinemas.values() for m in c.movies}
+        return self.movie_cinemas.get(movie.id)
+
+    def allocate_seat(self, user, showtime, seat, minutes=10):
+        cinema = self.cinema_of(showtime.movie)
+        if cinema is None or not seat.hold(user, minutes):
+            return None
+        return self._open_cart(user, cinema, showtime, seat)
+
+    # --- Lista de espera ---
+    def join_waitlist(self, user, cinema_name, movie_name, time):
+        showtime = self.find_showtime(self.find_movie(self.find_cinema(cinema_name), movie_name), time)
+        if showtime.free_count > 0:
+            raise BookingError("seats_available", "There are still seats available for this session.")
+        return self.waitlist.join(user, showtime)
+
+    def leave_waitlist(self, user, cinema_name, movie_name, time):
+        showtime = self.find_showtime(self.find_movie(self.find_cinema(cinema_name), movie_name), time)
+        return self.waitlist.leave(user, showtime)
+
+    def get_cart(self, user, cart_id):
+        cart = self.carts.get(cart_id)
+        if cart is None or cart.user is not user:
+            raise BookingError("cart_not_found", "Cart not found.")
+        return cart
+
+    def hold_expired(self, cart):
+        return cart.status not in ("paying", "paid") and cart.seat.is_expired()
+
+    def check_hold(self, cart):
+        if self.hold_expired(cart):
+            self.release(cart)
+            return False
+        return cart.status != "released"
+
+    @metrics.timed("booking.price_cart")
+    def price_cart(self, cart, ticket_type="Standard", coupon_code=None, popcorn_size=None):
+        if cart.status not in ("held", "priced"):
+            raise BookingError("invalid_state", f"Cart is {cart.status}.")
+        price = self.pricing.price(cart.seat) if self.pricing is not None else TICKET_PRICE
+        ticket = TICKET(str(ticket_type).capitalize(), price, cart.seat, cart.showtime)
+        coupon_status = None
+        cart.coupon = None
+        cart.discount = 0.0
+        if coupon_code:
+            coupon = self.promotions.get_coupon(coupon_code)
+            quote = ticket.quote(coupon, cart.cinema.name) if coupon else None
+            if coupon is None:
+                coupon_status = "invalid"
+            elif quote is None:
+                coupon_status = "not_applicable"
+            else:
+                ticket.price, cart.discount = quote
+                cart.coupon = coupon
+                coupon_status = "applied"
+
+        cart.popcorn = None
+        if popcorn_size:
+            size = str(popcorn_size).upper()
+            if size not in POPCORN_SIZES:
+                raise BookingError("invalid_popcorn_size", f"Invalid popcorn size '{popcorn_size}'.")
+            cart.popcorn = POPCORN("Popcorn", 0.0, size)
+            cart.popcorn.purchase_product()
+
+        cart.ticket = ticket
+        cart.total = ticket.price + (cart.popcorn.price if cart.popcorn else 0.0)
+        cart.status = "priced"
+        summary = cart.summary()
+        summary["coupon_status"] = coupon_status
+        return summary
+
+    def pay(self, cart, method, card_number=None, idempotency_key=None):
+        return asyncio.run(self.pay_async(cart, method, card_number, idempotency_key))
+
+    def payment_request(self, cart, method, card_number=None, idempotency_key=None):
+        key = f"{ids.key(cart.user.id)}:{cart.id}:{idempotency_key or ''}"
+        return payments.PaymentRequest(key, cart.total, method, card_number, reference=cart.id)
+
+    async def pay_async(self, cart, method, card_number=None, idempotency_key=None):
+        with metrics.timer("booking.pay"):
+            if cart.status != "priced":
+                raise BookingError("invalid_state", f"Cart is {cart.status}.")
+            if not self.check_hold(cart):
+                raise BookingError("hold_expired", "Your temporary reservation has expired.")
+            if method not in PAYMENT_METHODS:
+                raise BookingError("invalid_payment_method", f"Unknown payment method '{method}'.")
+            number = None
+            if method != "pix":
+                number = str(card_number or "").strip()
+                if len(number) != 16 or not number.isdigit():
+                    raise BookingError("invalid_card", "Invalid card number.")
+
+            request = self.payment_request(cart, method, number, idempotency_key)
+            cart.status = "paying"
+            result = await self.payments.authorize(request)
+            if result.status == payments.CONFLICT:
+                cart.status = "priced"
+                raise BookingError("idempotency_conflict", "This idempotency key was used for another payment.")
+            if cart.status != "paying":
+                if result.approved:
+                    await self.payments.void(request.idempotency_key)
+                raise BookingError("hold_expired", "Your temporary reservation has expired.")
+            if not result.approved:
+                self.release(cart)
+                if result.status == payments.TIMEOUT:
+                    raise BookingError("payment_timeout", "The payment provider did not answer in time.")
+                if result.status == payments.ERROR:
+                    raise BookingError("payment_error", "The payment provider failed. Please try again.")
+                raise BookingError("payment_declined", "Payment was declined.")
+            cart.payment_method = method
+            cart.authorization_id = result.authorization_id
+            cart.payment_key = request.idempotency_key
+            cart.status = "paid"
+            return cart.summary()
+
+    @metrics.timed("booking.confirm")
+    def confirm(self, cart):
+        if cart.status != "paid":
+            raise BookingError("invalid_state", f"Cart is {cart.status}.")
+        user, showtime, seat, movie = cart.user, cart.showtime, cart.seat, cart.showtime.movie
+        seat.sell()
+        if cart.coupon:
+            cart.coupon.use()
+        user.add_booking(cart.ticket)
+        movie.record_sale(cart.total)
+        cart.status = "confirmed"
+        del self.carts[cart.id]
+        self.leave_checkout(cart.admission)
+        metrics.inc("booking.confirmed")
+        metrics.inc("booking.revenue_cents", int(round(cart.total * 100)))
+
+        details = {
+            "movie": movie.name,
+            "time": showtime.time,
+            "room": showtime.screen_number,
+            "seat": seat.row_and_number,
+        }
+        self.notifications.send_notification(
+            user, PAYMENT_SUCCESS, f"Payment confirmed: R$ {cart.total:.2f}",
+            dict(details, amount=f"{cart.total:.2f}"))
+        self.notifications.send_notification(
+            user, BOOKING_CONFIRMED, f"Booking confirmed for '{movie.name}'", details)
+        return cart.ticket
+
+    def release(self, cart):
+        if cart.status in ("confirmed", "released"):
+            return False
+        if cart.status == "paid":
+            self.void_payment(cart)
+        cart.seat.free(cart.user)
+        cart.status = "released"
+        self.carts.pop(cart.id, None)
+        self.leave_checkout(cart.admission)
+        metrics.inc("booking.released")
+        return True
+
+    def void_payment(self, cart):
+        void = self.payments.void(cart.payment_key)
+        try:
+            task = asyncio.get_running_loop().create_task(void)
+        except RuntimeError:
+            asyncio.run(void)
+        else:
+            self.voids.add(task)
+            task.add_done_callback(self.voids.discard)
+        cart.authorization_id = None
+
+    def next_expiry(self):
+        while self.expiries and self.expiries[0][2].id not in self.carts:
+            heapq.heappop(self.expiries)
+        return self.expiries[0][0] if self.expiries else None
+
+    def release_expired(self):
+        released = 0
+        now = datetime.now()
+        while self.expiries and self.expiries[0][0] < now:
+            cart = heapq.heappop(self.expiries)[2]
+            if cart.id in self.carts and self.hold_expired(cart):
+                self.release(cart)
+                released += 1
+        return released
+
+    def expire_holds(self):
+        return self.release_expired()
+
+    # --- Conta ---
+    def bookings(self, user):
+        return list(user.booking_history)
+
+    def cancel(self, user, ticket):
+        if ticket not in user.booking_history:
+            raise BookingError("booking_not_found", "Booking not found.")
+        ticket.seat.free(user)
+        user.remove_booking(ticket)
+        return ticket
+
+    def review(self, cinema_name, movie_name, rating, comment):
+        movie = self.find_movie(self.find_cinema(cinema_name), movie_name)
+        if not isinstance(rating, int) or rating < 1 or rating > 5:
+            raise BookingError("invalid_rating", "Rating must be between 1 and 5.")
+        movie.add_review(rating, comment)
+        return movie.get_average_rating()
+
+    def list_notifications(self, user, unread_only=False):
+        return self.notifications.get_user_notifications(user.id, unread_only)
+
+    def mark_read(self, user, notification_id):
+        if not self.notifications.mark_as_read(notification_id, user.id):
+            raise BookingError("notification_not_found", "Could not find notification.")
+        return True
+
+    def list_coupons(self):
+        return self.promotions.list_active_coupons()
+
+    # --- Administração ---
+    def _require(self, user, permission):
+        if not isinstance(user, ADMIN) or permission not in user.permissions:
+            raise BookingError("forbidden", "Access denied: Insufficient permissions.")
+
+    def add_movie(self, admin, cinema_name, name, duration, genre):
+        self._require(admin, "manage_movies")
+        movie = MOVIE(name, duration, genre)
+        admin.add_movie_to_cinema(self.find_cinema(cinema_name), movie)
+        return movie
+
+    def add_showtime(self, admin, cinema_name, movie_name, time, screen_number, num_seats):
+        self._require(admin, "manage_movies")
+        movie = self.find_movie(self.find_cinema(cinema_name), movie_name)
+        try:
+            datetime.strptime(time, "%H:%M")
+        except (TypeError, ValueError):
+            raise BookingError("invalid_time", f"Invalid showtime '{time}'. Use HH:MM.")
+        seats = [SEAT(f"S{i}") for i in range(1, num_seats + 1)] # Generic seat names
+        admin.add_showtime_to_movie(movie, time, screen_number, seats)
+        return movie.showtimes[-1]
+
+    def create_coupon(self, admin, code, coupon_type, value, description, **kwargs):
+        self._require(admin, "manage_coupons")
+        if coupon_type not in [PERCENTAGE, FIXED_AMOUNT]:
+            raise BookingError("invalid_coupon_type", "Invalid type.")
+        admin.create_coupon(code, coupon_type, value, description, **kwargs)
+        return self.promotions.get_coupon(code)
+
+    def broadcast(self, admin, message, users):
+        self._require(admin, "manage_movies")
+        if not message:
+            raise BookingError("empty_message", "Message cannot be empty.")
+        recipients = [user for user in users if user.user_type != "admin"]
+        for user in recipients:
+            self.notifications.send_notification(user, "custom_message", message)
+        return len(recipients)
+
+    def sales_report(self, admin, users):
+        self._require(admin, "view_reports")
+        if self.snapshots is not None:
+            snapshot = self.snapshots.snapshot()
+            return {
+                "version": snapshot.version,
+                "total_bookings": snapshot.total_bookings,
+                "active_coupons": snapshot.active_coupons,
+                "movies": [{
+                    "cinema": view.cinema,
+                    "movie": view.name,
+                    "tickets_sold": view.tickets_sold,
+                    "revenue": view.revenue,
+                    "average_ticket_price": view.average_ticket_price,
+                } for view in snapshot.all_movies()],
+            }
+        return {
+            "total_bookings": sum(user.booking_count for user in users),
+            "active_coupons": len(self.promotions.list_active_coupons()),
+            "movies": [{
+                "cinema": cinema.name,
+                "movie": movie.name,
+                "tickets_sold": movie.total_tickets_sold,
+                "revenue": movie.total_revenue,
+                "average_ticket_price": movie.average_ticket_price,
+            } for cinema in self.cinemas.values() for movie in cinema.movies],
+        }
 
 # --- Serviços de Notificação e Promoção ---
+ids = IdRegistry()
+event_bus = EventBus()
 notification_service = NotificationService()
 promotion_manager = PromotionManager()
+password_hasher = PasswordHasher()
 
 usuarios_registrados = {}
 usuario_logado = None
+sessao_atual = None
+auth_service = AuthService(usuarios_registrados, password_hasher)
 cinemas = {}
+booking_service = BookingService(cinemas, promotion_manager, notification_service)
+snapshot_store = SnapshotStore(cinemas, usuarios_registrados, promotion_manager)
+snapshot_store.attach(event_bus)
+booking_service.snapshots = snapshot_store
+listing_cache = ListingCache(promotion_manager)
+listing_cache.attach(event_bus)
+booking_service.waitlist.attach(event_bus)
+pricing_engine = PricingEngine()
+pricing_engine.attach(event_bus)
+booking_service.pricing = pricing_engine
+admission_control = AdmissionControl()
+admission_control.attach(event_bus)
+booking_service.admission = admission_control
+
+def contar_assentos():
+    free = held = sold = 0
+    for cinema in cinemas.values():
+        for movie in cinema.movies:
+            for showtime in loaded_showtimes(movie):
+                for seat in showtime.seats:
+                    if not seat.is_reserved:
+                        free += 1
+                    elif seat.reservation_expiry:
+                        held += 1
+                    else:
+                        sold += 1
+    return free, held, sold
+
+metrics.registry.gauge("seats.free", lambda: contar_assentos()[0])
+metrics.registry.gauge("seats.held", lambda: contar_assentos()[1])
+metrics.registry.gauge("seats.sold", lambda: contar_assentos()[2])
+metrics.registry.gauge("booking.open_carts", lambda: len(booking_service.carts))
+metrics.registry.gauge("listing.hit_rate", lambda: round(listing_cache.hit_rate(), 3))
+metrics.registry.gauge("admission.queued", lambda: admission_control.queued())
+
+def sessoes_sob_demanda(*sessoes):
+    return lambda filme: [SHOWTIME(filme, horario, sala, [SEAT(f"{fileira}{i}") for i in range(1, 11)])
+                          for horario, sala, fileira in sessoes]
+
+# Hashes scrypt das senhas de demonstração (12345, admin123 e system), pré-calculados.
+SENHAS_INICIAIS = {
+    "marcela": "scrypt$14$8$1$bbc92b2bed7676692ef74391ebe2f6d8$"
+               "367544cdccf134f483670fc8ee8c4052351e589144caf9c530a26e5373ba7bec",
+    "admin": "scrypt$14$8$1$8e7a6a38eb0c3989c333f87add2cba73$"
+             "9a4a674b25cd2705a2c7eece8e6cf40b293fd791434d796d9232ec6ff97237d8",
+    "system": "scrypt$14$8$1$b0324fd461d6a8958d92dd0b89289996$"
+              "62193e3f69f3c8c4cfe1699ee4dc228800ce56762a2569a12dfada4834a6068c",
+}
 
 def inicializar_dados():
     global cinemas, usuarios_registrados
     cinesystem = CINEMA("Cinesystem")
     filme1_cinesystem = MOVIE("Divergent", 139, "Action")
     filme2_cinesystem = MOVIE("Notting Hill", 124, "Romance")
-    filme1_cinesystem.add_showtime("19:00", 1, [SEAT(f"A{i}") for i in range(1, 11)])
-    filme2_cinesystem.add_showtime("16:00", 2, [SEAT(f"B{i}") for i in range(1, 11)])
+    filme1_cinesystem.loader = sessoes_sob_demanda(("19:00", 1, "A"))
+    filme2_cinesystem.loader = sessoes_sob_demanda(("16:00", 2, "B"))
     cinesystem.add_movie(filme1_cinesystem)
     cinesystem.add_movie(filme2_cinesystem)
 
     kinoplex = CINEMA("Kinoplex")
     filme1_kinoplex = MOVIE("The conjuring", 112, "Horror")
     filme2_kinoplex = MOVIE("Interestelar", 169, "Sci-Fi")
-    filme1_kinoplex.add_showtime("20:00", 3, [SEAT(f"C{i}") for i in range(1, 11)])
-    filme2_kinoplex.add_showtime("17:00", 4, [SEAT(f"D{i}") for i in range(1, 11)])
+    filme1_kinoplex.loader = sessoes_sob_demanda(("20:00", 3, "C"))
+    filme2_kinoplex.loader = sessoes_sob_demanda(("17:00", 4, "D"))
     kinoplex.add_movie(filme1_kinoplex)
     kinoplex.add_movie(filme2_kinoplex)
     
     centerplex = CINEMA("Centerplex")
     filme1_centerplex = MOVIE("Toy Story", 81, "Animation")
-    filme1_centerplex.add_showtime("21:00", 5, [SEAT(f"E{i}") for i in range(1, 11)])
+    filme1_centerplex.loader = sessoes_sob_demanda(("21:00", 5, "E"))
     centerplex.add_movie(filme1_centerplex)
 
     cinemas["Cinesystem"] = cinesystem
     cinemas["Kinoplex"] = kinoplex
     cinemas["Centerplex"] = centerplex
     
-    usuarios_registrados["marcela"] = USER("Marcela", "marcela", "12345", "marcela@email.com")
-    usuarios_registrados["admin"] = ADMIN("Admin", "admin", "admin123", "admin@cinema.com")
-    usuarios_registrados["system"] = USER("System", "system", "system", "system@cinema.com")
+    usuarios_registrados["marcela"] = USER("Marcela", "marcela", email="marcela@email.com",
+                                           password_hash=SENHAS_INICIAIS["marcela"])
+    usuarios_registrados["admin"] = ADMIN("Admin", "admin", email="admin@cinema.com",
+                                          password_hash=SENHAS_INICIAIS["admin"])
+    usuarios_registrados["system"] = USER("System", "system", email="system@cinema.com",
+                                          password_hash=SENHAS_INICIAIS["system"])
 
 def menu_principal():
-    global usuario_logado
+    global usuario_logado, sessao_atual
     print("\nWelcome to the Movie Ticketing System!")
     while True:
         print("\n--- Main Menu ---")
@@ -600,7 +2081,9 @@ def menu_principal():
             elif escolha == "7" and isinstance(usuario_logado, ADMIN):
                 admin_panel()
             elif escolha == "0":
+                auth_service.logout(sessao_atual)
                 usuario_logado = None
+                sessao_atual = None
                 print("You have logged out of your account.")
             else:
                 print("Invalid option. Please try again.")
@@ -626,45 +2109,21 @@ def menu_notifications():
                     notif_choice = int(input("Enter the notification number to mark as read: "))
                     if 1 <= notif_choice <= len(notifications):
                         notification_id = notifications[notif_choice - 1]['id']
-                        if notification_service.mark_as_read(notification_id):
-                            print("Notification marked as read.")
-                        else:
-                            print("Could not find notification.")
+                        booking_service.mark_read(usuario_logado, notification_id)
+                        print("Notification marked as read.")
                     else:
                         print("Invalid number.")
                 except ValueError:
                     print("Invalid input.")
+                except BookingError as error:
+                    print(error.message)
         elif escolha == "0":
             return
         else:
             print("Invalid option. Please try again.")
 
 def view_coupons():
-    active_coupons = promotion_manager.list_active_coupons()
-    if not active_coupons:
-        print("No active coupons.")
-    else:
-        print("\nActive Coupons:")
-        for coupon in active_coupons:
-            print(f"\n Code: {coupon.code}")
-            print(f" Description: {coupon.description}")
-            if coupon.type == PERCENTAGE:
-                print(f" Type: Percentage | Discount: {coupon.value}%")
-            elif coupon.type == FIXED_AMOUNT:
-                print(f" Type: Fixed Amount | Discount: R$ {coupon.value:.2f}")
-            if coupon.min_purchase > 0:
-                print(f" Minimum purchase: R$ {coupon.min_purchase:.2f}")
-            if coupon.max_uses:
-                print(f" Max uses: {coupon.max_uses} (Used {coupon.uses_count} times)")
-            if coupon.valid_until:
-                print(f" Valid until: {coupon.valid_until.strftime('%Y-%m-%d %H:%M:%S')}")
-            if coupon.applicable_cinemas:
-                print(f" Applicable cinemas: {', '.join(coupon.applicable_cinemas)}")
-            if coupon.applicable_movies:
-                print(f" Applicable movies: {', '.join(coupon.applicable_movies)}")
-            if coupon.user_type:
-                print(f" User type: {coupon.user_type}")
-            print("-" * 50)
+    print(listing_cache.coupons_page(), end="")
 
 def admin_panel():
     while True:
@@ -674,6 +2133,8 @@ def admin_panel():
         print("[3] Create New Coupon")
         print("[4] View System Reports")
         print("[5] Send Custom Notification")
+        print("[6] View Metrics")
+        print("[7] Import Catalog File")
         print("[0] Back to Main Menu")
         
         escolha = input("Select an option: ")
@@ -688,6 +2149,10 @@ def admin_panel():
             usuario_logado.view_reports()
         elif escolha == "5":
             send_custom_notification()
+        elif escolha == "6":
+            print(metrics.registry.dump())
+        elif escolha == "7":
+            import_catalog_admin()
         elif escolha == "0":
             break
         else:
@@ -706,13 +2171,12 @@ def add_movie_admin():
     try:
         cinema_choice = int(input("Cinema number: ")) - 1
         cinema_name = list(cinemas.keys())[cinema_choice]
-        cinema = cinemas[cinema_name]
-        
-        new_movie = MOVIE(name, duration, genre)
-        usuario_logado.add_movie_to_cinema(cinema, new_movie)
+        booking_service.add_movie(usuario_logado, cinema_name, name, duration, genre)
         
     except (ValueError, IndexError):
         print("Invalid option.")
+    except BookingError as error:
+        print(error.message)
 
 def add_showtime_admin():
     print("\n ADD NEW SHOWTIME")
@@ -738,12 +2202,13 @@ def add_showtime_admin():
         screen_number = int(input("Screen number: "))
         num_seats = int(input("Number of seats for this showtime: "))
         
-        seats = [SEAT(f"S{i}") for i in range(1, num_seats + 1)] # Generic seat names
-        
-        usuario_logado.add_showtime_to_movie(selected_movie, showtime_time, screen_number, seats)
+        booking_service.add_showtime(usuario_logado, cinema.name, selected_movie.name,
+                                     showtime_time, screen_number, num_seats)
 
     except (ValueError, IndexError):
         print("Invalid option.")
+    except BookingError as error:
+        print(error.message)
 
 def create_coupon_admin():
     print("\nCREATE NEW COUPON")
@@ -778,21 +2243,45 @@ def create_coupon_admin():
         if user_type:
             kwargs['user_type'] = user_type
 
-        usuario_logado.create_coupon(code, coupon_type, value, description, **kwargs)
+        booking_service.create_coupon(usuario_logado, code, coupon_type, value, description, **kwargs)
     except ValueError:
         print("Invalid input. Please check the format of your entries.")
+    except BookingError as error:
+        print(error.message)
+
+def import_catalog_admin():
+    import importer
+    print("\nIMPORT CATALOG FILE")
+    path = input("Path to a .csv or .jsonl file: ").strip()
+    try:
+        report = importer.import_file(usuario_logado, path)
+    except OSError as error:
+        print(f"Could not read the file: {error}")
+        return
+    except UnicodeDecodeError:
+        print("Could not read the file: it is not UTF-8 text.")
+        return
+    except ValueError as error:
+        print(f"Could not import the file: {error}")
+        return
+    except BookingError as error:
+        print(error.message)
+        return
+    print(f"Imported {report['movies']} movies, {report['showtimes']} showtimes ({report['seats']} seats) "
+          f"and {report['coupons']} coupons from {report['rows']} rows in {report['seconds']:.2f}s.")
+    if report["rejected"]:
+        print(f"{report['rejected']} rows rejected:")
+        for line_number, reason in report["errors"]:
+            print(f" line {line_number}: {reason}")
 
 def send_custom_notification():
     print("\nSEND CUSTOM NOTIFICATION")
     message = input("Enter the notification message to send to all users: ")
-    if not message:
-        print("Message cannot be empty.")
-        return
-
-    for user in usuarios_registrados.values():
-        if user.user_type != "admin":
-            notification_service.send_notification(user, "custom_message", message)
-    print("Custom notifications sent to all users.")
+    try:
+        booking_service.broadcast(usuario_logado, message, usuarios_registrados.values())
+        print("Custom notifications sent to all users.")
+    except BookingError as error:
+        print(error.message)
 
 def login():
     global usuario_logado
@@ -806,12 +2295,14 @@ def login():
         print("Invalid option.")
 
 def processar_login():
-    global usuario_logado
+    global usuario_logado, sessao_atual
     login_user = input("Login: ")
     password_user = input("Password: ")
     
-    if login_user in usuarios_registrados and usuarios_registrados[login_user].password == password_user:
-        usuario_logado = usuarios_registrados[login_user]
+    token = auth_service.login(login_user, password_user)
+    if token:
+        sessao_atual = token
+        usuario_logado = auth_service.resolve(token)
         print(f"Login successful! Welcome, {usuario_logado.name}.")
     else:
         print("Incorrect login or password.")
@@ -826,9 +2317,10 @@ def registrar():
         print("This login already exists. Please try another one.")
     elif len(password_user) < 5:
          print("The password must be a string and have at least 5 characters.")
-    else:
-        usuarios_registrados[login_user] = USER(name, login_user, password_user)
+    elif auth_service.register(name, login_user, password_user):
         print("User successfully registered!")
+    else:
+        print("Could not register user. Please try again.")
 
 def ver_cinemas():
     print("\n--- Choose a Cinema ---")
@@ -860,31 +2352,32 @@ def ver_filmes(cinema_obj):
         print("Movie not found. Please try again.")
         return
         
-    comprar_ingresso(filme_selecionado)
+    comprar_ingresso(filme_selecionado, cinema_obj)
 
-def payment(valor):
-    print(f"\n--- Payment Process of R${valor:.2f} ---")
+@metrics.timed("payment")
+def payment(cart):
+    print(f"\n--- Payment Process of R${cart.total:.2f} ---")
+    metodos = {"1": ("credit_card", "Credit Card"), "2": ("debit_card", "Debit Card"), "3": ("pix", "Pix")}
     while True:
         forma_de_pagamento = input("Choose a payment method: \n[1] Credit Card\n[2] Debit Card\n[3] Pix\n[4] Cancel\n") 
 
-        if forma_de_pagamento == "1":
-            numero = input("Number of credit card(16 digits):").strip()
-            if len(numero) == 16 and numero.isdigit():
-                print(f"Payment made with Credit Card of R${valor:.2f}.")
-                return True
-            else:
-                print("Invalid credit card number. Please try again.")
-        elif forma_de_pagamento == "2":
-            numero = input("Number of debit card(16 digits): ").strip()
-            if len(numero) == 16 and numero.isdigit():
-                print(f"Payment made with Debit Card of R${valor:.2f}.")
-                return True
+        if forma_de_pagamento in metodos:
+            metodo, nome = metodos[forma_de_pagamento]
+            numero = None
+            if metodo == "pix":
+                print("Pix Key: cinemaenterprises.com")
+                print(f"Value: R${cart.total:.2f}")
             else:
-                print("Invalid debit card number. Please try again.")
-        elif forma_de_pagamento == "3":
-            print("Pix Key: cinemaenterprises.com")
-            print(f"Value: R${valor:.2f}")
-            print(f"Payment made with Pix of R${valor:.2f} Successfully completed.")
+                numero = input(f"Number of {nome.lower()}(16 digits): ").strip()
+            try:
+                booking_service.pay(cart, metodo, numero)
+            except BookingError as error:
+                if error.code == "invalid_card":
+                    print(f"Invalid {nome.lower()} number. Please try again.")
+                    continue
+                print(error.message)
+                return False
+            print(f"Payment made with {nome} of R${cart.total:.2f}.")
             return True
         elif forma_de_pagamento == "4":
             print("Payment canceled.")
@@ -892,116 +2385,107 @@ def payment(valor):
         else:
             print("Invalid option. Please try again.")
 
-def comprar_ingresso(movie):
+def comprar_ingresso(movie, cinema):
     print(f"\n--- Buy Ticket for '{movie.name}' ---")
     movie.list_showtimes()
     
     escolha_horario = input("Enter the session time (ex: 19:00): ")
-    showtime_selecionado = next((s for s in movie.showtimes if s.time == escolha_horario), None)
-    
-    if not showtime_selecionado:
+    try:
+        showtime_selecionado = booking_service.find_showtime(movie, escolha_horario)
+    except BookingError:
         print("Invalid time. Please try again.")
         return
         
     print(f"\nSelected time: {showtime_selecionado.time} | Room: {showtime_selecionado.screen_number}")
-    showtime_selecionado.list_available_seats()
+    cart = booking_service.waitlist.offer_for(usuario_logado, showtime_selecionado)
+    if cart:
+        print(f"Seat {cart.seat.row_and_number} was held for you from the waitlist.")
+    elif showtime_selecionado.free_count == 0:
+        entrar_lista_espera(movie, cinema, showtime_selecionado)
+        return
+    else:
+        try:
+            admissao = booking_service.enter_checkout(usuario_logado, cinema.name, movie.name,
+                                                      showtime_selecionado.time)
+        except BookingError as error:
+            if error.code == "sold_out":
+                entrar_lista_espera(movie, cinema, showtime_selecionado)
+            else:
+                print(f"{error.message} Please try again in {error.retry_after:.1f} seconds.")
+            return
+        showtime_selecionado.list_available_seats()
     
-    assento_selecionado = None
-    while True:
+    while cart is None:
         escolha_assento = input("Enter the number of the seat you want (ex: A5): ").upper()
-        assento_selecionado = next((s for s in showtime_selecionado.seats if s.row_and_number.upper() == escolha_assento), None)
-        
-        if not assento_selecionado:
-            print("Invalid seat. Please try again.")
-            continue
-            
-        if assento_selecionado.is_reserved:
-            print("Seat already reserved. History:")
-            assento_selecionado.get_history()
-            continue
-            
-        if assento_selecionado.temp_reserve(usuario_logado, minutes=10):
-            break
-        else:
-            print("Could not reserve seat. Please try another one.")
+        try:
+            cart = booking_service.hold_seat(usuario_logado, cinema.name, movie.name,
+                                             showtime_selecionado.time, escolha_assento, minutes=10,
+                                             admission=admissao)
+        except BookingError as error:
+            if error.code == "seat_taken":
+                print("Seat already reserved. History:")
+                booking_service.find_seat(showtime_selecionado, escolha_assento).get_history()
+            else:
+                print("Invalid seat. Please try again.")
+    print(f"Seat {cart.seat.row_and_number} reserved for 10 minutes.")
     
     tipo_ingresso = input("Enter the ticket type (Standard, Student): ").capitalize()
-    preco = 25.0
-    
-    ticket = TICKET(tipo_ingresso, preco, assento_selecionado, showtime_selecionado)
-    
     coupon_code = input("Do you have a coupon code? (Enter code or leave blank): ")
-    if coupon_code:
-        coupon = promotion_manager.get_coupon(coupon_code)
-        if coupon:
-            ticket.promotion(coupon)
-        else:
-            print("Invalid coupon code.")
+    resumo = booking_service.price_cart(cart, tipo_ingresso, coupon_code)
+    if resumo["coupon_status"] == "applied":
+        print(f"Coupon '{resumo['coupon']}' applied! Discount: R${resumo['discount']:.2f}")
+    elif resumo["coupon_status"] == "not_applicable":
+        print(f"Coupon '{coupon_code.upper()}' cannot be applied to this purchase.")
+    elif resumo["coupon_status"] == "invalid":
+        print("Invalid coupon code.")
 
     print(f"\nPurchase Summary:")
     print(f" Movie: {movie.name}")
     print(f" Session: {showtime_selecionado.time} - Room {showtime_selecionado.screen_number}")
-    print(f" Seat: {assento_selecionado.row_and_number}")
-    print(f" Ticket Price: R$ {ticket.price:.2f}")
-
-    total_price = ticket.price
-    popcorn_item = None
+    print(f" Seat: {cart.seat.row_and_number}")
+    print(f" Ticket Price: R$ {resumo['ticket_price']:.2f}")
 
     escolha_combo = input("\nWould you like to add a popcorn combo? \n[1] Yes\n[2] No\n ")
     if escolha_combo == "1":
         while True:
             combo_size = input("Popcorn size (S, M, L): ").upper()
-            if combo_size in ["S", "M", "L"]:
+            if combo_size in POPCORN_SIZES:
                 break
             else:
                 print("Invalid size. Please try again.")
-        popcorn_item = POPCORN("Popcorn", 0.0, combo_size)
-        popcorn_item.purchase_product()
-        print(f"Combo of {popcorn_item.name} ({popcorn_item.size}) added. Price: R$ {popcorn_item.price:.2f}")
-        total_price += popcorn_item.price
-        print(f"New Total price: R$ {total_price:.2f}")
+        resumo = booking_service.price_cart(cart, tipo_ingresso, coupon_code, combo_size)
+        print(f"Combo of {resumo['popcorn']} ({combo_size}) added. Price: R$ {resumo['popcorn_price']:.2f}")
+        print(f"New Total price: R$ {resumo['total']:.2f}")
 
-    pagar = input(f"Total price: R$ {total_price:.2f}. Do you wish to proceed with the payment? \n[1] Yes\n[2] No\n ")
+    pagar = input(f"Total price: R$ {cart.total:.2f}. Do you wish to proceed with the payment? \n[1] Yes\n[2] No\n ")
     if pagar == "1":
-        if not assento_selecionado.check_expiry():
-            if payment(total_price):
-                assento_selecionado.reservation_expiry = None 
+        if booking_service.check_hold(cart):
+            if payment(cart):
+                ticket = booking_service.confirm(cart)
                 ticket.purchase_product()
-                usuario_logado.add_booking(ticket)
-                movie.total_tickets_sold += 1
-                movie.total_revenue += total_price
                 ticket.generate_qr_code()
-                notification_service.send_notification(
-                usuario_logado,
-                PAYMENT_SUCCESS,
-                f"Payment confirmed: R$ {total_price:.2f}",
-                {
-                    "movie": movie.name,
-                    "time": showtime_selecionado.time,
-                    "room": showtime_selecionado.screen_number,
-                    "seat": assento_selecionado.row_and_number,
-                    "amount": f"{total_price:.2f}",
-                },
-                )
-                notification_service.send_notification(
-                    usuario_logado,
-                    BOOKING_CONFIRMED,
-                    f"Booking confirmed for '{movie.name}'",
-                    {
-                        "movie": movie.name,
-                        "time": showtime_selecionado.time,
-                        "room": showtime_selecionado.screen_number,
-                        "seat": assento_selecionado.row_and_number,
-                    },
-                )
             else:
                 print("Payment failed. Releasing seat.")
-                assento_selecionado.release(usuario_logado)
+                booking_service.release(cart)
         else:
             print("Your temporary reservation has expired. Please start over.")   
     else:
         print("Purchase canceled.")
-        assento_selecionado.release(usuario_logado)
+        booking_service.release(cart)
+
+def entrar_lista_espera(movie, cinema, showtime):
+    if booking_service.waitlist.is_waiting(usuario_logado, showtime):
+        print("This session is sold out. You are already on the waitlist.")
+        return
+    resposta = input("This session is sold out. Join the waitlist? \n[1] Yes\n[2] No\n ")
+    if resposta != "1":
+        return
+    try:
+        waiting = booking_service.join_waitlist(usuario_logado, cinema.name, movie.name, showtime.time)
+    except BookingError as error:
+        print(error.message)
+        return
+    print(f"You joined the waitlist ({waiting} waiting). We will hold a seat and notify you when one is released.")
 
 def avaliar_filme():
     print("\n--- Choose a Cinema to Rate a Movie ---")
@@ -1030,11 +2514,11 @@ def avaliar_filme():
                 raise ValueError
             comment = input("Your comment: ")
             
-            movie_to_review.add_review(rating, comment)
+            booking_service.review(cinema_obj.name, movie_to_review.name, rating, comment)
             print("Review successfully submitted!")
             return
 
-        except (ValueError, IndexError):
+        except (ValueError, IndexError, BookingError):
             print("Invalid option. Please try again.")
 
 def cancelar_compra():
@@ -1052,15 +2536,45 @@ def cancelar_compra():
         index = int(escolha) - 1
         if 0 <= index < len(usuario_logado.booking_history):
             ticket_to_cancel = usuario_logado.booking_history[index]
-            ticket_to_cancel.cancel_purchase()
-            usuario_logado.remove_booking(ticket_to_cancel)
+            booking_service.cancel(usuario_logado, ticket_to_cancel)
+            print(f"Ticket for seat {ticket_to_cancel.seat.row_and_number} cancelled.")
             print("Booking cancelled successfully!")
         else:
             print("Invalid number.")
     except (ValueError, IndexError):
         print("Invalid option. Please try again.")
 
+def carregar_estado():
+    import atexit
+    caminho_journal = os.environ.get("CINEMA_JOURNAL")
+    caminho_db = os.environ.get("CINEMA_DB")
+    if caminho_journal:
+        import journal
+        diario = journal.Journal(caminho_journal, cinemas, usuarios_registrados, promotion_manager,
+                                 notification_service)
+        if not diario.recover():
+            inicializar_dados()
+        diario.attach(event_bus)
+        atexit.register(diario.close)
+    elif caminho_db:
+        import storage
+        armazenamento = storage.Storage(caminho_db)
+        sob_demanda = os.environ.get("CINEMA_LAZY", "1") != "0"
+        if not armazenamento.load_into(cinemas, usuarios_registrados, promotion_manager, notification_service,
+                                       sob_demanda):
+            inicializar_dados()
+            armazenamento.save_all(cinemas, usuarios_registrados, promotion_manager, notification_service)
+        armazenamento.attach(event_bus)
+        booking_service.availability = armazenamento.availability
+        atexit.register(armazenamento.close)
+    else:
+        inicializar_dados()
+    snapshot_store.invalidate()
+    listing_cache.invalidate()
+    pricing_engine.invalidate()
+
 # --- Programa Principal---
 if __name__ == "__main__":
-    inicializar_dados()
+    sys.modules.setdefault("system", sys.modules[__name__])
+    carregar_estado()
     menu_principal()
\ No newline at end of file
@@ -0,0 +1,40 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import payments  # noqa: E402
+import system  # noqa: E402
+
+
+@pytest.fixture
+def make_cinema():
+    def make(name="Test Cinema", movies=("Test Movie",), seats=5):
+        cinema = system.CINEMA(name)
+        for title in movies:
+            movie = system.MOVIE(title, 100, "Drama")
+            movie.add_showtime("19:00", 1, [system.SEAT(f"A{i}") for i in range(1, seats + 1)])
+            cinema.add_movie(movie)
+        return cinema
+    return make
+
+
+@pytest.fixture
+def make_service():
+    def make(*cinemas):
+        return system.BookingService({cinema.name: cinema for cinema in cinemas}, system.PromotionManager(),
+                                     system.NotificationService(echo=False),
+                                     payments.PaymentProcessor(payments.SimulatedGateway(seed=1)))
+    return make
+
+
+@pytest.fixture
+def cinema(make_cinema):
+    return make_cinema()
+
+
+@pytest.fixture
+def service(make_service, cinema):
+    return make_service(cinema)
@@ -0,0 +1,80 @@
+import pytest
+
+import system
+
+
+@pytest.fixture
+def service(service):
+    service.admission = system.AdmissionControl(queue_limit=10)
+    service.admission.attach(system.event_bus)
+    yield service
+    system.event_bus.unsubscribe(service.admission.on_event)
+
+
+def buyers(count):
+    return [system.USER(f"Buyer {i}", f"buyer{i}", password_hash="unused") for i in range(count)]
+
+
+def checkout(service, user, seat=None, minutes=10):
+    admission = service.enter_checkout(user, "Test Cinema", "Test Movie", "19:00")
+    if seat is None:
+        return admission
+    return service.hold_seat(user, "Test Cinema", "Test Movie", "19:00", seat, minutes, admission=admission)
+
+
+def test_admitted_buyers_count_against_free_seats(service):
+    first, *others, late = buyers(6)
+    waiting = checkout(service, first)
+    for user in others:
+        checkout(service, user)
+    with pytest.raises(system.BookingError) as error:
+        checkout(service, late)
+    assert error.value.code == "at_capacity"
+    assert error.value.retry_after is not None
+
+    service.leave_checkout(waiting, completed=False)
+    assert checkout(service, late) is not None
+    assert service.admission.queued() == 5
+
+
+def test_holds_move_buyers_from_unheld_to_held(service):
+    users = buyers(2)
+    cart = checkout(service, users[0], "A1")
+    admission = checkout(service, users[1])
+    showtime = cart.showtime
+    assert service.admission.unheld[showtime.id] == 1
+    assert showtime.free_count == 4
+
+    service.release(cart)
+    service.leave_checkout(admission)
+    assert service.admission.queued() == 0
+    assert service.admission.unheld[showtime.id] == 0
+    assert service.admission.checkout_time is not None
+
+
+def test_capacity_retry_follows_earliest_live_hold(service):
+    service.admission.checkout_time = 3600
+    users = buyers(6)
+    short = checkout(service, users[0], "A1", minutes=1)
+    service.release(short)
+    checkout(service, users[0], "A1")
+    for user, seat in zip(users[1:4], ("A2", "A3", "A4")):
+        checkout(service, user, seat)
+    checkout(service, users[4], "A5", minutes=5)
+
+    with pytest.raises(system.BookingError) as error:
+        checkout(service, users[5])
+    assert error.value.code == "at_capacity"
+    assert 290 < error.value.retry_after <= 300
+
+
+def test_sold_out_session_is_not_retried(service):
+    users = buyers(6)
+    for user, seat in zip(users, ("A1", "A2", "A3", "A4", "A5")):
+        cart = checkout(service, user, seat)
+        cart.seat.sell()
+        service.leave_checkout(cart.admission)
+    with pytest.raises(system.BookingError) as error:
+        checkout(service, users[5])
+    assert error.value.code == "sold_out"
+    assert error.value.retry_after is None
@@ -0,0 +1,23 @@
+import system
+
+
+def test_unknown_login_costs_a_verification():
+    hasher = system.PasswordHasher(cost=4)
+    auth = system.AuthService({}, hasher, workers=1)
+    auth.register("Buyer", "buyer", "secret1")
+    derived = []
+    derive = hasher._derive
+    hasher._derive = lambda *args: derived.append(args[2:]) or derive(*args)
+
+    assert auth.login("nobody", "secret1") is None
+    assert auth.login("buyer", "wrong") is None
+    assert derived == [(4, 8, 1), (4, 8, 1)]
+    assert auth.login("buyer", "secret1") is not None
+
+
+def test_seed_users_keep_their_demo_passwords():
+    users = {}
+    auth = system.AuthService(users, system.password_hasher, workers=1)
+    for login, password in (("marcela", "12345"), ("admin", "admin123"), ("system", "system")):
+        users[login] = system.USER(login, login, password_hash=system.SENHAS_INICIAIS[login])
+        assert auth.login(login, password) is not None
@@ -0,0 +1,47 @@
+import gc
+import json
+
+import pytest
+
+import importer
+import system
+
+
+def run(tmp_path, lines, name="catalog.jsonl"):
+    path = tmp_path / name
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    cinemas = {"Kinoplex": system.CINEMA("Kinoplex")}
+    catalog = importer.Importer(cinemas, system.PromotionManager(), system.NotificationService(echo=False), {})
+    return cinemas, catalog.run(str(path), notify=False)
+
+
+def test_mistyped_and_non_object_rows_are_rejected(tmp_path):
+    cinemas, report = run(tmp_path, [
+        json.dumps({"kind": "movie", "cinema": "Kinoplex", "movie": "Dune", "duration": 155, "genre": 5}),
+        "[1, 2]",
+        json.dumps({"kind": "movie", "cinema": "Kinoplex", "movie": 7, "duration": 100}),
+        json.dumps({"kind": "movie", "cinema": "Kinoplex", "movie": "Her", "duration": 126, "genre": "Drama"}),
+        json.dumps({"kind": "showtime", "cinema": "Kinoplex", "movie": "Her", "time": 19, "layout": 10}),
+        json.dumps({"kind": "showtime", "cinema": "Kinoplex", "movie": "Her", "time": "19:00", "layout": 10}),
+        json.dumps({"kind": "coupon", "code": "HER10", "coupon_type": "percentage", "value": 10,
+                    "applicable_movies": [1]}),
+    ])
+    assert report["movies"] == 1 and report["showtimes"] == 1
+    assert report["rejected"] == 5
+    assert [line for line, _ in report["errors"]] == [1, 2, 3, 5, 7]
+    assert [movie.name for movie in cinemas["Kinoplex"].movies] == ["Her"]
+
+
+def test_import_leaves_objects_to_the_collector(tmp_path):
+    frozen = gc.get_freeze_count()
+    run(tmp_path, [json.dumps({"kind": "movie", "cinema": "Kinoplex", "movie": "Her", "duration": 126})])
+    assert gc.get_freeze_count() == frozen
+    assert gc.isenabled()
+
+
+def test_non_utf8_file_raises_a_value_error(tmp_path):
+    path = tmp_path / "catalog.csv"
+    path.write_bytes(b"kind,cinema,movie\nmovie,Kinoplex,\xff\xfe\n")
+    catalog = importer.Importer({}, system.PromotionManager(), system.NotificationService(echo=False), {})
+    with pytest.raises(ValueError):
+        catalog.run(str(path), notify=False)
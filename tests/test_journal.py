@@ -0,0 +1,83 @@
+import os
+
+import pytest
+
+import journal
+import system
+
+
+def containers():
+    return {}, {}, system.PromotionManager(), system.NotificationService(echo=False)
+
+
+def encode(cinemas, users, promotions):
+    return (tuple(journal.encode_movie(movie) for cinema in cinemas.values() for movie in cinema.movies),
+            tuple(journal.encode_user(user) + (tuple((t.seat.row_and_number, t.name, t.price)
+                                                     for t in user.booking_history),)
+                  for user in users.values()),
+            tuple(journal.encode_coupon(coupon) for coupon in promotions.coupons.values()))
+
+
+@pytest.fixture
+def recorded(tmp_path, cinema):
+    cinemas, users, promotions, notifications = containers()
+    cinemas[cinema.name] = cinema
+    movie = cinema.movies[0]
+    showtime = movie.showtimes[0]
+    user = users["buyer"] = system.USER("Buyer", "buyer", password_hash="unused")
+
+    log = journal.Journal(str(tmp_path), cinemas, users, promotions, notifications)
+    log.attach(system.event_bus)
+    try:
+        sold, held = showtime.seats[0], showtime.seats[1]
+        sold.hold(user, 10)
+        sold.sell()
+        user.add_booking(system.TICKET("Standard", 25.0, sold, showtime))
+        movie.record_sale(25.0)
+        movie.add_review(5, "Great")
+        promotions.add_coupon(system.Coupon("TEST10", system.PERCENTAGE, 10, "10% off"))
+        showtime.seats[2].hold(user, 10)
+        showtime.seats[2].free(user)
+        held.hold(user, 10)
+    finally:
+        log.close()
+    held.is_reserved = False
+    held.reservation_expiry = None
+    return str(tmp_path), log.seq, encode(cinemas, users, promotions)
+
+
+def recover(directory):
+    cinemas, users, promotions, notifications = containers()
+    log = journal.Journal(directory, cinemas, users, promotions, notifications)
+    assert log.recover()
+    log.close()
+    return log, encode(cinemas, users, promotions), cinemas
+
+
+def test_replay_rebuilds_the_recorded_state(recorded):
+    directory, seq, expected = recorded
+    log, state, _ = recover(directory)
+    assert log.seq == seq
+    assert log.replayed == seq
+    assert state == expected
+
+
+def test_restored_holds_are_released(recorded):
+    directory = recorded[0]
+    seats = recover(directory)[2]["Test Cinema"].movies[0].showtimes[0].seats
+    assert [(seat.is_reserved, seat.reservation_expiry) for seat in seats[:3]] == \
+        [(True, None), (False, None), (False, None)]
+    assert seats[0].showtime.free_count == 4
+
+
+def test_torn_tail_is_cut_off(recorded):
+    directory, seq, expected = recorded
+    segment = os.path.join(directory, journal.SEGMENT.format(1))
+    size = os.path.getsize(segment)
+    with open(segment, "ab") as handle:
+        handle.write(journal.HEADER.pack(64, 0, seq + 1) + b"torn")
+
+    log, state, _ = recover(directory)
+    assert log.seq == seq
+    assert state == expected
+    assert os.path.getsize(segment) == size
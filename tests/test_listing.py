@@ -0,0 +1,57 @@
+import pytest
+
+import system
+
+
+@pytest.fixture
+def cache(make_cinema):
+    cinemas = [make_cinema(name, (f"{name} Test Movie", f"{name} Other Movie"))
+               for name in ("Test Cinema", "Other Cinema")]
+    promotions = system.PromotionManager()
+    cache = system.ListingCache(promotions)
+    cache.attach(system.event_bus)
+    for cinema in cinemas:
+        cache.cinema_page(cinema)
+    cache.coupons_page()
+    yield cache, cinemas, promotions
+    system.event_bus.unsubscribe(cache.on_event)
+
+
+def test_seat_changes_drop_only_their_movie_and_cinema(cache):
+    cache, (cinema, other), _ = cache
+    seat = cinema.movies[0].showtimes[0].seats[0]
+    user = system.USER("Buyer", "buyer", password_hash="unused")
+    cached = {movie.id for movie in cinema.movies + other.movies}
+
+    for change in (lambda: seat.hold(user, 10), lambda: seat.free(user)):
+        change()
+        assert set(cache.movie_blocks) == cached - {cinema.movies[0].id}
+        assert set(cache.cinema_pages) == {other.name}
+        assert cache.coupon_page is not None
+        cache.cinema_page(cinema)
+        assert f"seats available: {seat.showtime.free_count}" in cache.movie_blocks[cinema.movies[0].id]
+
+
+def test_coupon_use_and_creation_drop_the_coupon_page(cache):
+    cache, cinemas, promotions = cache
+    coupon = next(iter(promotions.coupons.values()))
+    coupon.use()
+    assert cache.coupon_page is None and coupon.code not in cache.coupon_blocks
+    assert set(cache.cinema_pages) == {cinema.name for cinema in cinemas}
+
+    cache.coupons_page()
+    promotions.add_coupon(system.Coupon("TEST10", system.PERCENTAGE, 10, "10% off"))
+    assert cache.coupon_page is None
+    assert "TEST10" in cache.coupons_page()
+
+
+def test_hit_rate_counts_cached_pages(cache):
+    cache, (cinema, _), _ = cache
+    assert (cache.hits, cache.misses) == (0, 3)
+    assert cache.hit_rate() == 0.0
+    for _ in range(3):
+        cache.cinema_page(cinema)
+    cache.coupons_page()
+    assert (cache.hits, cache.misses) == (4, 3)
+    assert cache.hit_rate() == pytest.approx(4 / 7)
+    assert system.ListingCache(system.PromotionManager()).hit_rate() == 0.0
@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import metrics
+
+
+def test_bucket_round_trip_error_is_bounded():
+    for value in list(range(1024)) + [2 ** power + offset for power in range(10, 40) for offset in (-1, 0, 1, 12345)]:
+        index = metrics.Histogram.bucket(value)
+        assert index == metrics.Histogram.bucket(metrics.Histogram.bucket_value(index))
+        if value < metrics.SUB_BUCKET_COUNT:
+            assert metrics.Histogram.bucket_value(index) == value
+        else:
+            assert abs(metrics.Histogram.bucket_value(index) - value) / value < 1 / metrics.SUB_BUCKET_HALF
+
+
+def test_percentiles_follow_recorded_latencies():
+    histogram = metrics.Histogram()
+    assert histogram.percentile(0.5) == 0
+    for micros in range(1, 1001):
+        histogram.record(micros / 1_000_000)
+    for fraction in (0.5, 0.9, 0.99):
+        assert histogram.percentile(fraction) == pytest.approx(fraction * 1000, rel=1 / 64)
+    assert histogram.percentile(1.0) == histogram.max == 1000
+    assert histogram.summary()["min_us"] == 1
+
+
+def test_disabled_metrics_leave_functions_undecorated():
+    code = "import metrics\ndef f(): pass\nprint(metrics.timed('f')(f) is f, metrics.ENABLED)"
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for setting, expected in (("0", "True False"), ("1", "False True")):
+        output = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True,
+                                env=dict(os.environ, CINEMA_METRICS=setting)).stdout
+        assert output.strip() == expected
@@ -0,0 +1,129 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+import payments
+import system
+
+
+def priced_cart(service, user, seat, popcorn=None):
+    cart = service.hold_seat(user, "Test Cinema", "Test Movie", "19:00", seat)
+    service.price_cart(cart, "Standard", popcorn_size=popcorn)
+    return cart
+
+
+def test_client_key_reused_for_another_cart_charges_it_separately(service):
+    user = system.USER("Buyer", "buyer", password_hash="unused")
+    first = priced_cart(service, user, "A1")
+    second = priced_cart(service, user, "A2", popcorn="L")
+    assert first.total != second.total
+    service.pay(first, "pix", idempotency_key="k1")
+    service.pay(second, "pix", idempotency_key="k1")
+    assert first.authorization_id != second.authorization_id
+    assert service.payments.gateway.calls == 2
+    assert len(service.payments.gateway.captured()) == 2
+
+
+def test_retry_of_same_cart_is_not_charged_twice(service):
+    user = system.USER("Buyer", "buyer", password_hash="unused")
+    cart = priced_cart(service, user, "A1")
+    request = service.payment_request(cart, "pix", idempotency_key="k1")
+
+    async def pay_twice():
+        return await asyncio.gather(service.payments.authorize(request),
+                                    service.pay_async(cart, "pix", idempotency_key="k1"))
+
+    direct, summary = asyncio.run(pay_twice())
+    assert direct.approved and summary["status"] == "paid"
+    assert cart.status == "paid"
+    assert service.payments.gateway.calls == 1
+
+
+def test_other_users_cannot_replay_a_key(service):
+    owner = system.USER("Owner", "owner", password_hash="unused")
+    other = system.USER("Other", "other", password_hash="unused")
+    service.pay(priced_cart(service, owner, "A1"), "pix", idempotency_key="shared")
+    cart = priced_cart(service, other, "A2")
+    service.pay(cart, "pix", idempotency_key="shared")
+    assert service.payments.gateway.calls == 2
+
+
+def test_replay_with_different_amount_or_cart_is_refused():
+    processor = payments.PaymentProcessor(payments.SimulatedGateway(seed=1))
+
+    async def replay():
+        first = await processor.authorize(payments.PaymentRequest("k1", 25.0, "pix", reference="cart-1"))
+        cheaper = await processor.authorize(payments.PaymentRequest("k1", 1.0, "pix", reference="cart-1"))
+        other = await processor.authorize(payments.PaymentRequest("k1", 25.0, "pix", reference="cart-2"))
+        return first, cheaper, other
+
+    first, cheaper, other = asyncio.run(replay())
+    assert first.approved
+    assert cheaper.status == other.status == payments.CONFLICT
+    assert processor.gateway.calls == 1
+
+
+def test_conflicting_pay_keeps_cart_payable(service, monkeypatch):
+    user = system.USER("Buyer", "buyer", password_hash="unused")
+    cart = priced_cart(service, user, "A1")
+    monkeypatch.setattr(service, "payment_request", lambda *args: payments.PaymentRequest(
+        "fixed", cart.total + 1, "pix", reference="elsewhere"))
+    asyncio.run(service.payments.authorize(payments.PaymentRequest("fixed", cart.total, "pix", reference="x")))
+    with pytest.raises(system.BookingError) as error:
+        service.pay(cart, "pix")
+    assert error.value.code == "idempotency_conflict"
+    assert cart.status == "priced"
+
+
+def test_results_are_bounded():
+    processor = payments.PaymentProcessor(payments.SimulatedGateway(seed=1), max_results=3)
+
+    async def pay_all():
+        for i in range(10):
+            await processor.authorize(payments.PaymentRequest(f"k{i}", 10.0, "pix", reference=f"c{i}"))
+
+    asyncio.run(pay_all())
+    assert list(processor.results) == ["k7", "k8", "k9"]
+
+
+class Later(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return datetime.now(tz) + timedelta(hours=1)
+
+
+def test_expiry_does_not_release_a_paid_cart(service, monkeypatch):
+    cart = priced_cart(service, system.USER("Buyer", "buyer", password_hash="unused"), "A1")
+    service.pay(cart, "pix")
+    monkeypatch.setattr(system, "datetime", Later)
+    assert service.release_expired() == 0
+    monkeypatch.undo()
+    assert cart.status == "paid" and cart.seat.is_reserved
+    service.confirm(cart)
+    assert len(service.payments.gateway.captured()) == 1
+
+
+def test_releasing_a_paid_cart_voids_the_charge(service):
+    cart = priced_cart(service, system.USER("Buyer", "buyer", password_hash="unused"), "A1")
+    service.pay(cart, "pix")
+    assert service.release(cart)
+    assert not cart.seat.is_reserved
+    assert service.payments.gateway.captured() == []
+    assert cart.authorization_id is None
+
+
+class BrokenGateway(payments.SimulatedGateway):
+    async def authorize(self, request):
+        raise RuntimeError("connection reset")
+
+
+def test_gateway_exception_releases_the_hold(service):
+    service.payments = payments.PaymentProcessor(BrokenGateway())
+    cart = priced_cart(service, system.USER("Buyer", "buyer", password_hash="unused"), "A1")
+    with pytest.raises(system.BookingError) as error:
+        service.pay(cart, "pix")
+    assert error.value.code == "payment_error"
+    assert cart.status == "released"
+    assert not cart.seat.is_reserved
+    assert cart.id not in service.carts
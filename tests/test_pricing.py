@@ -0,0 +1,43 @@
+import pytest
+
+import system
+
+
+def test_showtime_time_must_be_hh_mm(service, cinema):
+    admin = system.ADMIN("Admin", "admin", password_hash="unused")
+    with pytest.raises(system.BookingError) as error:
+        service.add_showtime(admin, "Test Cinema", "Test Movie", "7pm", 1, 10)
+    assert error.value.code == "invalid_time"
+    assert [showtime.time for showtime in cinema.movies[0].showtimes] == ["19:00"]
+
+    showtime = service.add_showtime(admin, "Test Cinema", "Test Movie", "10:30", 1, 10)
+    assert system.pricing_engine.price(showtime.seats[0]) == system.pricing_engine.compute(showtime.seats[0])
+
+
+def test_unparsable_stored_time_prices_at_base_period():
+    assert system.period_factor("7pm") == 1.0
+    assert system.period_factor("10:30") == 0.8
+    assert system.period_factor("19:00") == 1.0
+
+
+def test_table_follows_tier_bounds_while_holding_and_releasing(cinema):
+    seats = [system.SEAT(f"{row}{i}") for row in "ABCD" for i in range(1, 6)]
+    showtime = cinema.movies[0].add_showtime("21:00", 2, seats)
+    user = system.USER("Buyer", "buyer", password_hash="unused")
+    engine = system.PricingEngine()
+    engine.attach(system.event_bus)
+    try:
+        probe = showtime.seats[-1]
+        start = engine.price(probe)
+        prices = []
+        for seat in showtime.seats[:-1]:
+            seat.hold(user, 10)
+            assert engine.price(probe) == engine.compute(probe)
+            prices.append(engine.price(probe))
+        for seat in reversed(showtime.seats[:-1]):
+            seat.free(user)
+            assert engine.price(probe) == engine.compute(probe)
+        assert engine.price(probe) == start
+        assert len(set(prices)) == 4
+    finally:
+        system.event_bus.unsubscribe(engine.on_event)
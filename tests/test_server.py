@@ -0,0 +1,132 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+import system
+from server import BookingClient, BookingServer
+
+
+@pytest.fixture
+def server(service):
+    service.admission = system.AdmissionControl()
+    hasher = system.PasswordHasher(cost=4)
+    users = {"buyer": system.USER("Buyer", "buyer", password_hash=hasher.hash("secret1"))}
+    return BookingServer(service, system.AuthService(users, hasher, workers=1), service.notifications, users)
+
+
+def serve(server, scenario):
+    async def run():
+        await server.start(port=0)
+        port = server.server.sockets[0].getsockname()[1]
+        try:
+            return await scenario(port)
+        finally:
+            await server.close()
+    return asyncio.run(run())
+
+
+async def settle(condition):
+    for _ in range(100):
+        if condition():
+            return True
+        await asyncio.sleep(0.01)
+    return False
+
+
+HOLD = {"cinema": "Test Cinema", "movie": "Test Movie", "time": "19:00"}
+
+
+def test_login_hold_pay_confirm(server):
+    async def scenario(port):
+        client = await BookingClient().connect(port=port)
+        try:
+            with pytest.raises(system.BookingError) as error:
+                await client.call("hold", seat="A1", **HOLD)
+            assert error.value.code == "unauthorized"
+            await client.call("login", login="buyer", password="secret1")
+            cart = await client.call("hold", seat="A1", **HOLD)
+            await client.call("price", cart_id=cart["cart_id"])
+            await client.call("pay", cart_id=cart["cart_id"], method="pix")
+            ticket = await client.call("confirm", cart_id=cart["cart_id"])
+            return ticket, await client.call("bookings")
+        finally:
+            await client.close()
+
+    ticket, bookings = serve(server, scenario)
+    assert ticket["seat"] == "A1"
+    assert bookings == [ticket]
+    assert server.service.carts == {}
+
+
+def test_disconnect_releases_open_carts(server):
+    async def scenario(port):
+        client = await BookingClient().connect(port=port)
+        await client.call("login", login="buyer", password="secret1")
+        cart = await client.call("hold", seat="A2", **HOLD)
+        await client.close()
+        return cart, await settle(lambda: not server.service.carts)
+
+    cart, released = serve(server, scenario)
+    assert released
+    seat = server.service.cinemas["Test Cinema"].movies[0].showtimes[0].seats[1]
+    assert cart["seat"] == "A2" and not seat.is_reserved
+    assert server.service.admission.queued() == 0
+
+
+def test_hold_expiry_is_timed_without_a_sweep(server):
+    async def scenario(port):
+        client = await BookingClient().connect(port=port)
+        try:
+            await client.call("login", login="buyer", password="secret1")
+            await client.call("hold", seat="A3", minutes=5, **HOLD)
+            seat = server.service.cinemas["Test Cinema"].movies[0].showtimes[0].seats[2]
+            assert server.expiry_at == seat.reservation_expiry == server.service.next_expiry()
+            due = datetime.now() - timedelta(seconds=1)
+            expires_at, sequence, cart = server.service.expiries[0]
+            server.service.expiries[0] = (due, sequence, cart)
+            seat.reservation_expiry = due
+            server.schedule_expiry(due)
+            return seat, await settle(lambda: not server.service.carts)
+        finally:
+            await client.close()
+
+    seat, released = serve(server, scenario)
+    assert released and not seat.is_reserved
+    assert server.expiry_timer is None
+
+
+@pytest.mark.parametrize("minutes", ["10", 0, -5, 31, 2.5, True])
+def test_invalid_hold_minutes_are_rejected(server, minutes):
+    async def scenario(port):
+        client = await BookingClient().connect(port=port)
+        try:
+            await client.call("login", login="buyer", password="secret1")
+            with pytest.raises(system.BookingError) as error:
+                await client.call("hold", seat="A1", minutes=minutes, **HOLD)
+            return error.value.code
+        finally:
+            await client.close()
+
+    assert serve(server, scenario) == "invalid_minutes"
+    showtime = server.service.cinemas["Test Cinema"].movies[0].showtimes[0]
+    assert showtime.free_count == 5
+    assert server.service.admission.unheld.get(showtime.id, 0) == 0
+
+
+def test_malformed_input_gets_bad_request(server):
+    async def scenario(port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        replies = []
+        for line in (b"[1, 2]", b"not json", b'{"op": [1]}', b'{"id": 7}', b'{"id": 8, "op": "ping", "x": 1}',
+                     b'{"id": 9, "op": "nope"}', b'{"id": 10, "op": "ping"}'):
+            writer.write(line + b"\n")
+            await writer.drain()
+            replies.append(json.loads(await reader.readline()))
+        writer.close()
+        return replies
+
+    replies = serve(server, scenario)
+    assert [reply.get("error") for reply in replies] == ["bad_request"] * 5 + ["unknown_op", None]
+    assert replies[-1] == {"id": 10, "ok": True, "result": "pong"}
@@ -0,0 +1,52 @@
+import pytest
+
+import sharding
+
+BUILDER = ("benchmarks.datagen", "build_catalog", {"cinemas": 5, "showtimes": 1, "seats": 5, "users": 2})
+
+
+@pytest.fixture(scope="module")
+def router():
+    router = sharding.ShardRouter(2, BUILDER)
+    yield router
+    router.close()
+
+
+def buy(router, cinema, seat):
+    cart = router.hold("user0", cinema, f"Movie {cinema[-1]}-0", "10:00", seat)
+    router.price("user0", cinema, cart["cart_id"])
+    router.pay("user0", cinema, cart["cart_id"], "pix")
+    return router.confirm("user0", cinema, cart["cart_id"])
+
+
+def test_cinemas_are_split_and_queries_merged(router):
+    owners = {cinema: sharding.shard_for(cinema, 2) for cinema in router.cinemas()}
+    assert list(owners) == [f"Cinema {i}" for i in range(5)]
+    assert set(owners.values()) == {0, 1}
+    assert [len(names) for names in router.gather("cinemas")] == [1, 4]
+    assert len(router.search("movie")) == 10
+
+
+def test_cart_ops_are_routed_to_the_owning_shard(router):
+    tickets = [buy(router, cinema, "A1") for cinema in ("Cinema 0", "Cinema 4")]
+    assert [ticket["seat"] for ticket in tickets] == ["A1", "A1"]
+    assert len(router.bookings("user0")) == 2
+    assert router.sales_report()["total_bookings"] == 2
+
+    cart = router.hold("user1", "Cinema 4", "Movie 4-0", "10:00", "A2")
+    assert "A2" not in router.seats("Cinema 4", "Movie 4-0", "10:00")
+    assert router.release("user1", "Cinema 4", cart["cart_id"])
+    assert "A2" in router.seats("Cinema 4", "Movie 4-0", "10:00")
+
+
+def test_shard_errors_reach_the_caller(router):
+    router.hold("user1", "Cinema 0", "Movie 0-0", "10:00", "A3")
+    with pytest.raises(sharding.ShardError) as error:
+        router.hold("user0", "Cinema 0", "Movie 0-0", "10:00", "A3")
+    assert error.value.code == "seat_taken"
+    with pytest.raises(sharding.ShardError) as error:
+        router.hold("nobody", "Cinema 4", "Movie 4-0", "10:00", "A3")
+    assert error.value.code == "user_not_found"
+    with pytest.raises(sharding.ShardError) as error:
+        router.call("Cinema 4", "missing")
+    assert error.value.code == "shard_error"
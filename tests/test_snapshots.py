@@ -0,0 +1,47 @@
+import random
+
+import system
+
+
+def view(snapshot):
+    return ({showtime_id: (m.labels, m.states, m.free) for showtime_id, m in snapshot.seat_maps.items()},
+            snapshot.cinemas, snapshot.total_bookings, snapshot.active_coupons)
+
+
+def test_incremental_publish_matches_a_full_rebuild(make_cinema):
+    rng = random.Random(7)
+    cinemas, users, promotions = {}, {}, system.PromotionManager()
+    user = users["buyer"] = system.USER("Buyer", "buyer", password_hash="unused")
+    store = system.SnapshotStore(cinemas, users, promotions)
+    store.attach(system.event_bus)
+    try:
+        for c in range(2):
+            cinemas[f"Cinema {c}"] = make_cinema(f"Cinema {c}", [f"Movie {c}.{m}" for m in range(2)], seats=8)
+        store.publish()
+
+        for step in range(300):
+            cinema = rng.choice(list(cinemas.values()))
+            movie = rng.choice(cinema.movies)
+            action = rng.random()
+            if action < 0.05:
+                added = system.MOVIE(f"New {step}", 90, "Comedy")
+                added.add_showtime("20:00", 3, [system.SEAT(f"C{i}") for i in range(1, 5)])
+                cinema.add_movie(added)
+            elif action < 0.1:
+                movie.add_showtime(f"{10 + step % 12}:{step % 60:02d}", 2, [system.SEAT(f"B{i}") for i in range(1, 5)])
+            elif action < 0.15:
+                movie.record_sale(20.0)
+            elif movie.showtimes:
+                seat = rng.choice(rng.choice(movie.showtimes).seats)
+                if not seat.is_reserved:
+                    seat.hold(user, 10)
+                elif rng.random() < 0.5:
+                    seat.sell()
+                else:
+                    seat.free(user)
+            if step % 7 == 0:
+                incremental = store.snapshot()
+                store.invalidate()
+                assert view(incremental) == view(store.snapshot())
+    finally:
+        system.event_bus.unsubscribe(store.on_event)
@@ -0,0 +1,84 @@
+import pytest
+
+import storage
+import system
+
+
+@pytest.fixture
+def database(tmp_path, cinema):
+    showtime = cinema.movies[0].showtimes[0]
+    user = system.USER("Buyer", "buyer", password_hash="unused")
+    seat = showtime.seats[0]
+    seat.hold(user)
+    seat.sell()
+    showtime.seats[1].hold(user, 10)
+    user.booking_history.append(system.TICKET("Standard", 25.0, seat, showtime))
+
+    path = str(tmp_path / "cinema.db")
+    saved = storage.Storage(path)
+    saved.save_all({cinema.name: cinema}, {user.login: user}, system.PromotionManager(),
+                   system.NotificationService(echo=False))
+    saved.close()
+    database = storage.Storage(path)
+    yield database
+    database.close()
+
+
+def load(database, lazy=True):
+    cinemas, users = {}, {}
+    database.load_into(cinemas, users, system.PromotionManager(), system.NotificationService(echo=False), lazy)
+    return cinemas, users
+
+
+def test_snapshot_does_not_hydrate_lazy_catalog(database):
+    cinemas, users = load(database)
+    movie = cinemas["Test Cinema"].movies[0]
+    user = users["buyer"]
+    store = system.SnapshotStore(cinemas, users, system.PromotionManager())
+    store.attach(system.event_bus)
+    try:
+        snapshot = store.publish()
+        assert movie.loader is not None and user.loader is not None
+        assert snapshot.total_bookings == 1
+        assert snapshot.seat_maps == {}
+
+        showtime = movie.showtimes[0]
+        snapshot = store.snapshot()
+        assert snapshot.free(showtime.id) == 4
+        assert snapshot.movies("Test Cinema")[0].showtimes[0].time == "19:00"
+    finally:
+        system.event_bus.unsubscribe(store.on_event)
+
+
+def test_booking_count_matches_loaded_history(database):
+    user = load(database)[1]["buyer"]
+    assert user.booking_count == 1
+    assert user.loader is not None
+    assert len(user.booking_history) == user.booking_count == 1
+
+
+@pytest.mark.parametrize("lazy", [True, False])
+def test_temporary_holds_are_not_restored(database, lazy):
+    showtime = load(database, lazy)[0]["Test Cinema"].movies[0].showtimes[0]
+    assert [seat.is_reserved for seat in showtime.seats[:2]] == [True, False]
+    assert showtime.free_count == 4
+    assert database.availability.available(showtime) == ["A2", "A3", "A4", "A5"]
+
+
+def test_failed_write_does_not_roll_back_its_batch(tmp_path):
+    writer = storage.WriteBatcher(str(tmp_path / "batch.db"), max_delay=1)
+    try:
+        writer.submit("CREATE TABLE items (name TEXT PRIMARY KEY)")
+        writer.flush()
+        writer.submit("INSERT INTO items VALUES (?)", ("first",))
+        writer.submit("INSERT INTO missing VALUES (?)", ("lost",))
+        writer.submit_many("INSERT INTO items VALUES (?)", [("second",), ("first",)])
+        writer.submit("INSERT INTO items VALUES (?)", ("third",))
+        writer.flush()
+        rows = writer.connection.execute("SELECT name FROM items ORDER BY name").fetchall()
+    finally:
+        writer.close()
+    assert rows == [("first",), ("third",)]
+    assert writer.errors == 2
+    assert [sql for sql, _ in writer.failed] == ["INSERT INTO missing VALUES (?)", "INSERT INTO items VALUES (?)"]
+    assert writer.writes == 3
@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import system
+
+
+@pytest.fixture
+def service(make_cinema, make_service):
+    service = make_service(*(make_cinema(name, (f"{name} Movie",), seats=1)
+                             for name in ("Other Cinema", "Test Cinema")))
+    service.waitlist.attach(system.event_bus)
+    yield service
+    system.event_bus.unsubscribe(service.waitlist.on_event)
+
+
+def user(login, bookings=0):
+    member = system.USER(login.title(), login, password_hash="unused")
+    member._booking_history = [None] * bookings
+    return member
+
+
+def hold(service, member):
+    return service.hold_seat(member, "Test Cinema", "Test Cinema Movie", "19:00", "A1")
+
+
+def join(service, member):
+    return service.join_waitlist(member, "Test Cinema", "Test Cinema Movie", "19:00")
+
+
+def test_released_seat_goes_to_best_tier_then_first_to_join(service):
+    first, second, gold = user("first"), user("second"), user("gold", bookings=20)
+    cart = hold(service, user("owner"))
+    for member in (first, second, gold):
+        join(service, member)
+    showtime = cart.showtime
+
+    order = []
+    for _ in range(3):
+        service.release(cart)
+        offers = [service.waitlist.offer_for(member, showtime) for member in (first, second, gold)]
+        cart = next(offer for offer in offers if offer is not None)
+        assert cart.cinema is service.cinemas["Test Cinema"]
+        order.append(cart.user)
+    assert order == [gold, first, second]
+    assert service.waitlist.waiting(showtime) == 0
+
+
+def test_members_who_left_are_skipped(service):
+    first, second = user("first"), user("second")
+    cart = hold(service, user("owner"))
+    join(service, first)
+    join(service, second)
+    service.leave_waitlist(first, "Test Cinema", "Test Cinema Movie", "19:00")
+
+    service.release(cart)
+    assert service.waitlist.offer_for(first, cart.showtime) is None
+    assert service.waitlist.offer_for(second, cart.showtime).seat is cart.seat
+
+
+class Later(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return datetime.now(tz) + timedelta(minutes=15)
+
+
+def test_expired_offer_passes_to_the_next_waiter(service, monkeypatch):
+    first, second = user("first"), user("second")
+    cart = hold(service, user("owner"))
+    join(service, first)
+    join(service, second)
+    service.release(cart)
+    offer = service.waitlist.offer_for(first, cart.showtime)
+    assert service.next_expiry() == offer.seat.reservation_expiry
+
+    monkeypatch.setattr(system, "datetime", Later)
+    service.list_seats("Test Cinema", "Test Cinema Movie", "19:00")
+    assert offer.id not in service.carts
+    assert service.waitlist.offer_for(second, cart.showtime).seat is cart.seat